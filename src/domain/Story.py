@@ -1,8 +1,14 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
 class Story:
     def __init__(self, name, elevation, level_id):
         self.name = name
         self.elevation = elevation # En metros (normalizado)
         self.id = level_id
+        self.is_master = False  # Piso maestro de un grupo de pisos típicos
+        self.similar_to = None  # Story maestro al que es similar (None si no aplica)
 
     def get_data(self, height):
         """
@@ -71,6 +77,11 @@ class StoryManager:
         for story in self.stories:
             story.elevation += dz
 
+    def get_etabs_name(self, story):
+        """Nombre del piso en ETABS (el primer nivel es la base y no tiene nombre)."""
+        idx = self.stories.index(story)
+        return f"P{idx}" if idx > 0 else "Base"
+
     def to_etabs_commands(self,etabs_model):
         """
         Genera una lista de comandos para definir la estructura de pisos en ETABS.
@@ -78,8 +89,8 @@ class StoryManager:
         StoryNames = [f"P{i+1}" for i, story in enumerate(self.stories[1:])] # Elevación de cada piso (0 por defecto)
         StoryElevations=[story.elevation for story in self.stories] # Elevación de cada piso
         StoryHeights=[self.get_story_height(story.id) for story in self.stories[1:]] # Altura de cada piso
-        IsMasterStory=[False for elem in self.stories[1:]] # Ninguno es un piso maestro
-        SimilarToStory=["None" for elem in self.stories[1:]] # Ninguno es similar a otro
+        IsMasterStory=[bool(story.is_master) for story in self.stories[1:]] # Pisos maestros (ver TypicalFloorDetector)
+        SimilarToStory=[self.get_etabs_name(story.similar_to) if story.similar_to else "None" for story in self.stories[1:]]
         SpliceAbove=[False for elem in self.stories[1:]] # No hay empalme arriba
         SpliceHeight=[0 for elem in self.stories[1:]] # Altura de empalme (0 por defecto)
         ret=etabs_model.Story.SetStories(StoryNames, StoryElevations, StoryHeights,IsMasterStory, SimilarToStory, SpliceAbove, SpliceHeight)
@@ -20,12 +20,28 @@ class FrameElement(StructuralElement):
     def get_geometry_summary(self):
         return f"Línea de {self.start_node.id} a {self.end_node.id}"
 
+    def get_etabs_section(self):
+        """Nombre de la sección en ETABS (ver PropertyCatalog, que unifica secciones duplicadas)."""
+        return str(self.section)
+
     def to_etabs_command(self, sap_model):
         """Llamada real a la API de ETABS para dibujar un Frame."""
         # Retorna (NombreElemento, Resultado)
         ret = sap_model.FrameObj.AddByCoord(
             self.start_node.x, self.start_node.y, self.start_node.z,
             self.end_node.x, self.end_node.y, self.end_node.z,
-            "", "V-20/30", "None"
+            "", self.get_etabs_section(), "None"
+        )
+        return ret
+
+    def to_etabs_point_command(self, sap_model, name=""):
+        """
+        Dibuja el Frame entre puntos ya existentes en ETABS (nombrados con Node.id),
+        sin que ETABS tenga que fusionar coordenadas.
+        """
+        # Formato: AddByPoint(Point1, Point2, Name, PropName, UserName)
+        ret = sap_model.FrameObj.AddByPoint(
+            str(self.start_node.id), str(self.end_node.id),
+            "", self.get_etabs_section(), name
         )
-        return ret
\ No newline at end of file
+        return ret
@@ -14,6 +14,10 @@ class SlabElement(StructuralElement):
     def get_geometry_summary(self):
         return f"Slab con {len(self.nodes)}"
 
+    def get_etabs_section(self):
+        """Nombre de la sección en ETABS (ver PropertyCatalog, que unifica secciones duplicadas)."""
+        return str(self.section)
+
     def to_etabs_command(self, sap_model):
         """
         Genera el comando AddByCoord para ETABS.
@@ -27,8 +31,19 @@ class SlabElement(StructuralElement):
         
         # Formato: AddByCoord(NumberPoints, X, Y, Z, Name, PropName, UserName)
         # Dejamos el nombre vacío ("") para que ETABS asigne uno automático
-        #temporalemnte definire la seccion con M-20 para pruebas, luego sera self.Section
-        section="B025-Depto-15"
+        section=self.get_etabs_section()
         ret = sap_model.AreaObj.AddByCoord(n_nodes, x_coords, y_coords, z_coords, "", section)
 
-        return ret
\ No newline at end of file
+        return ret
+
+    def to_etabs_point_command(self, sap_model, name=""):
+        """
+        Genera el comando AddByPoint para ETABS usando los puntos ya creados
+        con el nombre de cada Node.id (sin fusión de coordenadas en ETABS).
+        """
+        point_names = [str(n.id) for n in self.nodes]
+
+        # Formato: AddByPoint(NumberPoints, Point, Name, PropName, UserName)
+        ret = sap_model.AreaObj.AddByPoint(len(point_names), point_names, "", self.get_etabs_section(), name)
+
+        return ret
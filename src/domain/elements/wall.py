@@ -34,6 +34,10 @@ class WallElement(StructuralElement):
     def get_geometry_summary(self):
         return f"Wall con {len(self.nodes)}"
 
+    def get_etabs_section(self):
+        """Nombre de la sección en ETABS (ver PropertyCatalog, que unifica secciones duplicadas)."""
+        return str(self.section)
+
     def to_etabs_command(self, sap_model):
         """
         Genera el comando AddByCoord para ETABS.
@@ -47,12 +51,23 @@ class WallElement(StructuralElement):
         
         # Formato: AddByCoord(NumberPoints, X, Y, Z, Name, PropName, UserName)
         # Dejamos el nombre vacío ("") para que ETABS asigne uno automático
-        #temporalemnte definire la seccion con M-20 para pruebas, luego sera self.Section
-        section="M-20"
+        section=self.get_etabs_section()
         ret = sap_model.AreaObj.AddByCoord(n_nodes, x_coords, y_coords, z_coords, "", section)
 
         return ret
-        
+
+    def to_etabs_point_command(self, sap_model, name=""):
+        """
+        Genera el comando AddByPoint para ETABS usando los puntos ya creados
+        con el nombre de cada Node.id (sin fusión de coordenadas en ETABS).
+        """
+        point_names = [str(n.id) for n in self.nodes]
+
+        # Formato: AddByPoint(NumberPoints, Point, Name, PropName, UserName)
+        ret = sap_model.AreaObj.AddByPoint(len(point_names), point_names, "", self.get_etabs_section(), name)
+
+        return ret
+
     def get_angle(self):
         # Para un muro, calculamos el ángulo del primer segmento (N1 a N2)
         # Asumiendo que los nodos están ordenados secuencialmente
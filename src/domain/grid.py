@@ -6,6 +6,7 @@ class GridLine:
         self.label = label
         self.angle_deg = angle_deg
         self.rho = rho
+        self.element_count = None # Elementos sobre la grilla (ver GridManager.cleanup_unused_grids)
 
     def get_endpoints(self, bbox):
         """
@@ -63,6 +63,44 @@ class GridSystem:
 
 
 
+class GridOccupancyIndex:
+    """
+    Índice de ocupación de grillas, construido una vez por limpieza.
+    Los elementos se agrupan por ángulo (get_angle ya viene redondeado) y, para
+    cada par (grupo, ángulo de grilla), se guarda un arreglo ordenado de los
+    rhos del nodo inicial. Cada grilla se consulta con búsqueda binaria.
+    """
+
+    def __init__(self, elements, angle_tolerance=0.1):
+        self.angle_tolerance = angle_tolerance
+        buckets = {}
+        for e in elements:
+            buckets.setdefault(e.get_angle(), []).append((e.start_node.x, e.start_node.y))
+
+        self.bucket_angles = np.array(sorted(buckets), dtype=float)
+        self.bucket_points = [np.array(buckets[a], dtype=float) for a in sorted(buckets)]
+        self._rhos = {} # (índice de grupo, ángulo de grilla) -> rhos ordenados
+
+    def _sorted_rhos(self, bucket, grid_angle):
+        key = (bucket, grid_angle)
+        if key not in self._rhos:
+            theta = np.radians((grid_angle + 90) % 180)
+            pts = self.bucket_points[bucket]
+            self._rhos[key] = np.sort(pts[:, 0] * np.cos(theta) + pts[:, 1] * np.sin(theta))
+        return self._rhos[key]
+
+    def count(self, grid, tolerance):
+        """Cantidad de elementos paralelos a la grilla y a menos de tolerance de ella."""
+        lo = np.searchsorted(self.bucket_angles, grid.angle_deg - self.angle_tolerance, side='right')
+        hi = np.searchsorted(self.bucket_angles, grid.angle_deg + self.angle_tolerance, side='left')
+        total = 0
+        for bucket in range(lo, hi):
+            rhos = self._sorted_rhos(bucket, grid.angle_deg)
+            total += int(np.searchsorted(rhos, grid.rho + tolerance, side='left')
+                         - np.searchsorted(rhos, grid.rho - tolerance, side='right'))
+        return total
+
+
 class GridManager:
     def __init__(self, model):
         self.model = model
@@ -87,15 +125,20 @@ class GridManager:
         """Utilidad para ver qué tenemos cargado"""
         return {
             "sistemas": len(self.systems),
-            "grillas": len(self.get_all_grids())
+            "grillas": len(self.get_all_grids()),
+            # Disponible luego de cleanup_unused_grids
+            "elementos_por_grilla": {g.label: g.element_count for g in self.get_all_grids()
+                                     if g.element_count is not None}
         }
     
     def cleanup_unused_grids(self, tolerance=0.01):
         """
         Elimina las grillas que no tienen elementos (muros, vigas, columnas) 
-        posicionados sobre ellas.
+        posicionados sobre ellas. Deja en cada GridLine la cantidad de
+        elementos que la ocupan (element_count).
         """
         elements = self.model.beams + self.model.walls + self.model.columns
+        index = GridOccupancyIndex(elements)
         
         for system in self.systems:
             active_grids = []
@@ -111,7 +154,8 @@ class GridManager:
                 angle_active_grids = []
                 
                 for grid in grid_list:
-                    if self._is_grid_occupied(grid, elements, tolerance):
+                    grid.element_count = index.count(grid, tolerance)
+                    if grid.element_count:
                         angle_active_grids.append(grid)
                 
                 # REGLA: Si ninguna grilla de este ángulo tiene elementos, 
@@ -125,21 +169,7 @@ class GridManager:
 
     def _is_grid_occupied(self, grid, elements, tolerance):
         """Verifica si algún elemento estructural yace sobre la grilla."""
-        for e in elements:
-            # 1. El elemento debe tener el mismo ángulo (o paralelo)
-            ma=e.get_angle()
-            ga=grid.angle_deg
-            if abs(e.get_angle() - grid.angle_deg) < 0.1:
-                # 2. El elemento debe estar en el mismo rho
-                # Usamos el primer nodo del elemento para calcular su rho
-                pi = e.start_node
-                theta = np.radians((grid.angle_deg + 90) % 180)
-                rho_i = pi.x * np.cos(theta) + pi.y * np.sin(theta)
-                rho_g=grid.rho
-                
-                if abs(rho_i - grid.rho) < tolerance:
-                    return True
-        return False
+        return GridOccupancyIndex(elements).count(grid, tolerance) > 0
     
     def rename_grids(self):
         for system in self.systems:
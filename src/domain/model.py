@@ -30,6 +30,10 @@ class Model:
         self.columns = []
         self.walls = []
         self.slabs = []
+
+        # Muros y losas originales (antes de descomponer), para poder
+        # re-descomponerlos con otros parámetros (ver ModelCoarsener)
+        self.shell_sources = {"walls": [], "slabs": []}
  
     def add_beam(self, revit_id, section, level, p1, p2):
         """
@@ -67,16 +71,39 @@ class Model:
         y agrega los sub-elementos resultantes al modelo.
         """
         # 1. Creamos un objeto temporal (Dummy) para que el procesador lo lea
-        temp_wall = WallElement(revit_id, section, level, [])
-        temp_wall.exterior_points = exterior_pts
-        temp_wall.holes_points = holes_pts
-        temp_wall.total_height = height
+        temp_wall = self._make_temp_wall(revit_id, exterior_pts, holes_pts, section, level, height)
+        self.shell_sources["walls"].append(temp_wall)
 
         # 2. El procesador descompone el muro en rectángulos analíticos
         # Importante: El WallProcessor usará internamente model.node_manager
         new_elements = self.wall_processor.process_element(temp_wall)
 
         # 3. Clasificamos y guardamos los resultados
+        self._register_wall_elements(new_elements)
+        return new_elements
+
+    def add_walls(self, walls_data, parallel=None):
+        """
+        Versión por lotes de add_wall. walls_data es una lista de diccionarios con
+        los mismos argumentos de add_wall. La descomposición puede correr en paralelo;
+        el resultado (incluidos los IDs de nodo) es idéntico al de llamar add_wall
+        muro por muro en el mismo orden.
+        """
+        temp_walls = [self._make_temp_wall(**w) for w in walls_data]
+        self.shell_sources["walls"].extend(temp_walls)
+        results = self.wall_processor.process_elements(temp_walls, parallel=parallel)
+        for new_elements in results:
+            self._register_wall_elements(new_elements)
+        return results
+
+    def _make_temp_wall(self, revit_id, exterior_pts, holes_pts, section, level, height):
+        temp_wall = WallElement(revit_id, section, level, [])
+        temp_wall.exterior_points = exterior_pts
+        temp_wall.holes_points = holes_pts
+        temp_wall.total_height = height
+        return temp_wall
+
+    def _register_wall_elements(self, new_elements):
         for elem in new_elements:
             if isinstance(elem, WallElement):
                 self.walls.append(elem)
@@ -90,8 +117,6 @@ class Model:
                 self.node_manager.register_connection(elem.n2.id, round(elem.get_angle() % 180, 2))
                 self.node_manager.register_connection(elem.n1.id, round((elem.get_angle()+90) % 180, 2))
                 self.node_manager.register_connection(elem.n2.id, round((elem.get_angle()+90) % 180, 2))
-        
-        return new_elements
     
     def add_slab(self, revit_id, exterior_pts, holes_pts, section, level):
         """
@@ -99,18 +124,12 @@ class Model:
         y agrega los sub-elementos resultantes al modelo.
         """
         # 1. Creamos un objeto temporal (Dummy) para que el procesador lo lea
-        temp_slab = SlabElement(revit_id, section, level, [])
-        temp_slab.exterior_points = exterior_pts
-        temp_slab.holes_points = holes_pts
+        temp_slab = self._make_temp_slab(revit_id, exterior_pts, holes_pts, section, level)
 
-        #Verificamos que la losa sea horizontal (Z similar para todos los nodos)
-        maxz=max(node[2] for node in temp_slab.exterior_points) if temp_slab.exterior_points else 0
-        minz=min(node[2] for node in temp_slab.exterior_points) if temp_slab.exterior_points else 0
-        maxz_hole=max(pt[2] for outline in temp_slab.holes_points for pt in outline) if temp_slab.holes_points else maxz
-        minz_hole=min(pt[2] for outline in temp_slab.holes_points for pt in outline) if temp_slab.holes_points else minz
         # 2. El procesador descompone la losa en rectángulos analíticos
         # Importante: El SlabProcessor usará internamente model.node_manager
-        if abs(maxz-minz)<0.01 or abs(maxz_hole-minz_hole)<0.01:
+        if self._is_horizontal_slab(temp_slab):
+            self.shell_sources["slabs"].append(temp_slab)
             new_elements = self.slab_processor.process_element(temp_slab)
             for elem in new_elements:
                 self.slabs.append(elem)
@@ -118,7 +137,53 @@ class Model:
         else:
             print("La losa no es completament horizontal, se descarta")
 
-        # 3. Clasificamos y guardamos los resultados
+    def add_slabs(self, slabs_data, parallel=None):
+        """
+        Versión por lotes de add_slab (ver add_walls). Las losas no horizontales
+        se descartan antes de descomponer.
+        """
+        temp_slabs = []
+        for s in slabs_data:
+            temp_slab = self._make_temp_slab(**s)
+            if self._is_horizontal_slab(temp_slab):
+                temp_slabs.append(temp_slab)
+            else:
+                print("La losa no es completament horizontal, se descarta")
+
+        self.shell_sources["slabs"].extend(temp_slabs)
+        results = self.slab_processor.process_elements(temp_slabs, parallel=parallel)
+        for new_elements in results:
+            self.slabs.extend(new_elements)
+        return results
+
+    def rebuild_shells(self, parallel=None):
+        """
+        Vuelve a descomponer todos los muros y losas originales con la
+        configuración actual de los procesadores. Los nodos que queden sin
+        elementos deben limpiarse luego (GeometryOptimizer.remove_orphan_nodes).
+        """
+        self.walls = []
+        self.slabs = []
+        self.wall_processor.partition_report = []
+        self.slab_processor.partition_report = []
+        for new_elements in self.wall_processor.process_elements(self.shell_sources["walls"], parallel=parallel):
+            self._register_wall_elements(new_elements)
+        for new_elements in self.slab_processor.process_elements(self.shell_sources["slabs"], parallel=parallel):
+            self.slabs.extend(new_elements)
+
+    def _make_temp_slab(self, revit_id, exterior_pts, holes_pts, section, level):
+        temp_slab = SlabElement(revit_id, section, level, [])
+        temp_slab.exterior_points = exterior_pts
+        temp_slab.holes_points = holes_pts
+        return temp_slab
+
+    def _is_horizontal_slab(self, temp_slab):
+        #Verificamos que la losa sea horizontal (Z similar para todos los nodos)
+        maxz=max(node[2] for node in temp_slab.exterior_points) if temp_slab.exterior_points else 0
+        minz=min(node[2] for node in temp_slab.exterior_points) if temp_slab.exterior_points else 0
+        maxz_hole=max(pt[2] for outline in temp_slab.holes_points for pt in outline) if temp_slab.holes_points else maxz
+        minz_hole=min(pt[2] for outline in temp_slab.holes_points for pt in outline) if temp_slab.holes_points else minz
+        return abs(maxz-minz)<0.01 or abs(maxz_hole-minz_hole)<0.01
 
     def add_section(self, type_sec,name,material,params):
         if type_sec == 'Frame' and name not in self.sections:
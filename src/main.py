@@ -1,11 +1,17 @@
 # src/main.py
+import os
 from domain.model import Model
 from utils.logger_config import setup_logger
 from services.revit_loader import RevitLoader
-from services.etabs_writer import EtabsWriter
+from services.etabs_writer import EtabsWriter, get_active_sap_model
+from services.e2k_writer import E2kWriter
 from services.geometry_optimizer import GeometryOptimizer
 from utils.visualizer import StructuralVisualizer
 from services.grid_factory import GridFactory
+from services.model_coarsener import ModelCoarsener
+from services.typical_floor import TypicalFloorDetector
+from services.property_writer import PropertyCatalog
+from utils.fake_sap_model import LatencyModel
 
 # Inicializamos el logger globalmente al inicio
 logger = setup_logger()
@@ -18,6 +24,24 @@ SNAP_THRESHOLD=20 # Distancia angular máxima para que un elemento se considere
 CANONICAL_ANGLES=[0,26,64] # Lista de ángulos fijos (ej. [0, 90, 45]). Si se proporciona,los ángulos detectados se "pegan" a estos valores.
 MAX_DISTANCE=0.15 # Tolerancia de distancia para agrupar nodos similares.
 LMIN=0.2 # Longitud mínima para elementos estructurales.
+PARTITION_MODE="strips" # Descomposición de muros/losas: "strips" (tiras verticales) o "min" (partición mínima en rectángulos)
+MAX_ASPECT_RATIO=None # Razón de aspecto máxima de los rectángulos en modo "min" (None = sin límite)
+TYPICAL_FLOORS=True # Detecta pisos típicos: se optimiza una vez por piso único y se exportan como Master/Similar
+WRITE_MODE="tables" # Escritura a ETABS: "tables" (DatabaseTables en bloque), "points" (puntos por Node.id + AddByPoint), "api" (AddByCoord por objeto), "sync" (solo cambios), "pipelined" (hilo escritor por pisos) o "checkpoint" (por pisos con bitácora, retomable)
+ID_MAP_PATH="output/etabs_ids.sqlite" # Mapa elemento -> objeto ETABS usado por WRITE_MODE="sync"
+JOURNAL_PATH="output/export_journal.jsonl" # Bitácora de trozos confirmados usada por WRITE_MODE="checkpoint"
+TABLE_CHUNK_SIZE=5000 # Filas por bloque aplicado en modo "tables"
+AGENT_ADDRESS=None # ("host", puerto) de un agente remoto con ETABS (python -m services.remote_writer; no admite WRITE_MODE="api"); None = COM local
+AGENT_TOKEN=os.environ.get("REVIT2ETABS_AGENT_TOKEN") # Token compartido con el agente remoto (el mismo que usa el agente)
+LOAD_DEFINITIONS=[] # Cargas por nivel/sección, ej: {"pattern": "SC", "type": "Super Dead", "target": "slabs", "level": "Nivel 2", "value": 150}
+DIAPHRAGMS=True # Asigna un diafragma rígido por piso
+DIAPHRAGM_STORIES=None # Pisos con diafragma (nombres Revit o ETABS); None = todos menos la base
+DIAPHRAGM_MODE="areas" # "areas" (losas del piso) o "joints" (nodos en la elevación del piso)
+EXPORT_TARGET="etabs" # Destino: "etabs" (instancia activa vía COM) o "e2k" (archivo de texto, sin ETABS)
+E2K_PATH="output/modelo.e2k" # Archivo de salida cuando EXPORT_TARGET="e2k"
+DRY_RUN=False # Solo estima llamadas, filas y tiempo de la exportación a ETABS (sin conectarse) y marca volúmenes sospechosos
+COST_PROFILE=None # JSON con el perfil de costos calibrado para DRY_RUN (ver LatencyModel.from_file); None = costos típicos
+ELEMENT_BUDGET=None # Presupuesto de shells + frames para modelos de prediseño (None = sin simplificación)
 
 def run_pipeline(): 
     # 1. Creamos el modelo (Cerebro)
@@ -29,14 +53,31 @@ def run_pipeline():
     grid_factory = GridFactory(modelo)
     optimizer = GeometryOptimizer(modelo)
     viz = StructuralVisualizer(modelo)
-    etabs_model = EtabsWriter(modelo)
+    etabs_model = EtabsWriter(modelo, write_mode=WRITE_MODE, chunk_size=TABLE_CHUNK_SIZE, id_map_path=ID_MAP_PATH,
+                              journal_path=JOURNAL_PATH)
+
+    for processor in (modelo.wall_processor, modelo.slab_processor):
+        processor.partition_mode = PARTITION_MODE
+        processor.max_aspect_ratio = MAX_ASPECT_RATIO
 
     logger.info("Cargando datos...")
     loader.load_json(f"data/{test[7]}.json")
+    logger.info(f"Caché de descomposición: muros {modelo.wall_processor.cache_stats()}, losas {modelo.slab_processor.cache_stats()}")
+    if PARTITION_MODE == "min":
+        logger.info(f"Partición mínima: muros {modelo.wall_processor.partition_summary()}, losas {modelo.slab_processor.partition_summary()}")
     #viz.plot_model(show_nodes=False)
 
     logger.info(f"Resumen del modelo final: {modelo.get_summary()}")
 
+    if ELEMENT_BUDGET:
+        logger.info("Simplificando modelo al presupuesto de elementos...")
+        ModelCoarsener(modelo).coarsen(ELEMENT_BUDGET)
+
+    typical_floors = TypicalFloorDetector(modelo)
+    if TYPICAL_FLOORS:
+        typical_floors.detect()
+        typical_floors.collapse()
+
     logger.info("Iniciando depuración geométrica...")
     optimizer.remove_short_elements(LMIN)
     optimizer.remove_orphan_nodes()
@@ -49,18 +90,47 @@ def run_pipeline():
     optimizer.remove_short_elements(LMIN) #hago una nueva depuración geométrica luego del desplazamiento y ajuste a la grilla
     optimizer.remove_orphan_nodes()
     optimizer.pre_snap_nodes(0.5*MAX_DISTANCE) #hago un agrupamiento de nodos, ahora con una tolerancia menor
+    typical_floors.replicate() #reconstruyo los pisos similares desde sus pisos maestros ya optimizados
 
     modelo.grid_manager.cleanup_unused_grids(tolerance=0.1)  #Elimino las grillas que no tienen elementos asigandos
     modelo.grid_manager.rename_grids()  #renombro las grillsa
     viz.plot_model(show_nodes=True,show_grids=True)
      
     # 3. Escribimos en ETABS (Manos)
+    PropertyCatalog(modelo).deduplicate() #unifico materiales y secciones idénticos antes de exportar
     logger.info(f"Resumen del modelo final: {modelo.get_summary()}")
+    if EXPORT_TARGET == "e2k":
+        logger.info(f"Exportando modelo a {E2K_PATH}...")
+        os.makedirs(os.path.dirname(E2K_PATH) or ".", exist_ok=True)
+        E2kWriter(modelo).write(E2K_PATH)
+        logger.info("-- PROCESO FINALIZADO CON ÉXITO ---\n")
+        return
+
+    if DRY_RUN:
+        report = etabs_model.dry_run(LatencyModel.from_file(COST_PROFILE) if COST_PROFILE else None)
+        logger.info(f"Simulacro: {report['llamadas']} llamadas, {report['filas']} filas, "
+                    f"~{report['tiempo_estimado'] / 60:.1f} min estimados. Por piso: {report['por_piso']}")
+        logger.info("-- PROCESO FINALIZADO CON ÉXITO ---\n")
+        return
+
     logger.info("Iniciando modelación en ETABS...")
-    etabs_model.connect_active_etabs()
+    os.makedirs(os.path.dirname(ID_MAP_PATH) or ".", exist_ok=True)
+    if AGENT_ADDRESS:
+        etabs_model.connect_remote(*AGENT_ADDRESS, token=AGENT_TOKEN)
+    else:
+        etabs_model.connect_active_etabs()
     etabs_model._write_stories()
     etabs_model._write_grids()
-    etabs_model._write_elements()
+    etabs_model._write_sections(deduplicate=False)
+    if WRITE_MODE == "pipelined" and not AGENT_ADDRESS:
+        # El hilo escritor abre su propia conexión COM (apartamento propio)
+        etabs_model.write_pipelined(connect=get_active_sap_model)
+    else:
+        etabs_model._write_elements()
+    etabs_model._write_loads(LOAD_DEFINITIONS)
+    if DIAPHRAGMS:
+        etabs_model._write_diaphragms(DIAPHRAGM_STORIES, DIAPHRAGM_MODE)
+    etabs_model.disconnect_remote()
     
     logger.info("-- PROCESO FINALIZADO CON ÉXITO ---\n")
 
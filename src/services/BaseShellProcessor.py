@@ -1,26 +1,237 @@
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import os
 import numpy as np
 from shapely.geometry import Polygon, box, MultiPolygon, GeometryCollection, LineString
+from shapely.validation import make_valid
+from .decomposition_cache import DecompositionCache, RectangleSet
+from .rect_partition import RectanglePartitioner
+
+logger = logging.getLogger("Revit2Etabs.Service.ShellProcessor")
+
+
+def _decompose_chunk(processor, chunk):
+    """
+    Función de trabajo para el pool de procesos (debe vivir a nivel de módulo
+    para poder serializarse).
+    chunk: Lista de tuplas (indice_padre, exterior_points, holes_points).
+    Devuelve una lista de tuplas (indice_padre, transformación, esquinas).
+    """
+    return [(idx,) + processor.decompose(ext, holes) for idx, ext, holes in chunk]
+
 
 class BaseShellProcessor(ABC):
+    # Modo paralelo: la descomposición con Shapely se reparte en un pool de
+    # procesos y la creación de nodos se hace en el proceso principal en el
+    # mismo orden que el modo serial (IDs de nodo idénticos).
+    parallel = True
+    max_workers = None      # None -> os.cpu_count()
+    min_parallel_batch = 64 # Bajo este número de elementos no conviene levantar el pool
+    chunk_size = 32         # Elementos por tarea enviada a cada worker
+
+    # Caché de descomposiciones: muros/losas repetidos (misma forma, distinta
+    # posición) reutilizan los rectángulos ya calculados.
+    use_cache = True
+    cache_size = 4096
+    cache_tolerance = 1e-3  # 1mm
+
+    # Modo de partición: "strips" (tiras verticales + merge_horizontal) o
+    # "min" (partición mínima en rectángulos por cuerdas, ver RectanglePartitioner).
+    partition_mode = "strips"
+    max_aspect_ratio = None # Solo modo "min": subdivide rectángulos más alargados que esto
+
+    # Regularización de contornos de Revit (vértices desplazados algunos mm o
+    # bordes girados décimas de grado) y eliminación de astillas.
+    regularize = True
+    ordinate_tolerance = 0.005 # Ordenadas u/v a menos de esto se unifican (5mm)
+    angle_tolerance = 0.5      # Bordes a menos de estos grados de la horizontal/vertical se enderezan
+    min_strip_width = 0.05     # Rectángulos más delgados que esto se absorben en su vecino
+
+    # Simplificación (modelos preliminares, ver ModelCoarsener). 0 = desactivado.
+    min_opening_area = 0.0  # Aberturas con área menor (m2) se ignoran
+    min_opening_width = 0.0 # Aberturas con lado menor (m) se ignoran
+    min_panel_area = 0.0    # Paneles con área menor (m2) se fusionan con un vecino
+
     def __init__(self, model):
         self.model = model
         self._current_transform = None
+        self.cache = DecompositionCache(self.cache_size, self.cache_tolerance) if self.use_cache else None
+        self.partition_report = [] # [(revit_id, n_tiras, n_rectángulos)] en modo "min"
+
+    def __getstate__(self):
+        # Al enviar el procesador a un worker no viaja el modelo completo,
+        # solo la configuración del pipeline.
+        state = self.__dict__.copy()
+        state['model'] = None
+        state['_current_transform'] = None
+        state['cache'] = None  # Cada worker descompone sin caché; la caché vive en el proceso principal
+        state['partition_report'] = []
+        return state
 
     def process_element(self, original_element):
         """Pipeline común para cualquier Shell (Muro o Losa)."""
-        # 1. Proyección a 2D Local
-        poly_2d = self._project_to_2d(original_element)
-        
-        # 2. Pipeline de Shapely (el que ya definiste)
-        rects_2d = self._run_shapely_pipeline(poly_2d)
-        
+        # 1 y 2. Proyección a 2D local + pipeline de Shapely
+        transform, corners = self.decompose(original_element.exterior_points, original_element.holes_points)
+
         # 3. Creación de elementos específicos (Delegado a las hijas)
+        return self._build_elements(original_element, transform, corners)
+
+    def process_elements(self, elements, parallel=None):
+        """
+        Procesa un lote de elementos. Devuelve una lista con los sub-elementos
+        de cada elemento original, en el mismo orden del lote.
+        parallel: Fuerza (True/False) el modo paralelo. None usa self.parallel.
+        """
+        results = self.decompose_elements(elements, parallel=parallel)
+
+        # La creación de nodos ocurre siempre aquí, en orden de índice padre,
+        # para que el NodeManager asigne los mismos IDs que el modo serial.
+        return [self._build_elements(elem, transform, corners)
+                for elem, (transform, corners) in zip(elements, results)]
+
+    def decompose_elements(self, elements, parallel=None):
+        """
+        Descompone un lote sin crear nodos ni elementos.
+        Devuelve una lista de (transformación, esquinas) en el orden del lote.
+        """
+        if parallel is None:
+            parallel = self.parallel
+
+        if parallel and len(elements) >= self.min_parallel_batch:
+            try:
+                return self._decompose_parallel(elements)
+            except Exception as e:
+                logger.warning(f"Descomposición paralela falló ({e}), se continúa en modo serial.")
+
+        return [self.decompose(e.exterior_points, e.holes_points) for e in elements]
+
+    def _decompose_parallel(self, elements):
+        """
+        Reparte la descomposición en un ProcessPoolExecutor y reordena por índice padre.
+        Los aciertos de caché se resuelven en el proceso principal y las formas
+        repetidas dentro del lote se envían una sola vez a los workers.
+        """
+        results = [None] * len(elements)
+        tasks = []
+        pending = {} # llave -> [(indice, offset, transformación)]
+        for i, e in enumerate(elements):
+            if self.cache is None:
+                tasks.append((i, e.exterior_points, e.holes_points))
+                continue
+
+            poly_2d = self._project_points_to_2d(e.exterior_points, e.holes_points)
+            transform = self._current_transform
+            key, offset = self.cache.make_key(poly_2d, self._cache_signature())
+            if key in pending:
+                self.cache.hits += 1
+                pending[key].append((i, offset, transform))
+                continue
+            corners = self.cache.get(key, offset)
+            if corners is not None:
+                results[i] = (transform, corners)
+                continue
+            pending[key] = [(i, offset, transform)]
+            tasks.append((i, e.exterior_points, e.holes_points))
+
+        if tasks:
+            chunks = [tasks[i:i + self.chunk_size] for i in range(0, len(tasks), self.chunk_size)]
+            max_workers = self.max_workers or os.cpu_count() or 1
+            with ProcessPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+                futures = [executor.submit(_decompose_chunk, self, chunk) for chunk in chunks]
+                for future in futures:
+                    for idx, transform, corners in future.result():
+                        results[idx] = (transform, corners)
+            logger.debug(f"Descomposición paralela: {len(tasks)} de {len(elements)} elementos en {len(chunks)} tareas.")
+
+        # Formas repetidas: se guardan en caché y se reproyectan al resto del grupo
+        for key, group in pending.items():
+            first_idx, first_offset, _ = group[0]
+            self.cache.put(key, first_offset, results[first_idx][1])
+            for idx, offset, transform in group[1:]:
+                results[idx] = (transform, results[first_idx][1].translated(offset - first_offset))
+
+        return results
+
+    def decompose(self, exterior_points, holes_points):
+        """
+        Proyecta el contorno a 2D y lo descompone en rectángulos.
+        No toca el modelo, por lo que puede ejecutarse en otro proceso.
+        Devuelve (transformación, esquinas) donde esquinas es una lista de
+        arreglos (4, 2) con los vértices de cada rectángulo en coordenadas locales.
+        """
+        poly_2d = self._project_points_to_2d(exterior_points, holes_points)
+        transform = self._current_transform
+
+        if self.cache is None:
+            return transform, self._decompose_2d(poly_2d)
+
+        key, offset = self.cache.make_key(poly_2d, self._cache_signature())
+        corners = self.cache.get(key, offset)
+        if corners is None:
+            corners = self._decompose_2d(poly_2d)
+            self.cache.put(key, offset, corners)
+        return transform, corners
+
+    def _decompose_2d(self, poly_2d):
+        openings = 0
+        if self.min_opening_area or self.min_opening_width:
+            poly_2d, openings = self.filtrar_aberturas(poly_2d)
+
+        slivers = 0
+        if self.regularize:
+            poly_2d, slivers = self.regularizar_contorno(poly_2d)
+
+        rects_2d = self._run_shapely_pipeline(poly_2d)
+        if self.regularize:
+            rects_2d, absorbed = self.absorber_astillas(rects_2d)
+            slivers += absorbed
+
+        panels = 0
+        if self.min_panel_area:
+            rects_2d, panels = self.fusionar_paneles(rects_2d)
+
+        corners = RectangleSet((np.asarray(r.exterior.coords)[:-1] for r in rects_2d), slivers_removed=slivers,
+                               openings_ignored=openings, panels_merged=panels)
+        if self.partition_mode == "min":
+            corners.baseline_count = len(self._run_strips_pipeline(poly_2d))
+        return corners
+
+    def _cache_signature(self):
+        """Parámetros del pipeline que cambian el resultado y por ende la llave de caché."""
+        regularization = (self.ordinate_tolerance, self.angle_tolerance, self.min_strip_width) if self.regularize else None
+        coarsening = (self.min_opening_area, self.min_opening_width, self.min_panel_area)
+        return (self.__class__.__name__, self.partition_mode, self.max_aspect_ratio, regularization, coarsening)
+
+    def cache_stats(self):
+        return self.cache.stats() if self.cache is not None else {}
+
+    def partition_summary(self):
+        """Reducción total de elementos del modo "min" respecto al pipeline de tiras."""
+        before = sum(r[1] for r in self.partition_report)
+        after = sum(r[2] for r in self.partition_report)
+        return {
+            "elementos": len(self.partition_report),
+            "rectangulos_tiras": before,
+            "rectangulos_min": after,
+            "reduccion": before - after
+        }
+
+    def _build_elements(self, original_element, transform, corners):
+        """Reconstruye los rectángulos y delega la creación de elementos a las hijas."""
+        self._current_transform = transform
+        baseline = getattr(corners, 'baseline_count', None)
+        if baseline is not None:
+            self.partition_report.append((original_element.revit_id, baseline, len(corners)))
+            logger.debug(f"Partición mínima {original_element.revit_id}: {baseline} -> {len(corners)} elementos.")
+        slivers = getattr(corners, 'slivers_removed', 0)
+        if slivers:
+            logger.info(f"Regularización {original_element.revit_id}: {slivers} astillas eliminadas.")
         new_elements = []
-        for rect in rects_2d:
-            element = self._create_structural_element(rect, original_element)
+        for rect_corners in corners:
+            element = self._create_structural_element(Polygon(rect_corners), original_element)
             new_elements.append(element)
-            
         return new_elements
 
     @abstractmethod
@@ -29,6 +240,27 @@ class BaseShellProcessor(ABC):
         pass
 
     def _run_shapely_pipeline(self, poly):
+        if self.partition_mode == "min":
+            rects = self._run_min_partition(poly)
+            if rects is not None:
+                return rects
+        return self._run_strips_pipeline(poly)
+
+    def _run_min_partition(self, poly):
+        """Partición mínima por polígono; None si alguna parte no es rectilínea."""
+        partitioner = RectanglePartitioner(max_aspect_ratio=self.max_aspect_ratio)
+        parts = poly.geoms if isinstance(poly, (MultiPolygon, GeometryCollection)) else [poly]
+        rects = []
+        for part in parts:
+            if part.geom_type != "Polygon":
+                continue
+            sub = partitioner.partition(part)
+            if sub is None:
+                return None
+            rects.extend(sub)
+        return sorted(rects, key=lambda r: r.bounds)
+
+    def _run_strips_pipeline(self, poly):
         rects = self.split_rectangles(poly)
         simplified = self.simplificar_rectangulos(rects)
         return self.merge_horizontal(simplified)
@@ -80,9 +312,13 @@ class BaseShellProcessor(ABC):
         """
         Convierte coordenadas 3D de Revit a 2D para Shapely.
         """
-        coords_3d = wall_element.exterior_points # Lista de (x,y,z)
-        holes_3d = wall_element.holes_points     # Lista de listas de (x,y,z)
-        
+        return self._project_points_to_2d(wall_element.exterior_points, wall_element.holes_points)
+
+    def _project_points_to_2d(self, coords_3d, holes_3d):
+        """
+        coords_3d: Lista de (x,y,z) del contorno exterior.
+        holes_3d: Lista de listas de (x,y,z) de las aberturas.
+        """
         origin, u_axis, v_axis = self._get_local_axes(coords_3d)
         
         def transform(p_list):
@@ -185,8 +421,9 @@ class BaseShellProcessor(ABC):
         simplificados = set(simplificados)
         simplificados = [r for r in simplificados if not r.is_empty]
 
-        # 3 · devolver
-        return list(simplificados)
+        # 3 · devolver en orden determinista (el orden del set depende del hash
+        #     de cada proceso y cambiaría los IDs de nodo entre corridas)
+        return sorted(simplificados, key=lambda r: r.bounds)
 
     def merge_horizontal(self, rects, tol=1e-9):
         """
@@ -216,4 +453,230 @@ class BaseShellProcessor(ABC):
             # ➌ último de la fila
             fusionados.append(box(cur_minx, miny, cur_maxx, maxy))
 
-        return fusionados
\ No newline at end of file
+        return fusionados
+
+    def regularizar_contorno(self, poly):
+        """
+        Pre-proceso del polígono 2D antes de descomponer:
+          - Agrupa ordenadas u (y v) que difieren menos de ordinate_tolerance.
+          - Endereza bordes casi verticales/horizontales (desvío < angle_tolerance).
+          - Elimina vértices colineales resultantes.
+        Devuelve (polígono, n) donde n es la cantidad de astillas que ya no se
+        generarán: separaciones entre ordenadas u o v consecutivas menores a
+        min_strip_width que había antes y no quedan después.
+        """
+        if poly.is_empty or not isinstance(poly, Polygon):
+            return poly, 0
+
+        rings = [list(poly.exterior.coords)[:-1]] + [list(r.coords)[:-1] for r in poly.interiors]
+        pts = np.array([p[:2] for ring in rings for p in ring], dtype=float)
+
+        # Aristas (índices globales) de cada anillo para detectar bordes casi ortogonales
+        edges = []
+        start = 0
+        for ring in rings:
+            n = len(ring)
+            edges.extend((start + i, start + (i + 1) % n) for i in range(n))
+            start += n
+
+        sin_tol = np.sin(np.radians(self.angle_tolerance))
+        n_before = self._thin_gaps(pts)
+        for axis in (0, 1):
+            parent = list(range(len(pts)))
+
+            def find(i):
+                while parent[i] != i:
+                    parent[i] = parent[parent[i]]
+                    i = parent[i]
+                return i
+
+            # a) Ordenadas cercanas (separación entre valores ordenados consecutivos)
+            order = np.argsort(pts[:, axis], kind='stable')
+            for a, b in zip(order[:-1], order[1:]):
+                if pts[b, axis] - pts[a, axis] <= self.ordinate_tolerance:
+                    parent[find(b)] = find(a)
+
+            # b) Bordes casi paralelos al otro eje: sus extremos comparten ordenada
+            for i, j in edges:
+                d = pts[j] - pts[i]
+                length = np.hypot(*d)
+                if length > 0 and abs(d[axis]) <= length * sin_tol:
+                    parent[find(j)] = find(i)
+
+            groups = {}
+            for i in range(len(pts)):
+                groups.setdefault(find(i), []).append(i)
+            for members in groups.values():
+                if len(members) > 1:
+                    pts[members, axis] = np.mean(pts[members, axis])
+
+        n_after = self._thin_gaps(pts)
+
+        new_rings = []
+        start = 0
+        for ring in rings:
+            new_rings.append([tuple(p) for p in pts[start:start + len(ring)]])
+            start += len(ring)
+
+        regular = Polygon(new_rings[0], new_rings[1:])
+        if not regular.is_valid:
+            # make_valid puede dejar restos lineales (muescas colapsadas): se conserva lo poligonal
+            regular = make_valid(regular)
+            if isinstance(regular, GeometryCollection):
+                polygons = [g for g in regular.geoms if isinstance(g, Polygon)]
+                regular = polygons[0] if len(polygons) == 1 else poly
+        regular = regular.simplify(0)
+
+        # Si la regularización deformó el elemento más de lo razonable, se descarta
+        if not isinstance(regular, Polygon) or regular.is_empty or abs(regular.area - poly.area) > 0.01 * poly.area:
+            return poly, 0
+        return regular, max(n_before - n_after, 0)
+
+    def _thin_gaps(self, pts):
+        """Cantidad de separaciones (no nulas) menores a min_strip_width entre ordenadas u y v distintas."""
+        count = 0
+        for axis in (0, 1):
+            gaps = np.diff(np.unique(np.round(pts[:, axis], 9)))
+            count += int(np.count_nonzero(gaps < self.min_strip_width))
+        return count
+
+    def filtrar_aberturas(self, poly):
+        """
+        Ignora las aberturas con área menor a min_opening_area o cuyo lado menor
+        (en el marco local) sea inferior a min_opening_width.
+        Devuelve (polígono, cantidad de aberturas ignoradas).
+        """
+        if not isinstance(poly, Polygon) or not poly.interiors:
+            return poly, 0
+
+        kept = []
+        for ring in poly.interiors:
+            hole = Polygon(ring)
+            minx, miny, maxx, maxy = hole.bounds
+            if hole.area < self.min_opening_area or min(maxx - minx, maxy - miny) < self.min_opening_width:
+                continue
+            kept.append(ring)
+
+        ignored = len(poly.interiors) - len(kept)
+        if not ignored:
+            return poly, 0
+        return Polygon(poly.exterior, kept), ignored
+
+    def absorber_astillas(self, rects, tol=1e-6):
+        """
+        Post-proceso: un rectángulo más delgado que min_strip_width se fusiona con
+        un vecino que comparta completo el lado de contacto (la unión sigue siendo
+        un rectángulo). Si no existe ese vecino (p.ej. en la esquina de una L), los
+        vecinos que tocan la astilla dentro de su largo se extienden a través de
+        ella y la astilla desaparece; se pierde a lo más su área.
+        Devuelve (rectángulos, cantidad de astillas absorbidas).
+        """
+        def is_sliver(minx, miny, maxx, maxy):
+            return (maxx - minx < self.min_strip_width, maxy - miny < self.min_strip_width)
+        return self._merge_into_neighbors(rects, is_sliver, tol, partial=True)
+
+    def fusionar_paneles(self, rects, tol=1e-6):
+        """
+        Simplificación: paneles con área menor a min_panel_area se fusionan con un
+        vecino que comparta completo el lado de contacto, en cualquier dirección.
+        Devuelve (rectángulos, cantidad de paneles fusionados).
+        """
+        def is_small(minx, miny, maxx, maxy):
+            small = (maxx - minx) * (maxy - miny) < self.min_panel_area
+            return (small, small)
+        return self._merge_into_neighbors(rects, is_small, tol)
+
+    def _merge_into_neighbors(self, rects, predicate, tol, partial=False):
+        """
+        predicate(minx, miny, maxx, maxy) -> (fusionar_en_u, fusionar_en_v).
+        Fusiona cada rectángulo marcado con un vecino cuya unión sea un rectángulo.
+        Los lados se indexan por (eje, lado, ordenada, extremos) para encontrar el
+        vecino sin recorrer todos los rectángulos; cada fusión reencola al vecino.
+        partial: si no hay vecino exacto, extiende a través del rectángulo marcado
+        los vecinos de un lado que lo tocan dentro de su largo (ver absorber_astillas).
+        """
+        q = lambda v: int(round(v / tol))
+        bounds = [list(r.bounds) for r in rects] # [minx, miny, maxx, maxy]
+        sides = {}   # (eje, lado, ordenada, desde, hasta) -> ids
+        by_line = {} # (eje, lado, ordenada) -> ids
+
+        # eje 0: lados verticales (u constante); eje 1: lados horizontales (v constante); lado 0 = mínimo
+        def side_key(b, axis, side):
+            return (axis, side, q(b[axis + 2 * side]), q(b[1 - axis]), q(b[3 - axis]))
+
+        def index(i, add=True):
+            for axis in (0, 1):
+                for side in (0, 1):
+                    k = side_key(bounds[i], axis, side)
+                    for table, key in ((sides, k), (by_line, k[:3])):
+                        ids = table.setdefault(key, set())
+                        ids.add(i) if add else ids.discard(i)
+
+        def exact(i, flags):
+            b = bounds[i]
+            for axis in (0, 1):
+                for side in (0, 1):
+                    if not flags[axis]:
+                        continue
+                    # El vecino tiene el lado opuesto sobre la misma ordenada y con los mismos extremos
+                    k = side_key(b, axis, side)
+                    candidates = sides.get((axis, 1 - side) + k[2:], set()) - {i}
+                    if candidates:
+                        j = min(candidates)
+                        o = bounds[j]
+                        return [(j, [min(o[0], b[0]), min(o[1], b[1]), max(o[2], b[2]), max(o[3], b[3])])]
+            return None
+
+        def spanning(i, flags):
+            b = bounds[i]
+            best, best_length = None, 0.0
+            for axis in (0, 1):
+                if not flags[axis]:
+                    continue
+                lo, hi = b[1 - axis], b[3 - axis]
+                for side in (0, 1):
+                    line = (axis, 1 - side, q(b[axis + 2 * side]))
+                    touching = [j for j in by_line.get(line, ()) if j != i and
+                                bounds[j][1 - axis] >= lo - tol and bounds[j][3 - axis] <= hi + tol]
+                    length = sum(bounds[j][3 - axis] - bounds[j][1 - axis] for j in touching)
+                    if touching and length > best_length:
+                        # Cada vecino se extiende hasta el lado opuesto del rectángulo marcado
+                        targets = []
+                        for j in sorted(touching):
+                            nb = list(bounds[j])
+                            nb[axis + 2 * (1 - side)] = b[axis + 2 * (1 - side)]
+                            targets.append((j, nb))
+                        best, best_length = targets, length
+            return best
+
+        for i in range(len(bounds)):
+            index(i)
+
+        alive = set(range(len(bounds)))
+        queue = deque(sorted(alive, key=lambda i: bounds[i]))
+        merged = 0
+        while queue:
+            i = queue.popleft()
+            if i not in alive:
+                continue
+            flags = predicate(*bounds[i])
+            if not (flags[0] or flags[1]):
+                continue
+            targets = exact(i, flags)
+            if targets is None and partial:
+                targets = spanning(i, flags)
+            if not targets:
+                continue
+
+            index(i, add=False)
+            alive.discard(i)
+            for j, new_bounds in targets:
+                index(j, add=False)
+                bounds[j] = new_bounds
+                index(j)
+                queue.append(j)
+            merged += 1
+
+        if not merged:
+            return rects, 0
+        return sorted((box(*bounds[i]) for i in alive), key=lambda r: r.bounds), merged
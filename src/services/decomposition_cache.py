@@ -0,0 +1,113 @@
+from collections import OrderedDict
+import hashlib
+import numpy as np
+from shapely.geometry.polygon import orient
+
+
+class RectangleSet(list):
+    """
+    Lista de esquinas (arreglos (4, 2)) de los rectángulos de una descomposición.
+    baseline_count guarda cuántos rectángulos habría generado el pipeline de
+    tiras (solo se calcula en modos de partición alternativos, para reportar).
+    slivers_removed cuenta las astillas eliminadas por la regularización.
+    openings_ignored y panels_merged cuentan lo simplificado en modo de simplificación.
+    """
+
+    def __init__(self, corners=(), baseline_count=None, slivers_removed=0, openings_ignored=0, panels_merged=0):
+        super().__init__(corners)
+        self.baseline_count = baseline_count
+        self.slivers_removed = slivers_removed
+        self.openings_ignored = openings_ignored
+        self.panels_merged = panels_merged
+
+    def translated(self, offset):
+        out = RectangleSet([np.asarray(c) + offset for c in self])
+        out.__dict__.update(self.__dict__)
+        return out
+
+
+class DecompositionCache:
+    """
+    Memoización de descomposiciones de Shells (muros y losas).
+    La llave es un hash del polígono 2D local (contorno + huecos) trasladado a
+    su esquina inferior izquierda y cuantizado a la tolerancia, por lo que
+    muros/losas repetidos en distintos pisos o posiciones comparten resultado.
+    Los rectángulos se guardan en coordenadas normalizadas y se devuelven
+    trasladados al marco local del elemento que consulta.
+    """
+
+    def __init__(self, maxsize=4096, tolerance=1e-3):
+        """
+        maxsize: Cantidad máxima de descomposiciones guardadas (LRU).
+        tolerance: Tamaño de la celda de cuantización (en metros).
+        """
+        self.maxsize = maxsize
+        self.tolerance = tolerance
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, poly, signature=()):
+        """
+        Devuelve (llave, offset) para un Polygon 2D.
+        offset es la esquina (minx, miny) usada para normalizar la traslación.
+        signature: Tupla con la configuración del pipeline que afecta el resultado.
+        """
+        minx, miny, _, _ = poly.bounds
+        offset = np.array([minx, miny])
+        poly = orient(poly, sign=1.0)
+
+        digest = hashlib.blake2b(repr(signature).encode(), digest_size=16)
+        digest.update(self._canonical_ring(poly.exterior.coords, offset))
+        holes = sorted(self._canonical_ring(ring.coords, offset) for ring in poly.interiors)
+        for hole in holes:
+            digest.update(b'|')
+            digest.update(hole)
+        return digest.digest(), offset
+
+    def _canonical_ring(self, coords, offset):
+        """Anillo cuantizado, sin punto de cierre y comenzando en su vértice mínimo."""
+        pts = np.asarray(coords)[:-1] - offset
+        q = np.round(pts / self.tolerance).astype(np.int64)
+        start = min(range(len(q)), key=lambda i: (q[i, 0], q[i, 1])) if len(q) else 0
+        q = np.roll(q, -start, axis=0)
+        return q.tobytes()
+
+    def get(self, key, offset):
+        """Devuelve las esquinas trasladadas a offset, o None si no está en caché."""
+        normalized = self._data.get(key)
+        if normalized is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return normalized.translated(offset)
+
+    def put(self, key, offset, corners):
+        """Guarda las esquinas (en el marco local) normalizadas respecto a offset."""
+        if not isinstance(corners, RectangleSet):
+            corners = RectangleSet(corners)
+        self._data[key] = corners.translated(-np.asarray(offset))
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entradas": len(self._data),
+            "tasa_aciertos": round(self.hits / total, 3) if total else 0.0
+        }
@@ -0,0 +1,109 @@
+import logging
+import numpy as np
+from services.etabs_tables import EtabsTableWriter
+from utils.etabs_schemas import DIAPHRAGM_TABLE, AREA_DIAPHRAGM_TABLE, JOINT_DIAPHRAGM_TABLE
+
+logger = logging.getLogger("Revit2Etabs.Service.DiaphragmAssigner")
+
+
+class DiaphragmAssigner:
+    """
+    Define un diafragma por piso y lo asigna en bloque a las losas del piso
+    (mode="areas") o a todos los nodos en la elevación del piso (mode="joints").
+    Nodos y losas se agrupan por piso con una búsqueda vectorizada de elevación
+    (searchsorted sobre las elevaciones de story_manager). Los nodos que no caen
+    en ningún nivel quedan en self.off_story_nodes para revisarlos.
+    names: nombres de los elementos en ETABS por categoría (ver
+    EtabsWriter.etabs_names); point_names: Node.id -> nombre del punto en
+    ETABS (None = el punto se llama como su Node.id).
+    """
+
+    def __init__(self, model, sap_model=None, names=None, point_names=None, tolerance=0.01, chunk_size=5000):
+        self.model = model
+        self.SapModel = sap_model
+        self.names = names
+        self.point_names = point_names
+        self.tolerance = tolerance
+        self.chunk_size = chunk_size
+        self.off_story_nodes = []
+
+    def story_index(self, z):
+        """Índice del piso en la elevación z (arreglo), -1 si no hay nivel a menos de la tolerancia."""
+        elevations = np.array([s.elevation for s in self.model.story_manager.stories], dtype=float)
+        z = np.asarray(z, dtype=float)
+        if len(elevations) == 0:
+            return np.full(z.shape, -1, dtype=int)
+        pos = np.clip(np.searchsorted(elevations, z), 1, len(elevations) - 1) if len(elevations) > 1 else \
+            np.zeros(z.shape, dtype=int)
+        # El nivel más cercano es el de pos o el anterior
+        below = np.maximum(pos - 1, 0)
+        nearest = np.where(np.abs(elevations[below] - z) <= np.abs(elevations[pos] - z), below, pos)
+        return np.where(np.abs(elevations[nearest] - z) <= self.tolerance, nearest, -1)
+
+    def diaphragm_name(self, story):
+        return f"D{self.model.story_manager.stories.index(story)}"
+
+    def group(self, stories=None):
+        """
+        Agrupa nodos y losas por piso.
+        stories: nombres de pisos (Revit o ETABS) a incluir; None = todos menos la base.
+        Devuelve {índice de piso: {"nodes": [...], "slabs": [índices en model.slabs]}}.
+        """
+        sm = self.model.story_manager
+        selected = set()
+        for i, story in enumerate(sm.stories):
+            if i == 0 and stories is None:
+                continue # La base no lleva diafragma
+            if stories is None or story.name in stories or sm.get_etabs_name(story) in stories:
+                selected.add(i)
+
+        nodes = list(self.model.node_manager.nodes.values())
+        node_idx = self.story_index([n.z for n in nodes])
+        self.off_story_nodes = [n for n, i in zip(nodes, node_idx) if i < 0]
+        if self.off_story_nodes:
+            sample = ", ".join(str(n.id) for n in self.off_story_nodes[:10])
+            logger.warning(f"{len(self.off_story_nodes)} nodos no están en ninguna elevación de piso "
+                           f"(sin diafragma): {sample}{'...' if len(self.off_story_nodes) > 10 else ''}")
+
+        slab_z = [np.mean([n.z for n in s.nodes]) if s.nodes else np.nan for s in self.model.slabs]
+        slab_idx = self.story_index(slab_z)
+
+        groups = {i: {"nodes": [], "slabs": []} for i in sorted(selected)}
+        for node, i in zip(nodes, node_idx):
+            if i in groups:
+                groups[i]["nodes"].append(node)
+        for k in np.flatnonzero(np.isin(slab_idx, list(groups))):
+            groups[int(slab_idx[k])]["slabs"].append(int(k))
+        return groups
+
+    def write(self, stories=None, mode="areas", rigidity="Rigid"):
+        """
+        Define los diafragmas y los asigna en tres escrituras de tabla.
+        Devuelve un reporte con diafragmas, asignaciones y nodos fuera de nivel.
+        """
+        if mode not in ("areas", "joints"):
+            raise ValueError(f"Modo de diafragma desconocido: {mode}")
+        sm = self.model.story_manager
+        groups = self.group(stories)
+        groups = {i: g for i, g in groups.items() if g["slabs"] or (mode == "joints" and g["nodes"])}
+
+        tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+        names = [self.diaphragm_name(sm.stories[i]) for i in groups]
+        tables.write_table(DIAPHRAGM_TABLE, [names, [rigidity] * len(names)])
+
+        if mode == "areas":
+            if self.names is None or len(self.names["slabs"]) != len(self.model.slabs):
+                raise ValueError("Se necesitan los nombres en ETABS de todas las losas para asignar diafragmas.")
+            objects = [self.names["slabs"][k] for g in groups.values() for k in g["slabs"]]
+            counts = [len(g["slabs"]) for g in groups.values()]
+            table = AREA_DIAPHRAGM_TABLE
+        else:
+            point_name = (lambda n: str(n.id)) if self.point_names is None else (lambda n: self.point_names[n.id])
+            objects = [point_name(n) for g in groups.values() for n in g["nodes"]]
+            counts = [len(g["nodes"]) for g in groups.values()]
+            table = JOINT_DIAPHRAGM_TABLE
+        assigned = tables.write_table(table, [objects, np.repeat(names, counts)])
+
+        report = {"diafragmas": len(names), "asignaciones": assigned, "nodos_fuera_de_nivel": len(self.off_story_nodes)}
+        logger.info(f"Diafragmas: {report}")
+        return report
@@ -0,0 +1,230 @@
+import logging
+import numpy as np
+from domain.material import ConcreteMaterial, SteelMaterial
+from domain.sections import FrameSection, ShellSection
+from services.property_writer import shell_usage
+
+logger = logging.getLogger("Revit2Etabs.Service.E2kWriter")
+
+
+class E2kWriter:
+    """
+    Exporta el modelo a un archivo de texto de ETABS (.e2k) sin COM, para
+    poder correr el pipeline en equipos sin ETABS e importar el archivo después
+    (File > Import > ETABS .e2k).
+
+    En el .e2k los puntos son ubicaciones en planta y los objetos se asignan a
+    un piso: cada extremo indica cuántos pisos bajo el piso del objeto está y,
+    si no coincide con un nivel, el punto lleva su distancia bajo el piso (DZ).
+    Las unidades son las del modelo (metros, kgf), igual que SetPresentUnits(8).
+    """
+
+    def __init__(self, model, decimals=4, buffer_size=1 << 20, tolerance=0.01):
+        """
+        decimals: Decimales de coordenadas y propiedades.
+        buffer_size: Tamaño del buffer de escritura (bytes).
+        tolerance: Tolerancia para considerar que un punto está sobre un nivel.
+        """
+        self.model = model
+        self.decimals = decimals
+        self.buffer_size = buffer_size
+        self.tolerance = tolerance
+        self._points = {} # (x, y, dz) redondeados -> etiqueta del punto
+
+    def write(self, target):
+        """
+        target: Ruta del archivo .e2k o un stream de texto ya abierto.
+        Devuelve la cantidad de líneas escritas.
+        """
+        if hasattr(target, "write"):
+            return self._write_stream(target)
+        with open(target, "w", encoding="utf-8", buffering=self.buffer_size) as f:
+            n = self._write_stream(f)
+        logger.info(f"Archivo {target} escrito ({n} líneas).")
+        return n
+
+    def _write_stream(self, f):
+        self._points = {}
+        self._elevations = np.array([s.elevation for s in self.model.story_manager.stories], dtype=float)
+
+        # Los objetos se arman primero porque definen los puntos en planta
+        objects = list(self._object_lines())
+        blocks = [
+            self._header_lines(),
+            self._story_lines(),
+            self._grid_lines(),
+            self._material_lines(),
+            self._section_lines(),
+            self._point_lines(),
+            objects,
+            ["$ END OF MODEL FILE"],
+        ]
+        n = 0
+        for block in blocks:
+            lines = list(block)
+            f.writelines(line + "\n" for line in lines)
+            n += len(lines)
+        return n
+
+    # ---------- encabezado, pisos y grillas ----------
+    def _header_lines(self):
+        yield "$ File exported from Revit2Etabs"
+        yield ""
+        yield "$ PROGRAM INFORMATION"
+        yield '  PROGRAM  "ETABS"  VERSION "21.0.0"'
+        yield ""
+        yield "$ CONTROLS"
+        yield '  UNITS  "KGF"  "M"  "C"'
+        yield ""
+
+    def _story_lines(self):
+        sm = self.model.story_manager
+        yield "$ STORIES - IN SEQUENCE FROM TOP"
+        for story in reversed(sm.stories[1:]):
+            line = f'  STORY "{sm.get_etabs_name(story)}"  HEIGHT {self._num(sm.get_story_height(story.id))}'
+            if story.is_master:
+                line += '  MASTERSTORY "Yes"'
+            if story.similar_to:
+                line += f'  SIMILARTO "{sm.get_etabs_name(story.similar_to)}"'
+            yield line
+        if sm.stories:
+            yield f'  STORY "{sm.get_etabs_name(sm.stories[0])}"  ELEV {self._num(sm.stories[0].elevation)}'
+        yield ""
+
+    def _grid_lines(self):
+        yield "$ GRIDS"
+        for system in self.model.grid_manager.systems:
+            yield (f'  GRIDSYSTEM "{system.name}"  TYPE "CARTESIAN"  BUBBLESIZE 1.25'
+                   f'  UX {self._num(system.dx)}  UY {self._num(system.dy)}  RZ {self._num(system.angle)}')
+            if not system.grids:
+                continue
+            # Misma convención de direcciones que GridManager.gridLines_to_etabs
+            min_angle = min(g.angle_deg for g in system.grids)
+            for grid in system.grids:
+                direction = "Y" if grid.angle_deg == min_angle else "X"
+                yield (f'  GRID "{system.name}"  LABEL "{grid.label}"  DIR "{direction}"'
+                       f'  COORD {self._num(grid.rho)}  VISIBLE "Yes"  BUBBLELOC "Default"')
+        yield ""
+
+    # ---------- materiales y secciones ----------
+    def _material_lines(self):
+        yield "$ MATERIAL PROPERTIES"
+        for name, mat in self.model.materials.items():
+            type_name = "Steel" if isinstance(mat, SteelMaterial) else "Concrete"
+            line = f'  MATERIAL  "{name}"  TYPE "{type_name}"'
+            if mat.unit_weight is not None:
+                line += f"  WEIGHTPERVOLUME {self._num(mat.unit_weight)}"
+            yield line
+            if mat.e is not None:
+                line = f'  MATERIAL  "{name}"  SYMTYPE "Isotropic"  E {self._num(mat.e)}'
+                if mat.v is not None:
+                    line += f"  U {self._num(mat.v)}"
+                yield line
+            if isinstance(mat, ConcreteMaterial) and mat.fc is not None:
+                yield f'  MATERIAL  "{name}"  FC {self._num(mat.fc)}'
+            elif isinstance(mat, SteelMaterial) and mat.fy is not None:
+                yield f'  MATERIAL  "{name}"  FY {self._num(mat.fy)}'
+        yield ""
+
+    def _section_lines(self):
+        used = {e.get_etabs_section() for e in self.model.beams + self.model.columns + self.model.walls + self.model.slabs}
+        missing = used - set(self.model.sections)
+        if missing:
+            logger.warning(f"Secciones usadas por elementos pero no definidas en el modelo: {sorted(missing)}")
+
+        frames = [s for s in self.model.sections.values() if isinstance(s, FrameSection)]
+        shells = [s for s in self.model.sections.values() if isinstance(s, ShellSection)]
+        usage = shell_usage(self.model) # Misma clasificación muro/losa que PropertyCatalog
+
+        yield "$ FRAME SECTIONS"
+        for sec in frames:
+            yield (f'  FRAMESECTION  "{sec.name}"  MATERIAL "{sec.material_name}"  SHAPE "Concrete Rectangular"'
+                   f'  D {self._num(sec.height)}  B {self._num(sec.width)}')
+        yield ""
+        yield "$ WALL/SLAB/DECK PROPERTIES"
+        for sec in shells:
+            if usage[sec.name] == "Wall":
+                yield (f'  SHELLPROP  "{sec.name}"  PROPTYPE  "Wall"  MATERIAL "{sec.material_name}"'
+                       f'  MODELINGTYPE "ShellThin"  WALLTHICKNESS {self._num(sec.thickness)}')
+            else:
+                yield (f'  SHELLPROP  "{sec.name}"  PROPTYPE  "Slab"  MATERIAL "{sec.material_name}"'
+                       f'  MODELINGTYPE "ShellThin"  SLABTYPE "Slab"  SLABTHICKNESS {self._num(sec.thickness)}')
+        yield ""
+
+    # ---------- puntos y objetos ----------
+    def _point_lines(self):
+        yield "$ POINT COORDINATES"
+        for (x, y, dz), label in self._points.items():
+            if dz:
+                yield f'  POINT "{label}"  {self._num(x)}  {self._num(y)}  {self._num(dz)}'
+            else:
+                yield f'  POINT "{label}"  {self._num(x)}  {self._num(y)}'
+        yield ""
+
+    def _story_index(self, z):
+        """Índice del piso sobre (o en) la cota z y distancia del punto bajo ese piso."""
+        idx = int(np.searchsorted(self._elevations, z - self.tolerance))
+        idx = min(idx, len(self._elevations) - 1)
+        dz = self._elevations[idx] - z
+        return idx, (0.0 if abs(dz) <= self.tolerance else round(float(dz), self.decimals))
+
+    def _point(self, node):
+        """Etiqueta del punto en planta (con su DZ) y piso al que pertenece el nodo."""
+        idx, dz = self._story_index(node.z)
+        key = (round(node.x, self.decimals), round(node.y, self.decimals), dz)
+        label = self._points.get(key)
+        if label is None:
+            label = str(len(self._points) + 1)
+            self._points[key] = label
+        return label, idx
+
+    def _object_lines(self):
+        """Conectividades y asignaciones de secciones de frames y áreas."""
+        if len(self._elevations) == 0:
+            raise ValueError("El modelo no tiene pisos definidos; no se puede exportar a .e2k.")
+        sm = self.model.story_manager
+        m = self.model
+        lines, areas, line_assigns, area_assigns = [], [], [], []
+
+        for prefix, frames in (("B", m.beams), ("C", m.columns)):
+            for i, frame in enumerate(frames):
+                name = f"{prefix}{i + 1}"
+                (pi, si), (pj, sj) = self._point(frame.start_node), self._point(frame.end_node)
+                top = max(si, sj)
+                if prefix == "C" and pi == pj:
+                    lines.append(f'  LINE  "{name}"  COLUMN  "{pi}"  "{pj}"  {abs(si - sj)}')
+                elif si == sj:
+                    lines.append(f'  LINE  "{name}"  BEAM  "{pi}"  "{pj}"  0')
+                else:
+                    lines.append(f'  LINE  "{name}"  BRACE  "{pi}"  "{pj}"  {top - si}  {top - sj}')
+                line_assigns.append(f'  LINEASSIGN  "{name}"  "{sm.get_etabs_name(sm.stories[top])}"'
+                                    f'  SECTION "{frame.get_etabs_section()}"')
+
+        for prefix, kind, shells in (("W", "PANEL", m.walls), ("F", "FLOOR", m.slabs)):
+            for i, shell in enumerate(shells):
+                name = f"{prefix}{i + 1}"
+                pts = [self._point(n) for n in shell.nodes]
+                top = max(s for _, s in pts)
+                labels = "  ".join(f'"{p}"' for p, _ in pts)
+                offsets = "  ".join(str(top - s) for _, s in pts)
+                areas.append(f'  AREA  "{name}"  {kind}  {len(pts)}  {labels}  {offsets}')
+                area_assigns.append(f'  AREAASSIGN  "{name}"  "{sm.get_etabs_name(sm.stories[top])}"'
+                                    f'  SECTION "{shell.get_etabs_section()}"')
+
+        yield "$ LINE CONNECTIVITIES"
+        yield from lines
+        yield ""
+        yield "$ AREA CONNECTIVITIES"
+        yield from areas
+        yield ""
+        yield "$ LINE ASSIGNS"
+        yield from line_assigns
+        yield ""
+        yield "$ AREA ASSIGNS"
+        yield from area_assigns
+        yield ""
+
+    def _num(self, value):
+        """Formato numérico compacto (sin ceros de relleno)."""
+        text = f"{float(value):.{self.decimals}f}".rstrip("0").rstrip(".")
+        return "0" if text in ("", "-0") else text
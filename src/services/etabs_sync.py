@@ -0,0 +1,241 @@
+import logging
+import sqlite3
+from domain.elements.frame import FrameElement
+from services import etabs_tables
+from services.etabs_tables import EtabsTableWriter, confirm_writes, ret_code
+
+logger = logging.getLogger("Revit2Etabs.Service.EtabsSync")
+
+# Categoría del modelo -> (prefijo del nombre en ETABS, tabla de conectividad, es frame)
+CATEGORIES = {
+    "beams": ("B", etabs_tables.BEAM_TABLE, True),
+    "columns": ("C", etabs_tables.COLUMN_TABLE, True),
+    "walls": ("W", etabs_tables.WALL_TABLE, False),
+    "slabs": ("S", etabs_tables.FLOOR_TABLE, False),
+}
+
+
+class EtabsIdMap:
+    """
+    Mapa persistente (SQLite) entre claves estables de los elementos del modelo
+    y los nombres de los objetos en ETABS, con la geometría y sección con que
+    se exportaron. Permite calcular qué cambió respecto del último export.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS elements (
+                key TEXT PRIMARY KEY, category TEXT, name TEXT, geometry TEXT, section TEXT);
+            CREATE TABLE IF NOT EXISTS points (key TEXT PRIMARY KEY, name TEXT);
+            CREATE TABLE IF NOT EXISTS counters (prefix TEXT PRIMARY KEY, value INTEGER);
+        """)
+
+    def elements(self):
+        """clave -> (categoría, nombre, geometría, sección)"""
+        rows = self.conn.execute("SELECT key, category, name, geometry, section FROM elements")
+        return {r[0]: r[1:] for r in rows}
+
+    def points(self):
+        """clave de coordenadas -> nombre del punto"""
+        return dict(self.conn.execute("SELECT key, name FROM points"))
+
+    def counters(self):
+        return dict(self.conn.execute("SELECT prefix, value FROM counters"))
+
+    def save(self, elements, removed, points, counters):
+        """Guarda en una sola transacción el resultado de una sincronización exitosa."""
+        with self.conn:
+            self.conn.executemany("DELETE FROM elements WHERE key = ?", [(k,) for k in removed])
+            self.conn.executemany("INSERT OR REPLACE INTO elements VALUES (?, ?, ?, ?, ?)", elements)
+            self.conn.executemany("INSERT OR REPLACE INTO points VALUES (?, ?)", points)
+            self.conn.executemany("INSERT OR REPLACE INTO counters VALUES (?, ?)", counters.items())
+
+    def forget(self, keys):
+        """Quita elementos ya eliminados de ETABS (se llama apenas se confirma cada Delete)."""
+        with self.conn:
+            self.conn.executemany("DELETE FROM elements WHERE key = ?", [(k,) for k in keys])
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EtabsSync:
+    """
+    Sincronización incremental de un modelo ya exportado a ETABS.
+    Compara el modelo actual con el EtabsIdMap del export anterior y envía solo:
+      - added: conectividad + sección de elementos nuevos (y sus puntos nuevos)
+      - moved: conectividad con los mismos nombres y los puntos nuevos
+      - resectioned: asignación de sección
+      - removed: FrameObj/AreaObj.Delete (cada eliminación se registra en el mapa al confirmarse)
+    Con un mapa vacío la sincronización equivale a un export completo.
+
+    La clave estable de un elemento es categoría:revit_id:k, donde k ordena los
+    sub-elementos analíticos de un mismo elemento Revit por su posición.
+    """
+
+    def __init__(self, model, sap_model, id_map, chunk_size=5000, decimals=3):
+        """
+        id_map: EtabsIdMap del export anterior (se actualiza al terminar).
+        decimals: Redondeo de coordenadas para las claves de puntos y geometrías.
+        """
+        self.model = model
+        self.SapModel = sap_model
+        self.id_map = id_map
+        self.chunk_size = chunk_size
+        self.decimals = decimals
+        self.names = None # Tras sync(): categoría -> nombres en ETABS, en el orden de model.<categoría>
+        self.point_names = None # Tras sync(): Node.id -> nombre del punto en ETABS
+
+    # ---------- claves ----------
+    def point_key(self, node):
+        d = self.decimals
+        return f"{node.x:.{d}f},{node.y:.{d}f},{node.z:.{d}f}"
+
+    def element_nodes(self, element):
+        # Los muros también tienen start_node/end_node (su eje en planta): se usan sus 4 nodos
+        if isinstance(element, FrameElement):
+            return [element.start_node, element.end_node]
+        return list(element.nodes)
+
+    def current_elements(self):
+        """clave estable -> (categoría, elemento, geometría, sección) del modelo actual."""
+        out = {}
+        for category in CATEGORIES:
+            groups = {}
+            for elem in getattr(self.model, category):
+                groups.setdefault(str(elem.revit_id), []).append(elem)
+            for revit_id, elems in groups.items():
+                # Orden determinista de los sub-elementos de un mismo elemento Revit
+                signed = sorted(((self._geometry(e), e) for e in elems), key=lambda t: t[0])
+                for k, (geometry, elem) in enumerate(signed):
+                    out[f"{category}:{revit_id}:{k}"] = (category, elem, geometry, elem.get_etabs_section())
+        return out
+
+    def _geometry(self, element):
+        return ";".join(self.point_key(n) for n in self.element_nodes(element))
+
+    # ---------- diferencia ----------
+    def diff(self, previous=None, current=None):
+        """
+        Compara el modelo con el mapa. Devuelve un dict con las claves
+        added, removed, moved, resectioned y unchanged.
+        """
+        previous = self.id_map.elements() if previous is None else previous
+        current = self.current_elements() if current is None else current
+        report = {"added": [], "removed": [], "moved": [], "resectioned": [], "unchanged": 0}
+
+        for key, (category, _, geometry, section) in current.items():
+            old = previous.get(key)
+            if old is None or old[0] != category:
+                report["added"].append(key)
+                continue
+            changed = False
+            if old[2] != geometry:
+                report["moved"].append(key)
+                changed = True
+            if old[3] != section:
+                report["resectioned"].append(key)
+                changed = True
+            if not changed:
+                report["unchanged"] += 1
+
+        report["removed"] = [k for k in previous if k not in current]
+        return report
+
+    # ---------- aplicación ----------
+    def sync(self):
+        """Aplica en ETABS solo los cambios y actualiza el mapa. Devuelve el reporte del diff."""
+        previous = self.id_map.elements()
+        current = self.current_elements()
+        report = self.diff(previous, current)
+        points = self.id_map.points()
+        counters = self.id_map.counters()
+        new_points = {}
+
+        def next_name(prefix):
+            counters[prefix] = counters.get(prefix, 0) + 1
+            return f"{prefix}{counters[prefix]}"
+
+        def point_name(node):
+            key = self.point_key(node)
+            if key not in points:
+                points[key] = next_name("")
+                new_points[key] = node
+            return points[key]
+
+        # Nombres: se mantienen los del export anterior, los nuevos continúan el contador
+        names = {}
+        for key in report["added"]:
+            names[key] = next_name(CATEGORIES[current[key][0]][0])
+        for key in report["moved"] + report["resectioned"]:
+            names[key] = previous[key][1]
+
+        connect = {c: [] for c in CATEGORIES}  # Filas de conectividad (nuevos y movidos)
+        assign = {c: [] for c in CATEGORIES}   # Filas de sección (nuevos y re-seccionados)
+        for key in dict.fromkeys(report["added"] + report["moved"]):
+            category, elem, _, _ = current[key]
+            connect[category].append([names[key]] + [point_name(n) for n in self.element_nodes(elem)])
+        for key in dict.fromkeys(report["added"] + report["resectioned"]):
+            category, elem, _, section = current[key]
+            assign[category].append([names[key], section])
+
+        tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+        self._delete(report["removed"], previous)
+        self._write_points(tables, new_points, points)
+        for category, (_, table, is_frame) in CATEGORIES.items():
+            self._write_rows(tables, table, connect[category], pad=len(table[1]))
+        self._write_rows(tables, etabs_tables.FRAME_SECTION_TABLE, assign["beams"] + assign["columns"], pad=2)
+        self._write_rows(tables, etabs_tables.AREA_SECTION_TABLE, assign["walls"] + assign["slabs"], pad=2)
+        # Un pier por muro Revit (ver EtabsResultsReader); los muros movidos conservan nombre y pier
+        piers = [[names[k], str(current[k][1].revit_id)] for k in report["added"] if current[k][0] == "walls"]
+        self._write_rows(tables, etabs_tables.PIER_DEFINITION_TABLE, [[p] for p in sorted({r[1] for r in piers})], pad=1)
+        self._write_rows(tables, etabs_tables.PIER_ASSIGN_TABLE, piers, pad=2)
+
+        # El resto del mapa solo se actualiza si ETABS aceptó todos los cambios
+        confirm_writes(self.SapModel)
+        rows = [(key, current[key][0], names[key], current[key][2], current[key][3]) for key in names]
+        self.id_map.save(rows, report["removed"], [(k, points[k]) for k in new_points], counters)
+
+        by_element = {id(elem): names[key] if key in names else previous[key][1]
+                      for key, (_, elem, _, _) in current.items()}
+        self.names = {c: [by_element[id(e)] for e in getattr(self.model, c)] for c in CATEGORIES}
+        self.point_names = {n.id: points[self.point_key(n)]
+                            for _, elem, _, _ in current.values() for n in self.element_nodes(elem)}
+
+        logger.info(f"Sincronización: {len(report['added'])} nuevos, {len(report['removed'])} eliminados, "
+                    f"{len(report['moved'])} movidos, {len(report['resectioned'])} re-seccionados, "
+                    f"{report['unchanged']} sin cambios ({tables.calls} llamadas a DatabaseTables).")
+        return report
+
+    def _delete(self, keys, previous):
+        for key in keys:
+            category, name = previous[key][0], previous[key][1]
+            obj = self.SapModel.FrameObj if CATEGORIES[category][2] else self.SapModel.AreaObj
+            ret = obj.Delete(name, 0)
+            if ret_code(ret) != 0:
+                raise RuntimeError(f"Error al eliminar {name} de ETABS (ret={ret_code(ret)}).")
+            # Un Delete no se puede repetir: si algo falla más adelante, el reintento ya no lo busca
+            confirm_writes(self.SapModel)
+            self.id_map.forget([key])
+
+    def _write_points(self, tables, new_points, points):
+        if not new_points:
+            return
+        nodes = list(new_points.values())
+        cols = tables.point_columns(nodes)
+        cols[0] = [points[k] for k in new_points]
+        tables.write_table(etabs_tables.POINT_TABLE, cols)
+
+    def _write_rows(self, tables, table, rows, pad):
+        if not rows:
+            return
+        rows = [r + [""] * (pad - len(r)) for r in rows]
+        tables.write_table(table, [list(col) for col in zip(*rows)])
@@ -0,0 +1,176 @@
+import logging
+import numpy as np
+from domain.elements.frame import FrameElement
+from utils.etabs_schemas import (POINT_TABLE, BEAM_TABLE, COLUMN_TABLE, WALL_TABLE, FLOOR_TABLE, FRAME_SECTION_TABLE,
+                                 AREA_SECTION_TABLE, PIER_DEFINITION_TABLE, PIER_ASSIGN_TABLE, ret_code)
+
+logger = logging.getLogger("Revit2Etabs.Service.EtabsTables")
+
+
+def confirm_writes(sap_model):
+    """
+    Espera a que ETABS confirme todo lo enviado antes de registrarlo como hecho.
+    Con un agente remoto (RemoteSapModel) las llamadas se encolan y sync()
+    relanza el primer error; con COM local cada llamada ya es sincrónica.
+    """
+    sync = getattr(sap_model, "sync", None)
+    if callable(sync):
+        sync()
+
+
+def format_coords(values, decimals=4):
+    """Formatea un arreglo de coordenadas como strings en una sola operación."""
+    return np.char.mod(f"%.{decimals}f", np.asarray(values, dtype=float))
+
+
+class EtabsTableWriter:
+    """
+    Escritura masiva a ETABS con DatabaseTables.SetTableForEditingArray.
+    Las filas se arman como arreglos de strings por columna, se aplanan por
+    bloques de chunk_size filas y cada bloque se aplica con un solo
+    ApplyEditedTables (en lugar de una llamada COM por objeto).
+    """
+
+    def __init__(self, sap_model, chunk_size=5000):
+        self.SapModel = sap_model
+        self.chunk_size = chunk_size
+        self.calls = 0 # Llamadas a DatabaseTables realizadas
+
+    def write_table(self, table, columns):
+        """
+        table: Tupla (TableKey, campos).
+        columns: Lista de arreglos (uno por campo, mismo largo) con los valores.
+        Devuelve la cantidad de filas escritas.
+        """
+        table_key, fields = table
+        if len(columns) != len(fields):
+            raise ValueError(f"La tabla {table_key} espera {len(fields)} columnas y recibió {len(columns)}.")
+
+        n_rows = len(columns[0]) if columns else 0
+        if n_rows == 0:
+            return 0
+
+        data = np.column_stack([np.asarray(c, dtype=str) for c in columns])
+        for start in range(0, n_rows, self.chunk_size):
+            block = data[start:start + self.chunk_size]
+            self._apply_chunk(table_key, fields, block)
+
+        logger.info(f"Tabla {table_key}: {n_rows} filas en {-(-n_rows // self.chunk_size)} bloques.")
+        return n_rows
+
+    def _apply_chunk(self, table_key, fields, block):
+        table_version = 0
+        ret_set = self.SapModel.DatabaseTables.SetTableForEditingArray(
+            table_key,
+            table_version,
+            fields,
+            len(block),
+            block.ravel().tolist()
+        )
+        self.calls += 1
+        if ret_code(ret_set) != 0:
+            raise RuntimeError(f"Error al establecer la tabla {table_key} (ret={ret_code(ret_set)}).")
+
+        fill_import = True
+        ret_apply = self.SapModel.DatabaseTables.ApplyEditedTables(fill_import)
+        self.calls += 1
+        if ret_code(ret_apply) != 0:
+            raise RuntimeError(f"Error al aplicar la tabla {table_key} (ret={ret_code(ret_apply)}).")
+        # ETABS devuelve ret=0 aunque rechace filas: los errores vienen en NumFatalErrors e ImportLog
+        # (NumFatalErrors, NumErrorMsgs, NumWarnMsgs, NumInfoMsgs, ImportLog, ret)
+        if isinstance(ret_apply, (list, tuple)) and len(ret_apply) >= 6 and ret_apply[0]:
+            raise RuntimeError(f"ETABS rechazó la tabla {table_key}: {ret_apply[0]} errores fatales.\n"
+                               f"Registro de importación:\n{ret_apply[4]}")
+        return ret_set, ret_apply
+
+    # ---------- constructores de filas ----------
+    def point_columns(self, nodes, decimals=4):
+        """Columnas de la tabla de puntos: nombre = Node.id."""
+        coords = np.array([n.get_coords() for n in nodes], dtype=float).reshape(-1, 3)
+        names = np.array([str(n.id) for n in nodes], dtype=str)
+        return [names, format_coords(coords[:, 0], decimals), format_coords(coords[:, 1], decimals),
+                format_coords(coords[:, 2], decimals)]
+
+    def frame_columns(self, names, frames):
+        return [np.asarray(names, dtype=str),
+                np.array([str(f.start_node.id) for f in frames], dtype=str),
+                np.array([str(f.end_node.id) for f in frames], dtype=str)]
+
+    def area_columns(self, names, areas, n_points=4):
+        cols = [np.asarray(names, dtype=str)]
+        for k in range(n_points):
+            cols.append(np.array([str(a.nodes[k].id) if k < len(a.nodes) else "" for a in areas], dtype=str))
+        return cols
+
+    def pier_columns(self, names, walls):
+        """Cada muro Revit es un pier: la etiqueta es su revit_id (ver EtabsResultsReader)."""
+        return [np.asarray(names, dtype=str), np.array([str(w.revit_id) for w in walls], dtype=str)]
+
+    def section_columns(self, names, elements):
+        return [np.asarray(names, dtype=str), np.array([e.get_etabs_section() for e in elements], dtype=str)]
+
+
+# Categoría -> (prefijo del nombre, tabla de conectividad, tabla de secciones); mismos nombres que EtabsWriter
+CATEGORY_TABLES = {
+    "beams": ("B", BEAM_TABLE, FRAME_SECTION_TABLE),
+    "columns": ("C", COLUMN_TABLE, FRAME_SECTION_TABLE),
+    "walls": ("W", WALL_TABLE, AREA_SECTION_TABLE),
+    "slabs": ("S", FLOOR_TABLE, AREA_SECTION_TABLE),
+}
+
+
+def element_nodes(elem):
+    # Los muros también tienen start_node/end_node (su eje en planta): se usan sus 4 nodos
+    if isinstance(elem, FrameElement):
+        return [elem.start_node, elem.end_node]
+    return elem.nodes
+
+
+def story_chunks(model, chunk_size=2000, tolerance=0.01):
+    """
+    Genera (id_del_trozo, lote) por piso, categoría y trozos de chunk_size
+    elementos. El lote es una lista [(tabla, columnas), ...] que incluye primero
+    los puntos que aún no aparecieron en un lote anterior, luego la conectividad
+    y las secciones. El id ("P3/beams/0") es estable entre ejecuciones para el
+    mismo modelo, por lo que sirve para retomar una exportación.
+    Un elemento pertenece al piso cuyo nivel coincide con su Z máxima.
+    """
+    tables = EtabsTableWriter(None)
+    sm = model.story_manager
+    elevations = np.array([s.elevation for s in sm.stories], dtype=float)
+    written = set()
+
+    per_story = {}
+    for category, (prefix, _, _) in CATEGORY_TABLES.items():
+        elements = getattr(model, category)
+        if not elements:
+            continue
+        zmax = np.array([max(n.z for n in element_nodes(e)) for e in elements])
+        idx = np.clip(np.searchsorted(elevations, zmax - tolerance), 0, max(len(elevations) - 1, 0))
+        for k, (elem, i) in enumerate(zip(elements, idx)):
+            per_story.setdefault(int(i), {}).setdefault(category, []).append((f"{prefix}{k + 1}", elem))
+
+    for i in sorted(per_story):
+        story_name = sm.get_etabs_name(sm.stories[i]) if sm.stories else "Base"
+        for category, (_, conn_table, sec_table) in CATEGORY_TABLES.items():
+            pairs = per_story[i].get(category, [])
+            for k, start in enumerate(range(0, len(pairs), chunk_size)):
+                names, elems = zip(*pairs[start:start + chunk_size])
+                batch = []
+
+                new_nodes = []
+                for elem in elems:
+                    for n in element_nodes(elem):
+                        if n.id not in written:
+                            written.add(n.id)
+                            new_nodes.append(n)
+                if new_nodes:
+                    batch.append((POINT_TABLE, tables.point_columns(new_nodes)))
+
+                if category in ("beams", "columns"):
+                    batch.append((conn_table, tables.frame_columns(names, elems)))
+                else:
+                    batch.append((conn_table, tables.area_columns(names, elems)))
+                batch.append((sec_table, tables.section_columns(names, elems)))
+
+                yield f"{story_name}/{category}/{k}", batch
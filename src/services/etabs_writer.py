@@ -1,32 +1,82 @@
 import os
 import sys
-# Importamos comtypes para la comunicación con la API de ETABS
-import comtypes.client
+# Importamos comtypes para la comunicación con la API de ETABS (solo existe en Windows;
+# sin él se puede exportar a .e2k con E2kWriter o usar un SapModel ya conectado)
+try:
+    import comtypes.client
+except ImportError:
+    comtypes = None
 import logging
+from services import etabs_tables
+from services.etabs_tables import EtabsTableWriter, ret_code
+from services.etabs_sync import EtabsIdMap, EtabsSync
+from services.pipelined_export import PipelinedExporter, story_batches
+from services.export_checkpoint import CheckpointedExport
+from services.remote_writer import RemoteEtabsClient, RemoteSapModel
+from services.load_assigner import LoadAssigner
+from services.diaphragm_assigner import DiaphragmAssigner
+from services.property_writer import PropertyCatalog
+from services.export_estimator import ExportEstimator
 
 logger = logging.getLogger("Revit2Etabs.Service.EtabsWriter")
 
+
+def get_active_sap_model():
+    """
+    Devuelve el SapModel de la instancia activa de ETABS sin guardarlo en
+    ningún EtabsWriter. Se usa como `connect` de write_pipelined: el hilo
+    escritor obtiene su propio proxy COM, válido solo dentro de ese hilo.
+    """
+    if comtypes is None:
+        raise ConnectionError("comtypes no está instalado: no se puede conectar a ETABS (use E2kWriter).")
+    try:
+        myEtabsObject = comtypes.client.GetActiveObject("CSI.ETABS.API.ETABSObject")
+        sap_model = myEtabsObject.SapModel
+        sap_model.SetPresentUnits(8)
+        return sap_model
+    except Exception as e:
+        raise ConnectionError("No se pudo conectar a ETABS. Asegúrate de que ETABS esté abierto.") from e
+
+
 class EtabsWriter:
-    def __init__(self, model):
+    def __init__(self, model, write_mode="tables", chunk_size=5000, id_map_path="etabs_ids.sqlite",
+                 journal_path="export_journal.jsonl"):
+        """
+        write_mode: "tables" escribe nodos y elementos en bloque con DatabaseTables;
+                    "api" usa una llamada COM por objeto (AddByCoord);
+                    "points" crea primero los puntos nombrados con Node.id y luego los
+                    elementos con AddByPoint (ETABS no re-fusiona coordenadas);
+                    "sync" envía solo las diferencias respecto del export anterior (ver EtabsSync);
+                    "pipelined" escribe por pisos desde un hilo escritor (ver PipelinedExporter);
+                    "checkpoint" escribe por piso/categoría con bitácora para poder retomar.
+        chunk_size: Filas por bloque aplicado con ApplyEditedTables.
+        id_map_path: Archivo SQLite con el mapa elemento -> objeto ETABS (modo "sync").
+        journal_path: Bitácora de trozos confirmados (modo "checkpoint").
+        """
         self.model = model
         self.ETABSObject = None
         self.SapModel = None
+        self.write_mode = write_mode
+        self.chunk_size = chunk_size
+        self.id_map_path = id_map_path
+        self.journal_path = journal_path
+        self.sync_report = None
+        self._nodes_written = False
+        self._etabs_names = None # Nombres de los elementos en ETABS tras _write_elements (ver etabs_names)
+        self._point_names = None # Node.id -> nombre del punto en ETABS cuando no es el Node.id (modo "sync")
 
     def connect_active_etabs(self):
         """
         Conecta con una instancia activa de ETABS.
         """ 
-        try:
-            myEtabsObject = comtypes.client.GetActiveObject("CSI.ETABS.API.ETABSObject")
-            self.SapModel = myEtabsObject.SapModel
-            self.SapModel.SetPresentUnits(8)
-            logger.info("Conectado a ETABS")
-            return self.SapModel
-        except Exception as e:
-            raise ConnectionError("No se pudo conectar a ETABS. Asegúrate de que ETABS esté abierto.") from e
+        self.SapModel = get_active_sap_model()
+        logger.info("Conectado a ETABS")
+        return self.SapModel
 
     def connect_new_etabs(self):
         """Inicia una instancia de ETABS y obtiene el modelo de SAP."""
+        if comtypes is None:
+            raise ConnectionError("comtypes no está instalado: no se puede iniciar ETABS (use E2kWriter).")
         try:
             # Creamos una instancia de ETABS
             helper = comtypes.client.CreateObject('ETABSv1.Helper')
@@ -46,6 +96,34 @@ class EtabsWriter:
         except Exception as e:
             print(f"Error al conectar con ETABS: {e}")
 
+    def connect_remote(self, host, port, token, compress=True, window=4):
+        """
+        Conecta con un agente remoto (ver remote_writer.EtabsAgent) que reproduce
+        los comandos en la estación con ETABS. token: el mismo con que se inició
+        el agente. Los modos de escritura funcionan igual salvo "api", que se
+        rechaza antes de conectar: el agente no devuelve los nombres que asigna
+        ETABS y las cargas, diafragmas y piers no tendrían a qué asignarse. Las
+        llamadas se serializan en lotes comprimidos, y "checkpoint" y "sync"
+        esperan los acuses del agente (confirm_writes) antes de registrar un
+        trozo o el mapa.
+        """
+        if self.write_mode == "api":
+            raise RuntimeError('El modo "api" no funciona con el agente remoto (no se conocen los nombres '
+                               'que asigna ETABS): use "tables", "points", "sync", "pipelined" o "checkpoint".')
+        client = RemoteEtabsClient(host, port, token, compress=compress, window=window)
+        self.SapModel = RemoteSapModel(client)
+        logger.info(f"Conectado al agente de ETABS en {host}:{port}")
+        return self.SapModel
+
+    def disconnect_remote(self):
+        """Espera la confirmación de todos los lotes enviados al agente y cierra la conexión."""
+        if isinstance(self.SapModel, RemoteSapModel):
+            self.SapModel.sync()
+            stats = self.SapModel._client.stats
+            self.SapModel._client.close()
+            logger.info(f"Agente remoto: {stats['lotes']} lotes, {stats['comandos']} comandos, {stats['bytes']} bytes enviados.")
+            self.SapModel = None
+
     def write_all(self):
         """Ejecuta el pipeline de creación en el orden correcto."""
         if not self.SapModel:
@@ -59,6 +137,14 @@ class EtabsWriter:
         # 3. Definir Elementos (Frames, Shells)
         self._write_elements()
 
+    def dry_run(self, latency=None):
+        """
+        Simulacro sin ETABS: llamadas, filas y tiempo estimado de pisos, grillas,
+        nodos y elementos en el modo actual, más alertas de volúmenes sospechosos
+        (ver ExportEstimator). latency: LatencyModel calibrado (None = costos típicos).
+        """
+        return ExportEstimator(self, latency).estimate()
+
     def _write_stories(self):
         logger.info("Definiendo pisos...")
         self.model.story_manager.to_etabs_commands(self.SapModel)
@@ -68,15 +154,56 @@ class EtabsWriter:
         self.model.grid_manager.gridSystems_to_etabs(self.SapModel)
         self.model.grid_manager.gridLines_to_etabs(self.SapModel)
 
-    def _write_sections(self):
-        print("Definiendo secciones...")
-        for sec_name, sec_data in self.model.sections.items():
-            # Aquí usarías comandos como:
-            # self.SapModel.PropFrame.SetRectangle(sec_name, "CONC", h, w)
-            # Por ahora simulamos la llamada
-            print(f"API: Definiendo sección {sec_name}")
+    def _write_sections(self, deduplicate=True):
+        """Materiales y secciones reales del modelo, en bloque (ver PropertyCatalog)."""
+        logger.info("Definiendo materiales y secciones...")
+        catalog = PropertyCatalog(self.model)
+        if deduplicate:
+            catalog.deduplicate()
+        return catalog.write(self.SapModel, self.chunk_size)
+
+    def _write_loads(self, load_definitions):
+        """Patrones de carga y cargas gravitacionales de losas y vigas en bloque (ver LoadAssigner)."""
+        if not load_definitions:
+            return {}
+        logger.info("Asignando cargas gravitacionales...")
+        return LoadAssigner(self.model, self.SapModel, self.etabs_names(), self.chunk_size).write(load_definitions)
+
+    def _write_diaphragms(self, stories=None, mode="areas", rigidity="Rigid"):
+        """Un diafragma por piso asignado en bloque a losas o nodos (ver DiaphragmAssigner)."""
+        logger.info("Asignando diafragmas por piso...")
+        if mode == "joints":
+            if self.write_mode == "api" or (self.write_mode == "sync" and self._point_names is None):
+                raise RuntimeError(f"No se conocen los nombres en ETABS de los puntos (modo {self.write_mode}): "
+                                   "use diafragmas por losas o un modo con puntos nombrados.")
+            names, point_names = None, self._point_names
+        else:
+            names, point_names = self.etabs_names(), None
+        return DiaphragmAssigner(self.model, self.SapModel, names, point_names,
+                                 chunk_size=self.chunk_size).write(stories, mode, rigidity)
 
     def _write_nodes(self):
+        if self.write_mode in ("sync", "pipelined", "checkpoint"):
+            return # En estos modos los puntos se escriben junto con los elementos que los usan
+
+        if self.write_mode == "tables":
+            logger.info("Escribiendo nodos (tabla de puntos)...")
+            tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+            nodes = list(self.model.node_manager.nodes.values())
+            tables.write_table(etabs_tables.POINT_TABLE, tables.point_columns(nodes))
+            self._nodes_written = True
+            return
+
+        if self.write_mode == "points":
+            logger.info("Escribiendo nodos (puntos nombrados por Node.id)...")
+            for node in self.model.node_manager.nodes.values():
+                # MergeOff=True: nuestros nodos ya están fusionados por NodeManager
+                ret = self.SapModel.PointObj.AddCartesian(node.x, node.y, node.z, "", str(node.id), "Global", True)
+                if ret_code(ret) != 0:
+                    raise RuntimeError(f"Error al crear el punto {node.id} (ret={ret_code(ret)}).")
+            self._nodes_written = True
+            return
+
         print("Dibujando nodos...")
         for node in self.model.node_manager.nodes.values():
             # En ETABS, los nodos se crean por coordenadas
@@ -90,19 +217,162 @@ class EtabsWriter:
             # pero definirlos primero te da control total.
 
     def _write_elements(self):
-        # Iteramos sobre las vigas del modelo
-        for beam in self.model.beams:
-            # Aquí es donde el polimorfismo que diseñamos brilla.
-            # Le pasamos el SapModel al elemento para que él mismo se dibuje.
-            beam.to_etabs_command(self.SapModel)
-        
-        for column in self.model.columns:
-            column.to_etabs_command(self.SapModel)
+        if self.write_mode == "sync":
+            self.sync_elements()
+            return
 
-        for wall in self.model.walls:
-            wall.to_etabs_command(self.SapModel)
-        
-        for slab in self.model.slabs:
-            slab.to_etabs_command(self.SapModel)
+        if self.write_mode == "tables":
+            self._write_elements_tables()
+            return
+
+        if self.write_mode == "points":
+            self._write_elements_points()
+            return
+
+        if self.write_mode == "pipelined":
+            self.write_pipelined()
+            return
+
+        if self.write_mode == "checkpoint":
+            self.write_checkpointed()
+            return
+
+        # Iteramos sobre los elementos del modelo
+        names = {}
+        for category in ("beams", "columns", "walls", "slabs"):
+            names[category] = []
+            for element in getattr(self.model, category):
+                # Aquí es donde el polimorfismo que diseñamos brilla.
+                # Le pasamos el SapModel al elemento para que él mismo se dibuje.
+                ret = element.to_etabs_command(self.SapModel)
+                if ret_code(ret) != 0:
+                    raise RuntimeError(f"Error al crear {element} en ETABS (ret={ret_code(ret)}).")
+                # AddByCoord devuelve el nombre asignado por ETABS antes del código (no en modo remoto)
+                names[category].append(ret[-2] if isinstance(ret, (list, tuple)) and len(ret) >= 2 else None)
+        if all(all(v) for v in names.values()):
+            self._etabs_names = names
+        self._write_piers()
         
-        self.SapModel.View.RefreshView(0,False)
\ No newline at end of file
+        self.SapModel.View.RefreshView(0,False)
+
+    def sync_elements(self):
+        """Sincroniza con ETABS solo lo que cambió desde el export anterior registrado en id_map_path."""
+        logger.info(f"Sincronizando elementos con el mapa {self.id_map_path}...")
+        with EtabsIdMap(self.id_map_path) as id_map:
+            sync = EtabsSync(self.model, self.SapModel, id_map, self.chunk_size)
+            self.sync_report = sync.sync()
+        # Los piers de los muros nuevos los asigna EtabsSync junto con sus secciones
+        self._etabs_names = sync.names
+        self._point_names = sync.point_names
+        self.SapModel.View.RefreshView(0,False)
+        return self.sync_report
+
+    def write_pipelined(self, connect=None, queue_size=4, batch_size=2000):
+        """
+        Escribe nodos y elementos piso por piso con un hilo escritor dedicado
+        (ver PipelinedExporter): la serialización de cada lote se solapa con la
+        escritura del anterior. connect: función que devuelve un SapModel propio
+        del hilo escritor, p.ej. get_active_sap_model (por defecto se usa
+        self.SapModel). No debe modificar self.SapModel: ese proxy pertenece
+        al hilo principal y se sigue usando después (cargas, diafragmas).
+        """
+        exporter = PipelinedExporter(connect or self.SapModel, queue_size, self.chunk_size)
+        stats = exporter.run(story_batches(self.model, batch_size))
+        self._nodes_written = True
+        self._etabs_names = self.element_names()
+        self._write_piers()
+        return stats
+
+    def write_checkpointed(self, batch_size=2000):
+        """
+        Escribe nodos y elementos por piso y categoría registrando cada trozo
+        confirmado en journal_path; si se vuelve a llamar contra el mismo modelo
+        de ETABS tras un corte, retoma desde el último trozo confirmado.
+        """
+        logger.info(f"Escribiendo elementos con bitácora {self.journal_path}...")
+        stats = CheckpointedExport(self.model, self.SapModel, self.journal_path, batch_size, self.chunk_size).run()
+        self._nodes_written = True
+        self._etabs_names = self.element_names()
+        self._write_piers()
+        self.SapModel.View.RefreshView(0,False)
+        return stats
+
+    def element_names(self):
+        """Nombres únicos que reciben los elementos en ETABS, por categoría."""
+        return {
+            "beams": [f"B{i + 1}" for i in range(len(self.model.beams))],
+            "columns": [f"C{i + 1}" for i in range(len(self.model.columns))],
+            "walls": [f"W{i + 1}" for i in range(len(self.model.walls))],
+            "slabs": [f"S{i + 1}" for i in range(len(self.model.slabs))],
+        }
+
+    def etabs_names(self):
+        """
+        Nombres que tienen en ETABS los elementos, por categoría y en el orden de
+        model.<categoría>: los de element_names() en los modos por tablas y por
+        puntos (deterministas), los del EtabsIdMap en "sync" y los que devolvió
+        ETABS en "api". Lanza RuntimeError si no se conocen ("sync" o "api"
+        antes de _write_elements).
+        """
+        if self._etabs_names is None and self.write_mode in ("tables", "points", "pipelined", "checkpoint"):
+            return self.element_names()
+        if self._etabs_names is None:
+            raise RuntimeError(f"No se conocen los nombres en ETABS de los elementos (modo {self.write_mode}): "
+                               "escriba los elementos antes o use un modo con nombres propios.")
+        return self._etabs_names
+
+    def _write_piers(self):
+        """Un pier por muro Revit, para leer sus fuerzas de vuelta (ver EtabsResultsReader)."""
+        walls = self.model.walls
+        if not walls:
+            return
+        if self._etabs_names is None:
+            logger.warning("Piers no asignados: ETABS no devolvió los nombres de los muros.")
+            return
+        tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+        piers = sorted({str(w.revit_id) for w in walls})
+        tables.write_table(etabs_tables.PIER_DEFINITION_TABLE, [piers])
+        tables.write_table(etabs_tables.PIER_ASSIGN_TABLE, tables.pier_columns(self._etabs_names["walls"], walls))
+
+    def _write_elements_points(self):
+        """Frames y áreas con AddByPoint sobre los puntos nombrados por Node.id."""
+        if not self._nodes_written:
+            self._write_nodes()
+
+        logger.info("Escribiendo elementos (AddByPoint)...")
+        names = self.element_names()
+        for category in ("beams", "columns", "walls", "slabs"):
+            for name, element in zip(names[category], getattr(self.model, category)):
+                ret = element.to_etabs_point_command(self.SapModel, name)
+                if ret_code(ret) != 0:
+                    raise RuntimeError(f"Error al crear {name} ({element.revit_id}) (ret={ret_code(ret)}).")
+        self._etabs_names = names
+        self._write_piers()
+
+        self.SapModel.View.RefreshView(0,False)
+
+    def _write_elements_tables(self):
+        """Conectividad y secciones de frames y áreas en bloque, referenciando puntos por Node.id."""
+        # Los elementos referencian puntos por nombre: deben existir antes
+        if not self._nodes_written:
+            self._write_nodes()
+
+        logger.info("Escribiendo elementos (tablas de conectividad)...")
+        tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+        names = self.element_names()
+        m = self.model
+
+        tables.write_table(etabs_tables.BEAM_TABLE, tables.frame_columns(names["beams"], m.beams))
+        tables.write_table(etabs_tables.COLUMN_TABLE, tables.frame_columns(names["columns"], m.columns))
+        tables.write_table(etabs_tables.WALL_TABLE, tables.area_columns(names["walls"], m.walls))
+        tables.write_table(etabs_tables.FLOOR_TABLE, tables.area_columns(names["slabs"], m.slabs))
+
+        tables.write_table(etabs_tables.FRAME_SECTION_TABLE,
+                           tables.section_columns(names["beams"] + names["columns"], m.beams + m.columns))
+        tables.write_table(etabs_tables.AREA_SECTION_TABLE,
+                           tables.section_columns(names["walls"] + names["slabs"], m.walls + m.slabs))
+        self._etabs_names = names
+        self._write_piers()
+
+        logger.info(f"Escritura en bloque: {tables.calls} llamadas a DatabaseTables.")
+        self.SapModel.View.RefreshView(0,False)
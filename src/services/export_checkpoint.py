@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import logging
+from services import etabs_tables
+from services.etabs_tables import EtabsTableWriter
+
+logger = logging.getLogger("Revit2Etabs.Service.ExportCheckpoint")
+
+
+class ExportJournal:
+    """
+    Bitácora local (JSON por línea) de los trozos ya confirmados por ETABS.
+    La primera línea identifica la exportación (huella del modelo y archivo de
+    ETABS); si no coincide con la actual, la bitácora se descarta y se empieza
+    de cero. Cada trozo confirmado se agrega con flush + fsync, de modo que un
+    corte (excepción, caída de COM o del proceso) pierde a lo sumo el trozo en curso.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = {} # id del trozo -> filas escritas
+        self._file = None
+
+    def open(self, header):
+        """Carga los trozos confirmados si la bitácora es de esta misma exportación."""
+        self.done = {}
+        resumed = False
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0].get("header") == header:
+                self.done = {e["chunk"]: e["rows"] for e in lines[1:] if "chunk" in e}
+                resumed = True
+            else:
+                logger.warning(f"La bitácora {self.path} corresponde a otra exportación; se empieza de cero.")
+
+        self._file = open(self.path, "a" if resumed else "w", encoding="utf-8")
+        if not resumed:
+            self._append({"header": header})
+        return resumed
+
+    def commit(self, chunk_id, rows):
+        self._append({"chunk": chunk_id, "rows": rows})
+        self.done[chunk_id] = rows
+
+    def _append(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+class CheckpointedExport:
+    """
+    Exportación a ETABS por trozos (piso / categoría / chunk_size elementos,
+    ver etabs_tables.story_chunks) con bitácora: cada trozo se escribe con
+    DatabaseTables revisando los códigos de retorno y se registra solo cuando
+    ETABS lo confirma. Al reiniciar contra el mismo modelo de ETABS se saltan
+    los trozos confirmados. Reescribir un trozo es inofensivo (mismos UniqueName).
+    """
+
+    def __init__(self, model, sap_model, journal_path, chunk_size=2000, table_chunk_size=5000):
+        self.model = model
+        self.SapModel = sap_model
+        self.journal = ExportJournal(journal_path)
+        self.chunk_size = chunk_size
+        self.table_chunk_size = table_chunk_size
+        self.stats = {}
+
+    def model_key(self):
+        """Huella de lo que se exporta: nodos, conectividad y secciones."""
+        h = hashlib.blake2b(digest_size=16)
+        for node in self.model.node_manager.nodes.values():
+            h.update(f"{node.id}:{node.x:.4f},{node.y:.4f},{node.z:.4f};".encode())
+        for category in etabs_tables.CATEGORY_TABLES:
+            for elem in getattr(self.model, category):
+                ids = ",".join(str(n.id) for n in etabs_tables.element_nodes(elem))
+                h.update(f"{category}:{ids}:{elem.get_etabs_section()};".encode())
+        return h.hexdigest()
+
+    def etabs_file(self):
+        """Archivo del modelo ETABS abierto (para no retomar contra otro modelo)."""
+        try:
+            return str(self.SapModel.GetModelFilename(True))
+        except Exception:
+            return ""
+
+    def run(self):
+        header = {"model": self.model_key(), "etabs_file": self.etabs_file(), "chunk_size": self.chunk_size}
+        resumed = self.journal.open(header)
+        if resumed:
+            logger.info(f"Retomando exportación: {len(self.journal.done)} trozos ya confirmados en {self.journal.path}.")
+
+        tables = EtabsTableWriter(self.SapModel, self.table_chunk_size)
+        self.stats = {"escritos": 0, "omitidos": 0, "filas": 0}
+        try:
+            for chunk_id, batch in etabs_tables.story_chunks(self.model, self.chunk_size):
+                if chunk_id in self.journal.done:
+                    self.stats["omitidos"] += 1
+                    continue
+                rows = 0
+                for table, columns in batch:
+                    rows += tables.write_table(table, columns) # Lanza RuntimeError si ETABS devuelve error
+                # Solo se registra lo que ETABS confirmó (con un agente remoto, espera sus acuses)
+                etabs_tables.confirm_writes(self.SapModel)
+                self.journal.commit(chunk_id, rows)
+                self.stats["escritos"] += 1
+                self.stats["filas"] += rows
+        except Exception:
+            logger.error(f"Exportación interrumpida; se puede retomar desde {self.journal.path} "
+                         f"({len(self.journal.done)} trozos confirmados).")
+            raise
+        finally:
+            self.journal.close()
+
+        logger.info(f"Exportación con bitácora: {self.stats['escritos']} trozos escritos, "
+                    f"{self.stats['omitidos']} retomados, {self.stats['filas']} filas.")
+        return self.stats
@@ -0,0 +1,159 @@
+import os
+import logging
+import tempfile
+import numpy as np
+from services.etabs_tables import CATEGORY_TABLES, element_nodes
+from utils.fake_sap_model import FakeSapModel
+
+logger = logging.getLogger("Revit2Etabs.Service.ExportEstimator")
+
+# Método que escribe filas de tabla (sus argumentos registrados terminan en NumberRecords)
+ROW_METHOD = "DatabaseTables.SetTableForEditingArray"
+
+
+class ExportEstimator:
+    """
+    Simulacro de exportación: ejecuta _write_stories, _write_grids, _write_nodes
+    y _write_elements del EtabsWriter contra un FakeSapModel (sin tocar ETABS)
+    y estima el tiempo con el perfil de costos del LatencyModel (por llamada y
+    por ítem, calibrable con LatencyModel.calibrate / from_file).
+
+    Las llamadas, filas y tiempo se reportan por fase y por método; los objetos
+    a crear se cuentan por categoría y por piso, y el tiempo de elementos se
+    reparte entre pisos según su cantidad de objetos. Además se marcan volúmenes
+    sospechosos: frames duplicados o demasiado cortos, áreas duplicadas o casi
+    nulas y nodos que ningún elemento usa.
+    """
+
+    def __init__(self, writer, latency=None, tolerance=0.01, min_length=0.05, min_area=0.01):
+        """
+        writer: EtabsWriter a simular (se usa su modelo, modo y chunk_size; no se modifica).
+        latency: LatencyModel con el perfil de costos (None = costos típicos).
+        min_length: Largo mínimo de frame / lado mínimo de área (m) antes de marcarlo.
+        min_area: Área mínima de muro/losa (m2) antes de marcarla.
+        """
+        self.writer = writer
+        self.model = writer.model
+        self.latency = latency
+        self.tolerance = tolerance
+        self.min_length = min_length
+        self.min_area = min_area
+
+    def estimate(self):
+        """Devuelve el reporte del simulacro (ver la docstring de la clase)."""
+        fake = FakeSapModel(latency=self.latency, validate=False)
+        with tempfile.TemporaryDirectory() as tmp:
+            # Mapa de ids y bitácora vacíos: los modos sync/checkpoint simulan un export completo
+            dry = type(self.writer)(self.model, write_mode=self.writer.write_mode, chunk_size=self.writer.chunk_size,
+                                    id_map_path=os.path.join(tmp, "ids.sqlite"),
+                                    journal_path=os.path.join(tmp, "journal.jsonl"))
+            dry.SapModel = fake
+            phases = {}
+            methods = {}
+            for phase, step in (("pisos", dry._write_stories), ("grillas", dry._write_grids),
+                                ("nodos", dry._write_nodes), ("elementos", dry._write_elements)):
+                fake.reset()
+                step()
+                phases[phase] = self._phase(fake.calls)
+                for c in fake.calls:
+                    m = methods.setdefault(c.method, {"llamadas": 0, "items": 0, "tiempo": 0.0})
+                    m["llamadas"] += 1
+                    m["items"] += c.items
+                    m["tiempo"] += c.latency
+
+        categories, stories = self._counts()
+        total_objects = sum(sum(v.values()) for v in stories.values()) or 1
+        element_time = phases["elementos"]["tiempo"] + phases["nodos"]["tiempo"]
+        for counts in stories.values():
+            counts["tiempo"] = round(element_time * sum(counts.values()) / total_objects, 4)
+
+        report = {
+            "modo": self.writer.write_mode,
+            "llamadas": sum(p["llamadas"] for p in phases.values()),
+            "filas": sum(p["filas"] for p in phases.values()),
+            "tiempo_estimado": round(sum(p["tiempo"] for p in phases.values()), 4),
+            "fases": phases,
+            "por_metodo": {k: dict(v, tiempo=round(v["tiempo"], 4)) for k, v in methods.items()},
+            "por_categoria": categories,
+            "por_piso": stories,
+            "alertas": self.flags(),
+        }
+        alerts = {k: len(v) if isinstance(v, list) else v for k, v in report["alertas"].items()}
+        logger.info(f"Simulacro ({report['modo']}): {report['llamadas']} llamadas, {report['filas']} filas, "
+                    f"~{report['tiempo_estimado']:.1f} s estimados. Alertas: {alerts}")
+        return report
+
+    def _phase(self, calls):
+        return {
+            "llamadas": len(calls),
+            "filas": sum(c.args[-1] for c in calls if c.method == ROW_METHOD),
+            "tiempo": round(sum(c.latency for c in calls), 4),
+        }
+
+    def _counts(self):
+        """Objetos a crear por categoría y por piso (mismo criterio de piso que story_chunks: Z máxima)."""
+        sm = self.model.story_manager
+        elevations = np.array([s.elevation for s in sm.stories], dtype=float)
+        categories = {"nodes": len(self.model.node_manager.nodes)}
+        stories = {}
+        for category in CATEGORY_TABLES:
+            elements = getattr(self.model, category)
+            categories[category] = len(elements)
+            if not elements:
+                continue
+            zmax = np.array([max(n.z for n in element_nodes(e)) for e in elements])
+            idx = np.clip(np.searchsorted(elevations, zmax - self.tolerance), 0, max(len(elevations) - 1, 0))
+            for i, n in zip(*np.unique(idx, return_counts=True)):
+                name = sm.get_etabs_name(sm.stories[i]) if sm.stories else "Base"
+                stories.setdefault(name, {})[category] = int(n)
+        return categories, stories
+
+    # ---------- volúmenes sospechosos ----------
+    def flags(self):
+        """Nombres ETABS (B1, W3, ...) de los elementos sospechosos y cantidad de nodos sueltos."""
+        out = {"frames_duplicados": [], "frames_cortos": [], "areas_duplicadas": [], "areas_pequenas": []}
+        used = set()
+
+        seen = {}
+        for category in ("beams", "columns"):
+            prefix = CATEGORY_TABLES[category][0]
+            for k, e in enumerate(getattr(self.model, category)):
+                name = f"{prefix}{k + 1}"
+                ids = (e.start_node.id, e.end_node.id)
+                used.update(ids)
+                key = tuple(sorted(ids))
+                if key in seen:
+                    out["frames_duplicados"].append(name)
+                else:
+                    seen[key] = name
+                a, b = (np.array(n.get_coords(), dtype=float) for n in (e.start_node, e.end_node))
+                if np.linalg.norm(b - a) < self.min_length:
+                    out["frames_cortos"].append(name)
+
+        seen = {}
+        for category in ("walls", "slabs"):
+            prefix = CATEGORY_TABLES[category][0]
+            for k, e in enumerate(getattr(self.model, category)):
+                name = f"{prefix}{k + 1}"
+                ids = [n.id for n in e.nodes]
+                used.update(ids)
+                key = tuple(sorted(ids))
+                if key in seen:
+                    out["areas_duplicadas"].append(name)
+                else:
+                    seen[key] = name
+                pts = np.array([n.get_coords() for n in e.nodes], dtype=float).reshape(-1, 3)
+                if len(pts) < 3:
+                    out["areas_pequenas"].append(name)
+                    continue
+                nxt = np.roll(pts, -1, axis=0)
+                area = 0.5 * np.linalg.norm(np.cross(pts, nxt).sum(axis=0))
+                if area < self.min_area or np.linalg.norm(nxt - pts, axis=1).min() < self.min_length:
+                    out["areas_pequenas"].append(name)
+
+        out["nodos_sueltos"] = sum(1 for n in self.model.node_manager.nodes.values() if n.id not in used)
+        for key, names in out.items():
+            if isinstance(names, list) and names:
+                logger.warning(f"Simulacro: {len(names)} {key.replace('_', ' ')}: "
+                               f"{', '.join(names[:10])}{'...' if len(names) > 10 else ''}")
+        return out
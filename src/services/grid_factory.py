@@ -1,18 +1,64 @@
 import numpy as np
-from sklearn.cluster import DBSCAN
-import numpy as np
 import logging
 import string
+import bisect
+from utils.math_helpers import cluster_centers_1d
 
 logger = logging.getLogger("Revit2Etabs.Service.GridFactory")
 
+
+class GridAxisIndex:
+    """
+    Estado incremental de un ángulo de grilla: rhos ordenados, la GridLine de
+    cada rho y cuántas candidatas (de elementos) la sostienen.
+    """
+
+    def __init__(self, system, angle, is_letter):
+        self.system = system
+        self.angle = angle
+        self.is_letter = is_letter
+        self.rhos = []
+        self.lines = []
+        self.counts = []
+        self.next_label = 0 # Índice de la próxima etiqueta libre (las existentes no se renombran)
+
+    def nearest(self, rho, eps):
+        """Posición de la grilla más cercana a rho si está a menos de eps, o None."""
+        pos = bisect.bisect_left(self.rhos, rho)
+        best = None
+        for i in (pos - 1, pos):
+            if 0 <= i < len(self.rhos) and abs(self.rhos[i] - rho) <= eps:
+                if best is None or abs(self.rhos[i] - rho) < abs(self.rhos[best] - rho):
+                    best = i
+        return best
+
+    def insert(self, rho, line, count=0):
+        pos = bisect.bisect_left(self.rhos, rho)
+        self.rhos.insert(pos, rho)
+        self.lines.insert(pos, line)
+        self.counts.insert(pos, count)
+        return pos
+
+    def pop(self, pos):
+        self.rhos.pop(pos)
+        self.counts.pop(pos)
+        return self.lines.pop(pos)
+
+
 class GridFactory:
     def __init__(self, model):
         self.model = model
         self.master_angles = [] # Ángulos depurados del proyecto
         self.master_grids = {}   # {angulo: [rhos_consolidados]}
 
-    def _find_master_angles(self, eps_deg, canonical_angles, snap_threshold):
+        # Estado para el modo incremental (ver update_grids)
+        self.axes = {}          # {angulo: GridAxisIndex}
+        self._contributions = {} # {id(elemento): (elemento, firma, [GridLine, ...])}
+        self._eps_deg = None
+        self._eps_dist = None
+        self._round_decimal = 2
+
+    def _find_master_angles(self, eps_deg, canonical_angles, snap_threshold, length_weighted=False):
         """
         Identifica direcciones principales. Si canonical_angles tiene valores,
         ajusta los hallazgos a ellos.
@@ -21,20 +67,20 @@ class GridFactory:
                           los ángulos detectados se "pegan" a estos valores.
         snap_threshold: Distancia angular máxima para que un elemento se considere
                         parte de un ángulo canónico.
+        length_weighted: Si es True, la mediana de cada grupo se pondera por el largo
+                         de los elementos (los elementos largos definen la dirección).
         """
         elements = self.model.beams + self.model.walls
         if not elements: return []
 
-        raw_angles = [e.get_angle() for e in elements]
-        X = np.radians(np.array(raw_angles).reshape(-1, 1))
-        
-        db = DBSCAN(eps=np.radians(eps_deg), min_samples=1).fit(X)
-        
+        raw_angles = np.array([e.get_angle() for e in elements], dtype=float)
+        weights = np.array([e.get_length() for e in elements]) if length_weighted else None
+
+        # Agrupamiento circular (período 180°): 179° y 1° pertenecen al mismo grupo
+        medians = cluster_centers_1d(raw_angles, eps_deg, weights=weights, period=180)
+
         found_masters = []
-        for label in set(db.labels_):
-            cluster_data = np.degrees(X[db.labels_ == label])
-            median_angle = np.median(cluster_data) % 180
-            
+        for median_angle in medians:
             final_angle = median_angle
             
             # Solo ejecutamos el snapping si el usuario entregó una lista
@@ -48,13 +94,13 @@ class GridFactory:
                         final_angle = float(can_ang)
                         break
             
-            found_masters.append(round(final_angle,0))
+            found_masters.append(round(final_angle,0) % 180)
 
         self.master_angles = sorted(list(set(found_masters)))
         logger.info(f"Ángulos maestros detectados: {self.master_angles}")
         return self.master_angles
 
-    def generate_grids(self, eps_deg=2.0,eps_dist=0.1,round_decimal=2,canonical_angles=None,snap_threshold=2.5):
+    def generate_grids(self, eps_deg=2.0,eps_dist=0.1,round_decimal=2,canonical_angles=None,snap_threshold=2.5,length_weighted=False,incremental=False):
         """Genera el andamiaje de grillas usando los ángulos maestros.
         
         eps_deg: Tolerancia angular para agrupar elementos similares.
@@ -64,99 +110,288 @@ class GridFactory:
                           los ángulos detectados se "pegan" a estos valores.
         snap_threshold: Distancia angular máxima para que un elemento se considere
                         parte de un ángulo canónico.
+        length_weighted: Pondera las medianas de ángulos y rhos por el largo de los elementos.
+        incremental: Si ya hubo una generación completa, solo absorbe los elementos
+                     agregados/movidos/eliminados desde entonces (ver update_grids).
         """
+        if incremental and self.axes:
+            return self.update_grids(*self.detect_changes())
+
         # 1. Primero encontramos los ángulos de intención
-        self._find_master_angles(eps_deg=eps_deg,canonical_angles=canonical_angles,snap_threshold=snap_threshold)
-        
-        candidates = {ang: [] for ang in self.master_angles}
-        # También necesitamos los ángulos perpendiculares para las grillas transversales
-        for ang in list(candidates.keys()):
-            candidates[(ang + 90) % 180] = []
+        self._find_master_angles(eps_deg=eps_deg,canonical_angles=canonical_angles,snap_threshold=snap_threshold,
+                                 length_weighted=length_weighted)
 
         elements = self.model.beams + self.model.walls
-        for elem in elements:
-            # Buscamos el ángulo maestro más cercano al del elemento
-            e_ang = elem.get_angle()
-            m_ang = min(self.master_angles, key=lambda x: abs(x - e_ang)) # Encuentra el ángulo maestro más cercano al ángulo del elemento
-            p_ang = (m_ang + 90) % 180 # Ángulo perpendicular
-
-            p1 = elem.start_node
-            p2 = elem.end_node
-
-            # Candidata Longitudinal (usa el ángulo maestro)
-            rho_l = self._calculate_rho(p1.x, p1.y, m_ang)
-            candidates[m_ang].append(rho_l)
+        if not elements or not self.master_angles:
+            return
 
-            # Candidatas Transversales (en los nodos, con ángulo perpendicular)
-            rho_t1 = self._calculate_rho(p1.x, p1.y, p_ang)
-            rho_t2 = self._calculate_rho(p2.x, p2.y, p_ang)
-            candidates[p_ang].append(rho_t1)
-            candidates[p_ang].append(rho_t2)
+        cand_ang, cand_rho, cand_w = self._element_candidates(elements, length_weighted)
 
         # 2. Consolidar rhos por cada ángulo
-        for ang, rho_list in candidates.items():
-            if not rho_list: continue
-            self.master_grids[ang] = sorted([round(x,round_decimal) for x in self._cluster_rhos(rho_list, eps_dist)])
+        angles = list(self.master_angles) + [(ang + 90) % 180 for ang in self.master_angles]
+        for ang in dict.fromkeys(angles):
+            mask = cand_ang == ang
+            if not mask.any(): continue
+            weights = cand_w[mask] if length_weighted else None
+            self.master_grids[ang] = sorted([round(x,round_decimal) for x in self._cluster_rhos(cand_rho[mask], eps_dist, weights)])
         
         # 3. Organizar y guardar las grillas
         self.organize_and_save_grids(round_decimal=round_decimal)
 
+        # 4. Estado para actualizaciones incrementales
+        self._eps_deg, self._eps_dist, self._round_decimal = eps_deg, eps_dist, round_decimal
+        self._index_contributions(elements, cand_ang, cand_rho)
+
+    def _element_candidates(self, elements, length_weighted=False):
+        """
+        Candidatas de grilla de cada elemento: (ángulo, rho, peso) en tres bloques
+        consecutivos [longitudinal | transversal nodo 1 | transversal nodo 2].
+        """
+        # Arreglos de los elementos (una sola pasada en Python, el resto vectorizado)
+        e_ang = np.array([e.get_angle() for e in elements], dtype=float)
+        p1 = np.array([(e.start_node.x, e.start_node.y) for e in elements])
+        p2 = np.array([(e.end_node.x, e.end_node.y) for e in elements])
+        lengths = np.array([e.get_length() for e in elements]) if length_weighted else np.ones(len(elements))
+
+        # Ángulo maestro más cercano de cada elemento (distancia circular en 180°)
+        masters = np.array(self.master_angles, dtype=float)
+        diff = np.abs(e_ang[:, None] - masters[None, :]) % 180
+        circ = np.minimum(diff, 180 - diff)
+        m_ang = masters[np.argmin(circ, axis=1)]
+        p_ang = (m_ang + 90) % 180 # Ángulo perpendicular
+
+        if self._eps_deg is not None:
+            off = np.min(circ, axis=1) > self._eps_deg
+            if off.any():
+                logger.warning(f"{int(off.sum())} elementos no calzan con ningún ángulo maestro; "
+                               "se recomienda regenerar las grillas completas.")
+
+        # Candidata Longitudinal (usa el ángulo maestro) y Transversales (en los nodos, con ángulo perpendicular)
+        rho_l = self._calculate_rho(p1[:, 0], p1[:, 1], m_ang)
+        rho_t1 = self._calculate_rho(p1[:, 0], p1[:, 1], p_ang)
+        rho_t2 = self._calculate_rho(p2[:, 0], p2[:, 1], p_ang)
+
+        return (np.concatenate((m_ang, p_ang, p_ang)),
+                np.concatenate((rho_l, rho_t1, rho_t2)),
+                np.concatenate((lengths, lengths, lengths)))
+
+    def _element_signature(self, elem):
+        """Firma de posición para detectar elementos movidos."""
+        return (elem.start_node.x, elem.start_node.y, elem.end_node.x, elem.end_node.y)
+
+    def _index_contributions(self, elements, cand_ang, cand_rho):
+        """Asigna cada candidata a la grilla que la absorbió en la generación completa."""
+        self.axes = {}
+        for system in self.model.grid_manager.systems:
+            axis_angles = sorted({g.angle_deg for g in system.grids})
+            for i, ang in enumerate(axis_angles):
+                axis = GridAxisIndex(system, ang, is_letter=(i == 0))
+                for g in system.grids:
+                    if g.angle_deg == ang:
+                        axis.insert(g.rho, g)
+                axis.next_label = len(axis.rhos)
+                self.axes[ang] = axis
+
+        n = len(elements)
+        self._contributions = {}
+        for k, elem in enumerate(elements):
+            lines = []
+            for j in (k, n + k, 2 * n + k):
+                line = self._absorb(cand_ang[j], cand_rho[j], create=False)
+                if line is not None:
+                    lines.append(line)
+            self._contributions[id(elem)] = (elem, self._element_signature(elem), lines)
+
+    def _absorb(self, angle, rho, create=True):
+        """Suma una candidata a la grilla más cercana o crea una grilla nueva."""
+        axis = self.axes.get(angle)
+        if axis is None:
+            return None
+        if create:
+            eps = self._eps_dist if self._eps_dist is not None else 0.1
+            pos = axis.nearest(rho, max(eps, 10 ** -self._round_decimal))
+        else:
+            # Indexación inicial: la candidata ya pertenece a algún grupo, puede
+            # quedar a más de eps de la mediana por el encadenamiento del agrupamiento
+            pos = axis.nearest(rho, float('inf'))
+        if pos is None:
+            if not create:
+                return None
+            rho = round(float(rho), self._round_decimal)
+            label = f"{axis.system.prefix}-{self._generate_label(axis.next_label, axis.is_letter)}"
+            axis.next_label += 1
+            line = axis.system.add_grid(label=label, angle_deg=angle, rho=rho)
+            if line is None:
+                return None
+            pos = axis.insert(rho, line)
+            logger.debug(f"Grilla nueva {label} (rho={rho}).")
+        axis.counts[pos] += 1
+        if axis.lines[pos] not in axis.system.grids: # Pudo ser retirada por cleanup_unused_grids
+            axis.system.grids.append(axis.lines[pos])
+        return axis.lines[pos]
+
+    def _release(self, line):
+        """Resta una candidata de su grilla y la retira si queda vacía."""
+        axis = self.axes.get(line.angle_deg)
+        if axis is None or line not in axis.lines:
+            return False
+        pos = axis.lines.index(line)
+        axis.counts[pos] -= 1
+        if axis.counts[pos] > 0:
+            return False
+        axis.pop(pos)
+        if line in axis.system.grids:
+            axis.system.grids.remove(line)
+        return True
+
+    def update_grids(self, added=(), moved=(), removed=()):
+        """
+        Mantención incremental de las grillas tras editar elementos:
+          - removed / moved: se restan sus candidatas; grillas vacías se retiran.
+          - added / moved: sus candidatas se absorben en la grilla existente más
+            cercana (a menos de eps_dist) o crean una grilla nueva.
+        Las grillas existentes conservan su etiqueta y posición. El costo es
+        proporcional a la cantidad de elementos editados.
+        Devuelve un resumen con grillas creadas y retiradas.
+        """
+        if not self.axes:
+            raise RuntimeError("update_grids requiere una generación completa previa (generate_grids).")
+        added, moved, removed = list(added), list(moved), list(removed)
+
+        before = {id(l) for axis in self.axes.values() for l in axis.lines}
+        retired = 0
+        for elem in removed + moved:
+            entry = self._contributions.pop(id(elem), None)
+            if entry is None:
+                continue
+            for line in entry[2]:
+                retired += self._release(line)
+
+        to_add = added + moved
+        if to_add:
+            cand_ang, cand_rho, _ = self._element_candidates(to_add)
+            n = len(to_add)
+            for k, elem in enumerate(to_add):
+                lines = []
+                for j in (k, n + k, 2 * n + k):
+                    line = self._absorb(cand_ang[j], cand_rho[j])
+                    if line is not None:
+                        lines.append(line)
+                self._contributions[id(elem)] = (elem, self._element_signature(elem), lines)
+
+        for axis in self.axes.values():
+            self.master_grids[axis.angle] = list(axis.rhos)
+
+        created = sum(1 for axis in self.axes.values() for l in axis.lines if id(l) not in before)
+        summary = {"agregados": len(added), "movidos": len(moved), "eliminados": len(removed),
+                   "grillas_nuevas": created, "grillas_retiradas": retired}
+        logger.info(f"Actualización incremental de grillas: {summary}")
+        return summary
+
+    def detect_changes(self):
+        """
+        Compara los elementos actuales del modelo con los indexados y devuelve
+        (agregados, movidos, eliminados), listo para update_grids.
+        """
+        elements = self.model.beams + self.model.walls
+        current = {id(e): e for e in elements}
+        added = [e for k, e in current.items() if k not in self._contributions]
+        moved = [e for k, e in current.items()
+                 if k in self._contributions and self._contributions[k][1] != self._element_signature(e)]
+        removed = [entry[0] for k, entry in self._contributions.items() if k not in current]
+        return added, moved, removed
+
     def _calculate_rho(self, x, y, angle_deg):
-        # La normal está a +90 grados de la línea
+        # La normal está a +90 grados de la línea (acepta escalares o arreglos)
         theta = np.radians((angle_deg + 90) % 180)
         return x * np.cos(theta) + y * np.sin(theta)
 
-    def _cluster_rhos(self, rhos, eps):
-        X = np.array(rhos).reshape(-1, 1)
-        db = DBSCAN(eps=eps, min_samples=1).fit(X)
-        return [np.median(X[db.labels_ == l]) for l in set(db.labels_)]
+    def _cluster_rhos(self, rhos, eps, weights=None):
+        return cluster_centers_1d(rhos, eps, weights=weights)
 
     def snap_nodes(self, max_distance=0.10):
         """
         Snap inteligente: Solo atrae nodos a intersecciones de grillas
         cuyos ángulos coincidan con los elementos conectados al nodo.
+        Motor indexado: rhos ordenados por ángulo maestro (searchsorted),
+        normales precalculadas e intersección 2x2 en forma cerrada, todo
+        procesado como arreglos sobre los pares (nodo, ángulo maestro).
         """
-        nodes_moved = 0
         node_manager = self.model.node_manager
+        nodes = list(node_manager.nodes.values())
+        if not nodes or not self.master_grids:
+            logger.info("Snap completado: 0 nodos ajustados a la grilla maestra.")
+            return
+
+        master_angles = np.array(list(self.master_grids.keys()), dtype=float)
+        theta = np.radians((master_angles + 90) % 180)
+        normals = np.column_stack((np.cos(theta), np.sin(theta))) # Normal de cada ángulo maestro
+        rho_index = [np.asarray(self.master_grids[a], dtype=float) for a in self.master_grids]
 
-        for node in node_manager.nodes.values():
-            # 1. Obtener ángulos de elementos reales conectados a este nodo
+        # 1. Pares (nodo, ángulo conectado) con al menos 2 ángulos por nodo
+        pair_node, pair_angle = [], []
+        for i, node in enumerate(nodes):
             connected_angles = node_manager.get_connected_angles(node.id)
             if len(connected_angles) < 2:
                 continue # No hay intersección posible con un solo ángulo
+            pair_node.extend([i] * len(connected_angles))
+            pair_angle.extend(connected_angles)
+        if not pair_node:
+            logger.info("Snap completado: 0 nodos ajustados a la grilla maestra.")
+            return
 
-            # 2. Mapear ángulos de elementos a los ángulos maestros de grillas
-            relevant_master_angles = set()
-            for c_ang in connected_angles:
-                # Buscamos el ángulo maestro más cercano (ej: 0.02 -> 0.0)
-                best_master = min(self.master_grids.keys(), 
-                                  key=lambda m: min(abs(m - c_ang), abs(180 - abs(m - c_ang))))
-                relevant_master_angles.add(best_master)
-
-            # 3. Buscar las mejores grillas candidatas SOLO dentro de los ángulos relevantes
-            candidate_grids = []
-            for ang in relevant_master_angles:
-                rhos = self.master_grids[ang]
-                rho_node = self._calculate_rho(node.x, node.y, ang)
-                
-                # Encontrar el rho maestro más cercano para este ángulo específico
-                closest_rho = min(rhos, key=lambda r: abs(r - rho_node))
-                
-                if abs(closest_rho - rho_node) <= max_distance:
-                    candidate_grids.append((ang, closest_rho))
-
-            # 4. Resolver intersección solo si tenemos al menos 2 grillas relevantes
-            if len(candidate_grids) >= 2:
-                # Si hay más de 2 (raro pero posible), tomamos las 2 más cercanas
-                candidate_grids.sort(key=lambda g: abs(g[1] - self._calculate_rho(node.x, node.y, g[0])))
-                
-                new_x, new_y = self._intersect_lines(candidate_grids[0], candidate_grids[1])
-                
-                if new_x is not None:
-                    node.x, node.y = new_x, new_y
-                    nodes_moved += 1
-                    
-        logger.info(f"Snap completado: {nodes_moved} nodos ajustados a la grilla maestra.")
+        # 2. Mapear ángulos de elementos a los ángulos maestros (distancia circular)
+        unique_angles, inverse = np.unique(np.asarray(pair_angle, dtype=float), return_inverse=True)
+        diff = np.abs(unique_angles[:, None] - master_angles[None, :])
+        best_master = np.argmin(np.minimum(diff, np.abs(180 - diff)), axis=1)
+        pair_master = best_master[inverse]
+
+        # Pares únicos (nodo, ángulo maestro)
+        keys = np.unique(np.asarray(pair_node, dtype=np.int64) * len(master_angles) + pair_master)
+        pair_node = keys // len(master_angles)
+        pair_master = keys % len(master_angles)
+
+        # 3. Grilla más cercana por búsqueda binaria en los rhos de cada ángulo
+        coords = np.array([(n.x, n.y) for n in nodes])
+        rho_node = np.einsum('ij,ij->i', coords[pair_node], normals[pair_master])
+        closest = np.full(len(keys), np.nan)
+        for m, rhos in enumerate(rho_index):
+            sel = pair_master == m
+            if not sel.any() or rhos.size == 0:
+                continue
+            r = rho_node[sel]
+            pos = np.clip(np.searchsorted(rhos, r), 1, max(rhos.size - 1, 1))
+            left = rhos[pos - 1]
+            right = rhos[np.minimum(pos, rhos.size - 1)]
+            closest[sel] = np.where(np.abs(r - left) <= np.abs(right - r), left, right)
+
+        dist = np.abs(closest - rho_node)
+        valid = dist <= max_distance # NaN (sin grillas) queda fuera
+        pair_node, pair_master, closest, dist = pair_node[valid], pair_master[valid], closest[valid], dist[valid]
+
+        # 4. Las dos grillas más cercanas por nodo (orden por nodo y luego distancia)
+        order = np.lexsort((dist, pair_node))
+        pair_node, pair_master, closest = pair_node[order], pair_master[order], closest[order]
+        first = np.ones(len(pair_node), dtype=bool)
+        first[1:] = pair_node[1:] != pair_node[:-1]
+        second = np.zeros(len(pair_node), dtype=bool)
+        second[1:] = first[:-1] & ~first[1:]
+        i1 = np.flatnonzero(second) - 1
+        i2 = np.flatnonzero(second)
+
+        # 5. Intersección en forma cerrada: n1·p = r1, n2·p = r2
+        n1, n2 = normals[pair_master[i1]], normals[pair_master[i2]]
+        r1, r2 = closest[i1], closest[i2]
+        det = n1[:, 0] * n2[:, 1] - n1[:, 1] * n2[:, 0]
+        ok = np.abs(det) > 1e-12 # Líneas paralelas: sin intersección
+        new_x = (r1[ok] * n2[ok, 1] - r2[ok] * n1[ok, 1]) / det[ok]
+        new_y = (n1[ok, 0] * r2[ok] - n2[ok, 0] * r1[ok]) / det[ok]
+
+        moved = pair_node[i1][ok]
+        for idx, x, y in zip(moved, new_x, new_y):
+            nodes[idx].x, nodes[idx].y = float(x), float(y)
+
+        logger.info(f"Snap completado: {len(moved)} nodos ajustados a la grilla maestra.")
 
     def _intersect_lines(self, g1, g2):
         """
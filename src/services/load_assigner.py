@@ -0,0 +1,120 @@
+import logging
+import numpy as np
+from services.etabs_tables import EtabsTableWriter, format_coords
+from utils.etabs_schemas import LOAD_PATTERN_TABLE, AREA_UNIFORM_LOAD_TABLE, FRAME_DISTRIBUTED_LOAD_TABLE
+
+logger = logging.getLogger("Revit2Etabs.Service.LoadAssigner")
+
+# Tipo de patrón ETABS -> multiplicador de peso propio
+PATTERN_TYPES = {"Dead": 1.0, "Super Dead": 0.0, "Live": 0.0, "Reducible Live": 0.0, "Other": 0.0}
+
+# Destino de la carga -> categoría del modelo
+TARGETS = {"slabs": "slabs", "beams": "beams"}
+
+
+class LoadAssigner:
+    """
+    Asignación masiva de cargas gravitacionales. Cada definición es un dict:
+        {"pattern": "SC", "type": "Super Dead", "target": "slabs",
+         "level": "Nivel 2", "section": None, "value": 150}
+    target: "slabs" (carga uniforme en kgf/m2) o "beams" (distribuida en kgf/m).
+    level / section: filtros opcionales por nivel Revit y sección Revit del
+    elemento (ambos = intersección; ninguno = todos los elementos del destino).
+    Las cargas de varias definiciones sobre el mismo elemento y patrón se suman.
+    Todo se escribe en tres tablas: patrones, cargas de área y cargas de frame.
+    names: nombres de los elementos en ETABS por categoría, en el orden de
+    model.<categoría> (ver EtabsWriter.etabs_names).
+    """
+
+    def __init__(self, model, sap_model, names, chunk_size=5000):
+        self.model = model
+        self.SapModel = sap_model
+        self.names = names
+        self.chunk_size = chunk_size
+
+    def _indexes(self, elements):
+        """Índices por nivel y por sección: {valor: arreglo de posiciones en la lista}."""
+        levels = np.array([str(e.level) for e in elements], dtype=str)
+        sections = np.array([str(e.section) for e in elements], dtype=str)
+        by_level = {v: np.flatnonzero(levels == v) for v in np.unique(levels)}
+        by_section = {v: np.flatnonzero(sections == v) for v in np.unique(sections)}
+        return by_level, by_section
+
+    def resolve(self, definitions):
+        """
+        Resuelve las definiciones contra el modelo.
+        Devuelve {target: (índices de elementos, patrones, valores)} ya sumados por (elemento, patrón).
+        """
+        patterns = []
+        out = {}
+        for target, category in TARGETS.items():
+            elements = getattr(self.model, category)
+            by_level, by_section = self._indexes(elements)
+            all_idx = np.arange(len(elements))
+            idx_parts, pat_parts, val_parts = [], [], []
+
+            for d in definitions:
+                if d.get("target", "slabs") != target:
+                    continue
+                if d["pattern"] not in patterns:
+                    patterns.append(d["pattern"])
+                idx = all_idx
+                if d.get("level") is not None:
+                    idx = by_level.get(str(d["level"]), np.array([], dtype=int))
+                if d.get("section") is not None:
+                    idx = np.intersect1d(idx, by_section.get(str(d["section"]), np.array([], dtype=int)))
+                if len(idx) == 0:
+                    logger.warning(f"La carga {d} no se aplica a ningún elemento.")
+                    continue
+                idx_parts.append(idx)
+                pat_parts.append(np.full(len(idx), patterns.index(d["pattern"])))
+                val_parts.append(np.full(len(idx), float(d["value"])))
+
+            if not idx_parts:
+                continue
+            idx, pat, val = np.concatenate(idx_parts), np.concatenate(pat_parts), np.concatenate(val_parts)
+            # Suma por (elemento, patrón)
+            keys, inverse = np.unique(np.stack([idx, pat], axis=1), axis=0, return_inverse=True)
+            totals = np.zeros(len(keys))
+            np.add.at(totals, inverse.ravel(), val)
+            out[target] = (keys[:, 0], np.array(patterns, dtype=str)[keys[:, 1]], totals)
+        return out
+
+    def write(self, definitions):
+        """Define los patrones de carga y escribe las asignaciones. Devuelve filas escritas por tabla."""
+        tables = EtabsTableWriter(self.SapModel, self.chunk_size)
+        report = {}
+
+        patterns = {}
+        for d in definitions:
+            kind = d.get("type", "Dead")
+            if kind not in PATTERN_TYPES:
+                raise ValueError(f"Tipo de patrón de carga desconocido: {kind}")
+            patterns.setdefault(d["pattern"], kind)
+        names = list(patterns)
+        report["patrones"] = tables.write_table(LOAD_PATTERN_TABLE, [
+            names, [patterns[n] for n in names], [str(PATTERN_TYPES[patterns[n]]) for n in names]])
+
+        resolved = self.resolve(definitions)
+        if "slabs" in resolved:
+            idx, pat, val = resolved["slabs"]
+            n = len(idx)
+            report["areas"] = tables.write_table(AREA_UNIFORM_LOAD_TABLE, [
+                self._object_names("slabs", idx), pat, np.full(n, "Gravity"), format_coords(val)])
+        if "beams" in resolved:
+            idx, pat, val = resolved["beams"]
+            n = len(idx)
+            loads = format_coords(val)
+            report["frames"] = tables.write_table(FRAME_DISTRIBUTED_LOAD_TABLE, [
+                self._object_names("beams", idx), pat, np.full(n, "Force"), np.full(n, "Gravity"),
+                np.full(n, "Relative"), np.full(n, "0"), np.full(n, "1"), loads, loads])
+
+        logger.info(f"Cargas asignadas: {report} ({tables.calls} llamadas a DatabaseTables).")
+        return report
+
+    def _object_names(self, category, idx):
+        names = np.asarray(self.names[category], dtype=str)
+        if len(names) != len(getattr(self.model, category)):
+            raise ValueError(f"Se recibieron {len(names)} nombres para {len(getattr(self.model, category))} "
+                             f"elementos de {category}.")
+        return names[idx]
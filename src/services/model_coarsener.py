@@ -0,0 +1,109 @@
+import logging
+from services.geometry_optimizer import GeometryOptimizer
+
+logger = logging.getLogger("Revit2Etabs.Service.ModelCoarsener")
+
+# Escalones de simplificación, de más fino a más grueso.
+# min_opening_area (m2), min_opening_width (m), min_panel_area (m2), min_beam_length (m)
+COARSENING_LEVELS = [
+    {"min_opening_area": 0.0,  "min_opening_width": 0.0, "min_panel_area": 0.0, "min_beam_length": 0.0},
+    {"min_opening_area": 0.25, "min_opening_width": 0.3, "min_panel_area": 0.25, "min_beam_length": 0.3},
+    {"min_opening_area": 1.0,  "min_opening_width": 0.6, "min_panel_area": 1.0, "min_beam_length": 0.5},
+    {"min_opening_area": 2.0,  "min_opening_width": 1.0, "min_panel_area": 2.0, "min_beam_length": 1.0},
+    {"min_opening_area": 4.0,  "min_opening_width": 1.5, "min_panel_area": 4.0, "min_beam_length": 1.5},
+]
+
+SHELL_PARAMS = ("min_opening_area", "min_opening_width", "min_panel_area")
+
+
+class ModelCoarsener:
+    """
+    Modo de simplificación para corridas de prediseño. Recorre los escalones
+    de COARSENING_LEVELS hasta que la cantidad estimada de shells + frames
+    cabe en el presupuesto, y luego aplica ese escalón al modelo:
+      - Ignora aberturas pequeñas de muros y losas.
+      - Fusiona paneles pequeños con sus vecinos.
+      - Elimina vigas más cortas que el umbral.
+    Debe ejecutarse después de cargar y antes de transformar/ajustar nodos,
+    porque re-descompone muros y losas desde sus contornos originales.
+    """
+
+    def __init__(self, model, levels=None):
+        self.model = model
+        self.levels = levels or COARSENING_LEVELS
+        self.report = {}
+
+    def estimate(self, level):
+        """
+        Estima la cantidad de elementos que resultaría de aplicar un escalón,
+        sin modificar el modelo. Devuelve un diccionario con el detalle.
+        """
+        shells = 0
+        openings = 0
+        panels = 0
+        for processor, sources in ((self.model.wall_processor, self.model.shell_sources["walls"]),
+                                   (self.model.slab_processor, self.model.shell_sources["slabs"])):
+            previous = {k: getattr(processor, k) for k in SHELL_PARAMS}
+            try:
+                for k in SHELL_PARAMS:
+                    setattr(processor, k, level[k])
+                for _, corners in processor.decompose_elements(sources):
+                    shells += len(corners)
+                    openings += getattr(corners, 'openings_ignored', 0)
+                    panels += getattr(corners, 'panels_merged', 0)
+            finally:
+                for k, v in previous.items():
+                    setattr(processor, k, v)
+
+        beams = sum(1 for b in self.model.beams if b.get_length() >= level["min_beam_length"])
+        frames = beams + len(self.model.columns)
+        return {
+            "shells": shells,
+            "frames": frames,
+            "total": shells + frames,
+            "aberturas_ignoradas": openings,
+            "paneles_fusionados": panels,
+            "vigas_eliminadas": len(self.model.beams) - beams
+        }
+
+    def coarsen(self, budget):
+        """
+        Simplifica el modelo hasta que la estimación de elementos quepa en budget.
+        Si ni el escalón más grueso alcanza, se aplica igual y se advierte.
+        Devuelve el reporte de lo simplificado.
+        """
+        before = len(self.model.walls) + len(self.model.slabs) + len(self.model.beams) + len(self.model.columns)
+        if before <= budget:
+            self.report = {"escalon": 0, "antes": before, "despues": before, "presupuesto": budget}
+            logger.info(f"Simplificación: el modelo ({before} elementos) ya cabe en el presupuesto de {budget}.")
+            return self.report
+
+        chosen, estimate = len(self.levels) - 1, None
+        for idx, level in enumerate(self.levels):
+            estimate = self.estimate(level)
+            logger.debug(f"Simplificación escalón {idx}: {estimate}")
+            if estimate["total"] <= budget:
+                chosen = idx
+                break
+
+        self._apply(self.levels[chosen])
+        after = len(self.model.walls) + len(self.model.slabs) + len(self.model.beams) + len(self.model.columns)
+
+        self.report = dict(estimate, escalon=chosen, antes=before, despues=after, presupuesto=budget)
+        if after > budget:
+            logger.warning(f"Simplificación: ni el escalón más grueso cumple el presupuesto ({after} > {budget}).")
+        logger.info(f"Simplificación (escalón {chosen}): {before} -> {after} elementos. "
+                    f"Aberturas ignoradas: {estimate['aberturas_ignoradas']}, "
+                    f"paneles fusionados: {estimate['paneles_fusionados']}, "
+                    f"vigas eliminadas: {estimate['vigas_eliminadas']}.")
+        return self.report
+
+    def _apply(self, level):
+        for processor in (self.model.wall_processor, self.model.slab_processor):
+            for k in SHELL_PARAMS:
+                setattr(processor, k, level[k])
+        self.model.rebuild_shells()
+
+        if level["min_beam_length"]:
+            self.model.beams = [b for b in self.model.beams if b.get_length() >= level["min_beam_length"]]
+        GeometryOptimizer(self.model).remove_orphan_nodes()
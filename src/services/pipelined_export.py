@@ -0,0 +1,128 @@
+import time
+import queue
+import logging
+import threading
+from services import etabs_tables
+from services.etabs_tables import EtabsTableWriter
+
+try:
+    import comtypes
+except ImportError:
+    comtypes = None
+
+logger = logging.getLogger("Revit2Etabs.Service.PipelinedExport")
+
+# Marca de fin de la cola
+_DONE = object()
+
+def story_batches(model, chunk_size=2000, tolerance=0.01):
+    """
+    Productor: genera lotes de comandos [(tabla, columnas), ...] piso por piso
+    y por categoría (ver etabs_tables.story_chunks). Es un generador: la
+    serialización de cada lote ocurre recién cuando el exportador lo pide.
+    """
+    for _, batch in etabs_tables.story_chunks(model, chunk_size, tolerance):
+        yield batch
+
+
+class PipelinedExporter:
+    """
+    Exportación productor/consumidor: el hilo que llama a run() produce lotes
+    de comandos y un hilo escritor dedicado (dueño del apartamento COM) los
+    consume desde una cola acotada y los escribe en ETABS con DatabaseTables.
+      - Contrapresión: si el escritor va atrás, el productor espera (queue_size).
+      - Errores: un error del escritor detiene al productor y se relanza en run();
+        un error del productor detiene al escritor.
+    El tiempo total tiende a max(producción, escritura) en vez de la suma.
+    """
+
+    def __init__(self, connect, queue_size=4, chunk_size=5000, poll=0.1):
+        """
+        connect: SapModel, o función sin argumentos que lo devuelve. Si es función,
+                 se llama dentro del hilo escritor (los objetos COM pertenecen al
+                 apartamento del hilo que los crea).
+        queue_size: Lotes máximos en espera.
+        chunk_size: Filas por bloque de ApplyEditedTables.
+        poll: Intervalo (s) con que el productor revisa si el escritor falló.
+        """
+        self.connect = connect
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.poll = poll
+        self.stats = {}
+        self._queue = None
+        self._error = None
+        self._cancel = threading.Event()
+
+    def run(self, batches):
+        """Consume el iterable de lotes (produciéndolos) mientras el hilo escritor los aplica."""
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._error = None
+        self._cancel.clear()
+        self.stats = {"lotes": 0, "filas": 0, "espera_productor": 0.0, "escritura": 0.0, "max_cola": 0}
+
+        writer = threading.Thread(target=self._consume, name="EtabsWriterThread", daemon=True)
+        t0 = time.perf_counter()
+        writer.start()
+        try:
+            for batch in batches:
+                self._put(batch)
+            self._put(_DONE)
+        except BaseException:
+            self._cancel.set()
+            raise
+        finally:
+            writer.join()
+            self.stats["total"] = time.perf_counter() - t0
+
+        if self._error is not None:
+            raise RuntimeError(f"Error en el hilo escritor de ETABS: {self._error}") from self._error
+        logger.info(f"Exportación en paralelo: {self.stats['lotes']} lotes, {self.stats['filas']} filas, "
+                    f"total {self.stats['total']:.2f}s (escritura {self.stats['escritura']:.2f}s, "
+                    f"espera del productor {self.stats['espera_productor']:.2f}s).")
+        return self.stats
+
+    def _put(self, item):
+        """Encola con contrapresión, sin bloquearse para siempre si el escritor murió."""
+        t0 = time.perf_counter()
+        while True:
+            if self._error is not None:
+                raise RuntimeError(f"Error en el hilo escritor de ETABS: {self._error}") from self._error
+            try:
+                self._queue.put(item, timeout=self.poll)
+                break
+            except queue.Full:
+                continue
+        self.stats["espera_productor"] += time.perf_counter() - t0
+        self.stats["max_cola"] = max(self.stats["max_cola"], self._queue.qsize())
+
+    def _consume(self):
+        com_initialized = False
+        try:
+            if callable(self.connect) and comtypes is not None:
+                comtypes.CoInitialize()
+                com_initialized = True
+            sap_model = self.connect() if callable(self.connect) else self.connect
+            tables = EtabsTableWriter(sap_model, self.chunk_size)
+
+            while not self._cancel.is_set():
+                try:
+                    batch = self._queue.get(timeout=self.poll)
+                except queue.Empty:
+                    continue
+                if batch is _DONE:
+                    break
+                t0 = time.perf_counter()
+                for table, columns in batch:
+                    self.stats["filas"] += tables.write_table(table, columns)
+                self.stats["escritura"] += time.perf_counter() - t0
+                self.stats["lotes"] += 1
+
+            if not self._cancel.is_set():
+                sap_model.View.RefreshView(0,False)
+        except Exception as e:
+            logger.error(f"El hilo escritor de ETABS falló: {e}")
+            self._error = e
+        finally:
+            if com_initialized:
+                comtypes.CoUninitialize()
@@ -0,0 +1,133 @@
+import logging
+from domain.material import ConcreteMaterial, SteelMaterial
+from domain.sections import FrameSection, ShellSection
+from services.etabs_tables import EtabsTableWriter
+from utils.etabs_schemas import (MATERIAL_GENERAL_TABLE, MATERIAL_MECHANICAL_TABLE, MATERIAL_CONCRETE_TABLE,
+                                 MATERIAL_STEEL_TABLE, FRAME_RECTANGULAR_TABLE, WALL_PROPERTY_TABLE, SLAB_PROPERTY_TABLE)
+
+logger = logging.getLogger("Revit2Etabs.Service.PropertyWriter")
+
+
+def shell_usage(model):
+    """
+    Uso de cada sección de área según los elementos que la referencian:
+    nombre -> "Wall" o "Slab". En ETABS una propiedad es de muro o de losa,
+    nunca ambas: si una sección la usan muros y losas se define como muro
+    (con una advertencia). Las secciones sin elementos quedan como losa.
+    """
+    walls = {w.get_etabs_section() for w in model.walls}
+    slabs = {s.get_etabs_section() for s in model.slabs}
+    both = sorted(walls & slabs)
+    if both:
+        logger.warning(f"Secciones usadas por muros y losas a la vez (se definen como muro): {both}")
+    return {name: "Wall" if name in walls else "Slab"
+            for name, sec in model.sections.items() if isinstance(sec, ShellSection)}
+
+
+class PropertyCatalog:
+    """
+    Materiales y secciones del modelo tal como se definen en ETABS.
+    deduplicate() fusiona materiales y secciones idénticos tras normalizar
+    unidades (dimensiones redondeadas a `decimals` metros, propiedades a 6
+    cifras significativas): se conserva el primer nombre (orden alfabético),
+    los elementos pasan a referenciarlo y los duplicados salen del modelo.
+    Una sección de muro nunca se fusiona con una de losa (ver shell_usage).
+    write() define todo con tablas de propiedades en bloque.
+    """
+
+    def __init__(self, model, decimals=4):
+        self.model = model
+        self.decimals = decimals
+        self.aliases = {} # nombre original -> nombre canónico (materiales y secciones)
+        self.usage = {}   # sección de área -> "Wall" o "Slab" (ver shell_usage)
+
+    # ---------- firmas ----------
+    def _num(self, value, length=False):
+        if value is None:
+            return None
+        return round(float(value), self.decimals) if length else float(f"{float(value):.6g}")
+
+    def material_signature(self, mat):
+        if isinstance(mat, SteelMaterial):
+            return ("Steel", self._num(mat.fy), self._num(mat.e), self._num(mat.v), self._num(mat.unit_weight))
+        return ("Concrete", self._num(mat.fc), self._num(mat.e), self._num(mat.v), self._num(mat.unit_weight))
+
+    def section_signature(self, sec):
+        material = self.aliases.get(sec.material_name, sec.material_name)
+        if isinstance(sec, FrameSection):
+            return ("Frame", material, self._num(sec.width, True), self._num(sec.height, True))
+        return ("Shell", self.usage.get(sec.name, "Slab"), material, self._num(sec.thickness, True))
+
+    # ---------- deduplicación ----------
+    def deduplicate(self):
+        """Fusiona duplicados y actualiza model.materials, model.sections y la sección de cada elemento."""
+        m = self.model
+        self.usage = shell_usage(m)
+        merged_mats = self._merge(m.materials, self.material_signature)
+        for sec in m.sections.values():
+            sec.material_name = self.aliases.get(sec.material_name, sec.material_name)
+        merged_secs = self._merge(m.sections, self.section_signature)
+
+        for element in m.beams + m.columns + m.walls + m.slabs:
+            element.section = self.aliases.get(element.section, element.section)
+
+        used = {e.get_etabs_section() for e in m.beams + m.columns + m.walls + m.slabs}
+        missing = sorted(used - set(m.sections))
+        if missing:
+            logger.warning(f"Secciones usadas por elementos sin definición en el modelo: {missing}")
+        logger.info(f"Propiedades: {merged_mats} materiales y {merged_secs} secciones duplicadas fusionadas; "
+                    f"quedan {len(m.materials)} materiales y {len(m.sections)} secciones.")
+        return {"materiales_fusionados": merged_mats, "secciones_fusionadas": merged_secs, "sin_definir": missing}
+
+    def _merge(self, registry, signature):
+        canonical = {}
+        merged = 0
+        for name in sorted(registry):
+            sig = signature(registry[name])
+            if sig in canonical:
+                self.aliases[name] = canonical[sig]
+                del registry[name]
+                merged += 1
+            else:
+                canonical[sig] = name
+        return merged
+
+    # ---------- escritura ----------
+    def write(self, sap_model, chunk_size=5000):
+        """Define materiales, secciones de frame y propiedades de muro/losa en bloque."""
+        m = self.model
+        tables = EtabsTableWriter(sap_model, chunk_size)
+        fmt = lambda v: "" if v is None else repr(float(v))
+
+        mats = list(m.materials.values())
+        tables.write_table(MATERIAL_GENERAL_TABLE, [
+            [x.name for x in mats],
+            ["Steel" if isinstance(x, SteelMaterial) else "Concrete" for x in mats],
+            ["Isotropic"] * len(mats)])
+        tables.write_table(MATERIAL_MECHANICAL_TABLE, [
+            [x.name for x in mats], [fmt(x.unit_weight) for x in mats], [fmt(x.e) for x in mats],
+            [fmt(x.v) for x in mats]])
+        concrete = [x for x in mats if isinstance(x, ConcreteMaterial) and x.fc is not None]
+        steel = [x for x in mats if isinstance(x, SteelMaterial) and x.fy is not None]
+        tables.write_table(MATERIAL_CONCRETE_TABLE, [[x.name for x in concrete], [fmt(x.fc) for x in concrete]])
+        tables.write_table(MATERIAL_STEEL_TABLE, [[x.name for x in steel], [fmt(x.fy) for x in steel]])
+
+        frames = [s for s in m.sections.values() if isinstance(s, FrameSection)]
+        tables.write_table(FRAME_RECTANGULAR_TABLE, [
+            [s.name for s in frames], [s.material_name for s in frames],
+            [fmt(s.height) for s in frames], [fmt(s.width) for s in frames]])
+
+        usage = shell_usage(m)
+        shells = [s for s in m.sections.values() if isinstance(s, ShellSection)]
+        walls = [s for s in shells if usage[s.name] == "Wall"]
+        slabs = [s for s in shells if usage[s.name] == "Slab"]
+        tables.write_table(WALL_PROPERTY_TABLE, [
+            [s.name for s in walls], [s.material_name for s in walls], ["ShellThin"] * len(walls),
+            [fmt(s.thickness) for s in walls]])
+        tables.write_table(SLAB_PROPERTY_TABLE, [
+            [s.name for s in slabs], [s.material_name for s in slabs], ["ShellThin"] * len(slabs),
+            ["Slab"] * len(slabs), [fmt(s.thickness) for s in slabs]])
+
+        logger.info(f"Propiedades definidas: {len(mats)} materiales, {len(frames)} secciones de frame, "
+                    f"{len(walls)} muros y {len(slabs)} losas ({tables.calls} llamadas a DatabaseTables).")
+        return {"materiales": len(mats), "frames": len(frames), "muros": len(walls), "losas": len(slabs)}
@@ -0,0 +1,256 @@
+import math
+from shapely.geometry import LineString, MultiLineString, box
+from shapely.geometry.polygon import orient
+from shapely.ops import unary_union, polygonize
+
+
+class RectanglePartitioner:
+    """
+    Partición mínima (o casi mínima) de polígonos rectilíneos con huecos en
+    rectángulos, con el método clásico de cuerdas:
+      1. Se buscan las cuerdas "buenas": segmentos horizontales/verticales
+         interiores que unen dos vértices cóncavos.
+      2. Se arma el grafo bipartito cuerdas H vs cuerdas V (arista si se cruzan)
+         y se toma su conjunto independiente máximo (König: total - matching máximo).
+      3. Se cortan esas cuerdas y cada vértice cóncavo restante se resuelve
+         extendiendo una de sus aristas hasta el primer borde o corte.
+    Resultado: N_cóncavos - L + 1 - H rectángulos (L = cuerdas independientes).
+    """
+
+    def __init__(self, tol=1e-6, max_aspect_ratio=None):
+        """
+        tol: Tolerancia geométrica para comparar coordenadas.
+        max_aspect_ratio: Si se indica, los rectángulos más alargados que esta
+                          razón se subdividen a lo largo de su lado mayor.
+        """
+        self.tol = tol
+        self.max_aspect_ratio = max_aspect_ratio
+
+    def partition(self, poly):
+        """
+        Devuelve una lista de rectángulos (Polygon) o None si el polígono no es
+        rectilíneo (en ese caso se debe usar el pipeline de tiras).
+        """
+        if poly.is_empty or not self.is_rectilinear(poly):
+            return None
+
+        poly = orient(poly, sign=1.0)
+        reflex = self._reflex_vertices(poly)
+        chords = self._independent_chords(poly, reflex)
+
+        cuts = [LineString(c) for c in chords]
+        resolved = set()
+        for a, b in chords:
+            resolved.add(self._qkey(a))
+            resolved.add(self._qkey(b))
+
+        # Vértices cóncavos no resueltos por las cuerdas: se extiende una arista
+        for v, dirs in reflex:
+            if self._qkey(v) in resolved:
+                continue
+            cut = self._shortest_extension(poly, v, dirs, cuts)
+            if cut is None:
+                continue
+            cuts.append(cut)
+            resolved.add(self._qkey(v))
+            resolved.add(self._qkey(cut.coords[-1]))
+
+        rects = self._faces(poly, cuts)
+        if rects is None:
+            return None
+
+        if self.max_aspect_ratio:
+            rects = [r for rect in rects for r in self.split_by_aspect(rect)]
+        return rects
+
+    def is_rectilinear(self, poly):
+        for ring in [poly.exterior] + list(poly.interiors):
+            coords = list(ring.coords)
+            for (x0, y0), (x1, y1) in zip(coords[:-1], coords[1:]):
+                if abs(x0 - x1) > self.tol and abs(y0 - y1) > self.tol:
+                    return False
+        return True
+
+    def split_by_aspect(self, rect):
+        """Subdivide un rectángulo en partes iguales hasta cumplir la razón de aspecto máxima."""
+        minx, miny, maxx, maxy = rect.bounds
+        w, h = maxx - minx, maxy - miny
+        if min(w, h) <= self.tol:
+            return [rect]
+        n = math.ceil(max(w, h) / min(w, h) / self.max_aspect_ratio - self.tol)
+        if n <= 1:
+            return [rect]
+        if w >= h:
+            xs = [minx + w * i / n for i in range(n)] + [maxx]
+            return [box(x0, miny, x1, maxy) for x0, x1 in zip(xs[:-1], xs[1:])]
+        ys = [miny + h * i / n for i in range(n)] + [maxy]
+        return [box(minx, y0, maxx, y1) for y0, y1 in zip(ys[:-1], ys[1:])]
+
+    # ---------- vértices y cuerdas ----------
+    def _qkey(self, p):
+        return (round(p[0] / self.tol), round(p[1] / self.tol))
+
+    def _reflex_vertices(self, poly):
+        """
+        Lista de (vértice, direcciones) para cada vértice cóncavo (interior > 180°).
+        direcciones son los vectores unitarios de las aristas incidentes prolongadas
+        a través del vértice (ambas apuntan hacia el interior).
+        """
+        out = []
+        for ring in [poly.exterior] + list(poly.interiors):
+            pts = self._clean_ring(ring.coords)
+            n = len(pts)
+            for i in range(n):
+                prev, cur, nxt = pts[i - 1], pts[i], pts[(i + 1) % n]
+                d_in = (cur[0] - prev[0], cur[1] - prev[1])
+                d_out = (nxt[0] - cur[0], nxt[1] - cur[1])
+                cross = d_in[0] * d_out[1] - d_in[1] * d_out[0]
+                # Con orient(sign=1) el exterior es CCW y los huecos CW, por lo que
+                # en ambos casos el interior queda a la izquierda: giro a la derecha = cóncavo
+                if cross < 0:
+                    out.append((cur, [self._unit(d_in), self._unit((-d_out[0], -d_out[1]))]))
+        return out
+
+    def _clean_ring(self, coords):
+        """Quita el punto de cierre, duplicados y vértices colineales."""
+        pts = []
+        for p in list(coords)[:-1]:
+            if not pts or abs(p[0] - pts[-1][0]) > self.tol or abs(p[1] - pts[-1][1]) > self.tol:
+                pts.append((p[0], p[1]))
+        changed = True
+        while changed and len(pts) > 3:
+            changed = False
+            for i in range(len(pts)):
+                a, b, c = pts[i - 1], pts[i], pts[(i + 1) % len(pts)]
+                if (abs(a[0] - b[0]) <= self.tol and abs(b[0] - c[0]) <= self.tol) or \
+                   (abs(a[1] - b[1]) <= self.tol and abs(b[1] - c[1]) <= self.tol):
+                    pts.pop(i)
+                    changed = True
+                    break
+        return pts
+
+    def _unit(self, d):
+        m = math.hypot(*d)
+        return (round(d[0] / m), round(d[1] / m))
+
+    def _independent_chords(self, poly, reflex):
+        """Cuerdas buenas del conjunto independiente máximo del grafo bipartito H-V."""
+        pts = [v for v, _ in reflex]
+        horizontal = self._chords(poly, pts, axis=1)
+        vertical = self._chords(poly, pts, axis=0)
+        if not horizontal or not vertical:
+            return horizontal + vertical
+
+        adj = [[j for j, v in enumerate(vertical) if self._cross(h, v)] for h in horizontal]
+        match_h, match_v = self._max_matching(adj, len(vertical))
+
+        # König: desde los H libres, caminos alternantes; MIS = (H visitados) + (V no visitados)
+        visited_h, visited_v = set(), set()
+        stack = [i for i in range(len(horizontal)) if match_h[i] is None]
+        visited_h.update(stack)
+        while stack:
+            i = stack.pop()
+            for j in adj[i]:
+                if j in visited_v:
+                    continue
+                visited_v.add(j)
+                k = match_v[j]
+                if k is not None and k not in visited_h:
+                    visited_h.add(k)
+                    stack.append(k)
+
+        return [horizontal[i] for i in sorted(visited_h)] + \
+               [vertical[j] for j in range(len(vertical)) if j not in visited_v]
+
+    def _chords(self, poly, pts, axis):
+        """
+        Cuerdas entre vértices cóncavos consecutivos con la misma coordenada.
+        axis=1: misma Y (cuerdas horizontales). axis=0: misma X (verticales).
+        """
+        other = 1 - axis
+        groups = {}
+        for p in pts:
+            groups.setdefault(round(p[axis] / self.tol), []).append(p)
+
+        chords = []
+        for key in sorted(groups):
+            line = sorted(groups[key], key=lambda p: p[other])
+            for a, b in zip(line[:-1], line[1:]):
+                if abs(a[other] - b[other]) <= self.tol:
+                    continue
+                seg = LineString([a, b])
+                if poly.covers(seg) and poly.contains(seg.interpolate(0.5, normalized=True)):
+                    chords.append((a, b))
+        return chords
+
+    def _cross(self, h, v):
+        """Una cuerda H y una V se cruzan (o comparten extremo)."""
+        (hx0, hy), (hx1, _) = h
+        (vx, vy0), (_, vy1) = v
+        t = self.tol
+        return min(hx0, hx1) - t <= vx <= max(hx0, hx1) + t and min(vy0, vy1) - t <= hy <= max(vy0, vy1) + t
+
+    def _max_matching(self, adj, n_right):
+        """Matching máximo bipartito por caminos aumentantes (Kuhn)."""
+        match_h = [None] * len(adj)
+        match_v = [None] * n_right
+
+        def augment(i, seen):
+            for j in adj[i]:
+                if j in seen:
+                    continue
+                seen.add(j)
+                if match_v[j] is None or augment(match_v[j], seen):
+                    match_h[i] = j
+                    match_v[j] = i
+                    return True
+            return False
+
+        for i in range(len(adj)):
+            augment(i, set())
+        return match_h, match_v
+
+    # ---------- extensiones y caras ----------
+    def _shortest_extension(self, poly, v, dirs, cuts):
+        """Prolonga la arista más corta posible desde v hasta el primer borde o corte."""
+        minx, miny, maxx, maxy = poly.bounds
+        reach = (maxx - minx) + (maxy - miny) + 1.0
+        obstacles = MultiLineString(
+            [list(r.coords) for r in [poly.exterior] + list(poly.interiors)] + [list(c.coords) for c in cuts]
+        )
+        best = None
+        for dx, dy in dirs:
+            ray = LineString([v, (v[0] + dx * reach, v[1] + dy * reach)])
+            hit = self._first_hit(ray, obstacles, v)
+            if hit is None:
+                continue
+            length = math.hypot(hit[0] - v[0], hit[1] - v[1])
+            if best is None or length < best[0]:
+                best = (length, LineString([v, hit]))
+        return best[1] if best else None
+
+    def _first_hit(self, ray, obstacles, origin):
+        inter = ray.intersection(obstacles)
+        if inter.is_empty:
+            return None
+        geoms = getattr(inter, 'geoms', [inter])
+        pts = []
+        for g in geoms:
+            pts.extend(g.coords)
+        pts = [p for p in pts if math.hypot(p[0] - origin[0], p[1] - origin[1]) > self.tol]
+        if not pts:
+            return None
+        return min(pts, key=lambda p: math.hypot(p[0] - origin[0], p[1] - origin[1]))
+
+    def _faces(self, poly, cuts):
+        """Poligoniza contorno + cortes y devuelve las caras interiores como rectángulos."""
+        lines = unary_union([poly.boundary] + cuts)
+        rects = []
+        for face in polygonize(lines):
+            if not poly.contains(face.representative_point()):
+                continue # Cara correspondiente a un hueco
+            env = face.envelope
+            if abs(env.area - face.area) > self.tol * max(1.0, env.area):
+                return None # No quedó rectangular: el llamador usa el pipeline de tiras
+            rects.append(box(*env.bounds))
+        return rects
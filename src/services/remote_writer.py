@@ -0,0 +1,372 @@
+import os
+import hmac
+import json
+import zlib
+import socket
+import struct
+import logging
+import argparse
+import threading
+from collections import deque
+from services.etabs_tables import ret_code
+
+logger = logging.getLogger("Revit2Etabs.Service.RemoteWriter")
+
+# Encabezado de cada trama: flags (1 byte) + largo del cuerpo (4 bytes, big endian)
+_HEADER = struct.Struct(">BI")
+_COMPRESSED = 0x01
+
+# Raíces del SapModel que el agente acepta reproducir (sin "File": nada de abrir/guardar archivos)
+ALLOWED_ROOTS = {"DatabaseTables", "Story", "View", "FrameObj", "AreaObj", "PointObj",
+                 "SetPresentUnits", "GetModelFilename", "InitializeNewModel"}
+
+# Variable de entorno con el token compartido entre el cliente y el agente
+TOKEN_ENV = "REVIT2ETABS_AGENT_TOKEN"
+
+# Segundos que el agente espera el saludo con el token antes de cortar la conexión
+HANDSHAKE_TIMEOUT = 10.0
+
+# Tamaño máximo de una trama (comprimida o no) y del mensaje descomprimido
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+# Tamaño máximo del saludo, que llega antes de autenticar (siempre sin comprimir)
+MAX_HELLO_BYTES = 4096
+
+# Métodos cuyo resultado necesita el llamador: se envían en el acto y se espera la respuesta.
+# ApplyEditedTables y Delete son sincrónicos: el llamador registra el trabajo hecho según su
+# resultado real (errores fatales de importación, objetos eliminados).
+REPLY_METHODS = {"GetModelFilename", "DatabaseTables.GetTableForDisplayArray", "DatabaseTables.ApplyEditedTables",
+                 "FrameObj.Delete", "AreaObj.Delete", "PointObj.Delete"}
+
+# Métodos que cierran un lote (después de ellos conviene que ETABS confirme)
+FLUSH_METHODS = {"View.RefreshView", "Story.SetStories"}
+
+
+def _to_json(value):
+    """Tipos de numpy u otros iterables a tipos JSON."""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def send_message(sock, message, compress=True, min_compress=1024, level=6):
+    body = json.dumps(message, default=_to_json, separators=(",", ":")).encode("utf-8")
+    flags = 0
+    if compress and len(body) >= min_compress:
+        body = zlib.compress(body, level)
+        flags |= _COMPRESSED
+    sock.sendall(_HEADER.pack(flags, len(body)) + body)
+    return len(body)
+
+
+def recv_message(sock, max_length=MAX_MESSAGE_BYTES, allow_compressed=True):
+    """
+    Lee una trama completa; devuelve None si la conexión se cerró.
+    Una trama más larga que max_length (antes o después de descomprimir), o
+    comprimida si allow_compressed=False, se rechaza con ValueError sin leerla.
+    """
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    flags, length = _HEADER.unpack(header)
+    if length > max_length:
+        raise ValueError(f"Trama de {length} bytes (máximo {max_length}).")
+    if flags & _COMPRESSED and not allow_compressed:
+        raise ValueError("Trama comprimida no permitida.")
+    body = _recv_exact(sock, length)
+    if body is None:
+        raise ConnectionError("Conexión cerrada a mitad de un mensaje.")
+    if flags & _COMPRESSED:
+        inflater = zlib.decompressobj()
+        try:
+            body = inflater.decompress(body, max_length)
+        except zlib.error as e:
+            raise ValueError(f"Trama comprimida inválida: {e}") from e
+        if inflater.unconsumed_tail or not inflater.eof:
+            raise ValueError(f"Trama comprimida inválida o de más de {max_length} bytes.")
+    return json.loads(body.decode("utf-8"))
+
+
+def _recv_exact(sock, n):
+    chunks = []
+    while n:
+        data = sock.recv(min(n, 1 << 20))
+        if not data:
+            return None
+        chunks.append(data)
+        n -= len(data)
+    return b"".join(chunks)
+
+
+class RemoteEtabsClient:
+    """
+    Lado Linux: envía lotes de comandos al agente y procesa sus acuses.
+    Al conectar se presenta con el token compartido; si el agente lo rechaza
+    se lanza ConnectionError. Mantiene hasta `window` lotes sin confirmar en
+    vuelo; un acuse con error se relanza como RuntimeError en la siguiente
+    operación y deja la conexión inutilizable (el agente descarta los lotes
+    que ya estaban en vuelo).
+    """
+
+    def __init__(self, host, port, token, compress=True, window=4, timeout=60.0):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.compress = compress
+        self.window = window
+        self.stats = {"lotes": 0, "comandos": 0, "bytes": 0}
+        self._next_id = 1
+        self._in_flight = deque()
+        self._failed = None # Error del primer lote rechazado
+        self._handshake(token)
+
+    def _handshake(self, token):
+        send_message(self.sock, {"type": "hello", "token": token}, False)
+        reply = recv_message(self.sock)
+        if not reply or not reply.get("ok"):
+            self.sock.close()
+            error = reply.get("error") if reply else "conexión cerrada"
+            raise ConnectionError(f"El agente de ETABS rechazó la conexión: {error}")
+
+    def send_batch(self, commands, reply=False):
+        """Envía un lote; si reply=True espera su acuse y devuelve los resultados."""
+        if self._failed:
+            raise RuntimeError(f"La conexión con el agente de ETABS quedó inutilizable: {self._failed}")
+        while len(self._in_flight) >= self.window:
+            self._wait_ack()
+        batch_id = self._next_id
+        self._next_id += 1
+        size = send_message(self.sock, {"type": "batch", "id": batch_id, "commands": commands}, self.compress)
+        self._in_flight.append(batch_id)
+        self.stats["lotes"] += 1
+        self.stats["comandos"] += len(commands)
+        self.stats["bytes"] += size
+        if reply:
+            return self.wait_all()
+        return None
+
+    def wait_all(self):
+        """Espera todos los acuses pendientes; devuelve los resultados del último."""
+        ack = None
+        while self._in_flight:
+            ack = self._wait_ack()
+        return ack.get("results", []) if ack else []
+
+    def _wait_ack(self):
+        ack = recv_message(self.sock)
+        if ack is None:
+            raise ConnectionError("El agente de ETABS cerró la conexión.")
+        expected = self._in_flight.popleft()
+        if ack.get("id") != expected:
+            raise RuntimeError(f"Acuse fuera de orden: se esperaba {expected} y llegó {ack.get('id')}.")
+        if not ack.get("ok"):
+            self._in_flight.clear()
+            self._failed = f"El agente de ETABS rechazó el lote {expected}: {ack.get('error')}"
+            raise RuntimeError(self._failed)
+        return ack
+
+    def close(self):
+        try:
+            if self._in_flight:
+                self.wait_all()
+            send_message(self.sock, {"type": "close"}, False)
+        finally:
+            self.sock.close()
+
+
+class _RemoteComponent:
+    def __init__(self, proxy, path):
+        self._proxy = proxy
+        self._path = path
+
+    def __getattr__(self, name):
+        return _RemoteMethod(self._proxy, f"{self._path}.{name}")
+
+
+class _RemoteMethod:
+    def __init__(self, proxy, path):
+        self._proxy = proxy
+        self._path = path
+
+    def __call__(self, *args):
+        return self._proxy._call(self._path, args)
+
+
+class RemoteSapModel:
+    """
+    Serializador de comandos: se usa en lugar del SapModel real (por ejemplo
+    EtabsWriter.SapModel = RemoteSapModel(cliente)) y convierte cada llamada en
+    un comando de un lote. Los lotes se envían al cerrar una edición de tablas,
+    al refrescar la vista o al superar batch_size comandos. Las llamadas
+    devuelven código 0 de inmediato; los errores reales de ETABS llegan en el
+    acuse del lote y se relanzan como RuntimeError.
+    """
+
+    def __init__(self, client, batch_size=64):
+        self._client = client
+        self._batch_size = batch_size
+        self._pending = []
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in ("SetPresentUnits", "GetModelFilename", "InitializeNewModel"):
+            return _RemoteMethod(self, name)
+        return _RemoteComponent(self, name)
+
+    def _call(self, path, args):
+        if path in REPLY_METHODS:
+            self._pending.append([path, list(args), True])
+            results = self.flush(reply=True)
+            return results[-1] if results else None
+
+        self._pending.append([path, list(args), False])
+        if path in FLUSH_METHODS or len(self._pending) >= self._batch_size:
+            self.flush()
+        return 0
+
+    def flush(self, reply=False):
+        """Envía los comandos pendientes como un lote."""
+        if not self._pending:
+            return self._client.wait_all() if reply else []
+        commands, self._pending = self._pending, []
+        return self._client.send_batch(commands, reply=reply) or []
+
+    def sync(self):
+        """Envía lo pendiente y espera la confirmación de todos los lotes."""
+        self.flush()
+        return self._client.wait_all()
+
+
+class EtabsAgent:
+    """
+    Agente liviano para la estación con ETABS: recibe lotes por TCP, los
+    reproduce contra el SapModel (solo raíces en ALLOWED_ROOTS) y responde un
+    acuse por lote. Un comando con código de retorno distinto de 0 detiene el
+    lote y se informa en el acuse; los lotes siguientes de esa conexión se
+    descartan sin reproducir (el cliente los envió sin saber del error). Los
+    comandos con respuesta devuelven su resultado tal cual y el llamador revisa
+    el código. Cada conexión debe presentarse primero con
+    el token compartido; si no, se cierra sin reproducir nada.
+    """
+
+    def __init__(self, sap_model, token, host="127.0.0.1", port=0, compress=True):
+        if not token:
+            raise ValueError("El agente de ETABS requiere un token compartido.")
+        self.SapModel = sap_model
+        self.token = token
+        self.compress = compress
+        self.server = socket.create_server((host, port))
+        self.address = self.server.getsockname()
+        self.batches = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Atiende en un hilo (útil para pruebas con un SapModel falso)."""
+        self._thread = threading.Thread(target=self.serve_forever, name="EtabsAgent", daemon=True)
+        self._thread.start()
+        return self.address
+
+    def serve_forever(self):
+        logger.info(f"Agente de ETABS escuchando en {self.address[0]}:{self.address[1]}")
+        self.server.settimeout(0.2)
+        while not self._stop.is_set():
+            try:
+                conn, peer = self.server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            with conn:
+                # Un cliente que falla (trama inválida, corte a mitad de un mensaje) no detiene al agente
+                try:
+                    conn.settimeout(HANDSHAKE_TIMEOUT)
+                    if not self._authenticate(conn, peer):
+                        continue
+                    conn.settimeout(None)
+                    self._handle(conn)
+                except Exception as e:
+                    logger.warning(f"Conexión desde {peer[0]}:{peer[1]} terminada por error: {e}")
+
+    def _authenticate(self, conn, peer):
+        try:
+            hello = recv_message(conn, MAX_HELLO_BYTES, allow_compressed=False)
+        except (OSError, ValueError):
+            hello = None
+        token = hello.get("token") if isinstance(hello, dict) and hello.get("type") == "hello" else None
+        if not isinstance(token, str) or not hmac.compare_digest(token.encode("utf-8"), self.token.encode("utf-8")):
+            logger.warning(f"Conexión rechazada desde {peer[0]}:{peer[1]}: token inválido.")
+            try:
+                send_message(conn, {"type": "welcome", "ok": False, "error": "token inválido"}, False)
+            except OSError:
+                pass
+            return False
+        send_message(conn, {"type": "welcome", "ok": True}, False)
+        return True
+
+    def _handle(self, conn):
+        failed = None
+        while True:
+            message = recv_message(conn)
+            if message is None or message.get("type") == "close":
+                return
+            if failed is not None:
+                ack = {"type": "ack", "id": message.get("id"), "ok": False,
+                       "error": f"descartado: el lote {failed} falló antes"}
+            else:
+                ack = self._replay(message)
+                if not ack["ok"]:
+                    failed = message.get("id")
+            send_message(conn, ack, self.compress)
+
+    def _replay(self, message):
+        results = []
+        for i, (path, args, reply) in enumerate(message.get("commands", [])):
+            try:
+                ret = self._resolve(path)(*args)
+            except Exception as e:
+                return {"type": "ack", "id": message.get("id"), "ok": False, "error": f"{path} (comando {i}): {e}"}
+            if reply:
+                results.append(ret)
+            elif ret_code(ret) != 0:
+                return {"type": "ack", "id": message.get("id"), "ok": False,
+                        "error": f"{path} (comando {i}) devolvió {ret_code(ret)}"}
+        self.batches += 1
+        return {"type": "ack", "id": message.get("id"), "ok": True, "results": results}
+
+    def _resolve(self, path):
+        parts = path.split(".")
+        if parts[0] not in ALLOWED_ROOTS or any(p.startswith("_") for p in parts):
+            raise PermissionError(f"Comando no permitido: {path}")
+        obj = self.SapModel
+        for p in parts:
+            obj = getattr(obj, p)
+        return obj
+
+    def stop(self):
+        self._stop.set()
+        self.server.close()
+        if self._thread:
+            self._thread.join()
+
+
+def main():
+    """Punto de entrada del agente en la estación con ETABS (ETABS abierto)."""
+    from services.etabs_writer import EtabsWriter
+
+    parser = argparse.ArgumentParser(description="Agente Revit2Etabs para una instancia activa de ETABS")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Interfaz de escucha (use la IP de la red interna solo si el cliente está en otra máquina)")
+    parser.add_argument("--port", type=int, default=5999)
+    parser.add_argument("--token", default=os.environ.get(TOKEN_ENV),
+                        help=f"Token compartido con el cliente (por defecto la variable {TOKEN_ENV})")
+    args = parser.parse_args()
+    if not args.token:
+        parser.error(f"Falta el token compartido: use --token o defina {TOKEN_ENV}.")
+
+    sap_model = EtabsWriter(None).connect_active_etabs()
+    EtabsAgent(sap_model, args.token, args.host, args.port).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
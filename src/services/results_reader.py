@@ -0,0 +1,157 @@
+import logging
+import numpy as np
+from services.etabs_tables import ret_code
+
+logger = logging.getLogger("Revit2Etabs.Service.ResultsReader")
+
+# Tablas de resultados de ETABS: (TableKey, columna con el nombre único del objeto)
+JOINT_DISPLACEMENTS = ("Joint Displacements", "UniqueName")
+BEAM_FORCES = ("Element Forces - Beams", "UniqueName")
+COLUMN_FORCES = ("Element Forces - Columns", "UniqueName")
+PIER_FORCES = ("Pier Forces", "Pier")
+
+# Columnas que se convierten a float (las demás quedan como texto)
+NUMERIC_FIELDS = {"Ux", "Uy", "Uz", "Rx", "Ry", "Rz", "Station", "ElemStation", "P", "V2", "V3", "T", "M2", "M3",
+                  "StepNum"}
+
+
+def _objects(values):
+    """Arreglo de objetos 1D (sin que NumPy intente desarmar los elementos)."""
+    values = list(values)
+    out = np.empty(len(values), dtype=object)
+    out[:] = values
+    return out
+
+
+def lookup(keys, queries):
+    """
+    Búsqueda vectorizada: para cada query devuelve el índice i con keys[i] == query
+    (-1 si no existe), con argsort + searchsorted en vez de diccionarios.
+    """
+    keys = np.asarray(keys, dtype=str)
+    queries = np.asarray(queries, dtype=str)
+    if keys.size == 0:
+        return np.full(len(queries), -1, dtype=int)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    pos = np.clip(np.searchsorted(sorted_keys, queries), 0, len(keys) - 1)
+    return np.where(sorted_keys[pos] == queries, order[pos], -1)
+
+
+def _take(values, idx):
+    """values[idx] con None donde idx == -1."""
+    out = values[np.maximum(idx, 0)] if len(values) else np.empty(len(idx), dtype=object)
+    out = out.astype(object)
+    out[idx < 0] = None
+    return out
+
+
+class EtabsResultsReader:
+    """
+    Lectura masiva de resultados de análisis con
+    DatabaseTables.GetTableForDisplayArray (una llamada por tabla). Cada tabla
+    se devuelve como dict campo -> arreglo de NumPy, más las columnas de unión
+    con el modelo: "element" (objeto del Model) y "revit_id".
+
+    Los nombres de los objetos en ETABS son los que usa EtabsWriter: puntos por
+    Node.id, frames B{k}/C{k}, áreas W{k}/S{k} y piers con el revit_id del muro.
+    Para exportaciones en modo "sync" se puede pasar names = {nombre: elemento}.
+    """
+
+    def __init__(self, model, sap_model, names=None):
+        self.model = model
+        self.SapModel = sap_model
+        if names is None:
+            names = {}
+            for prefix, elements in (("B", model.beams), ("C", model.columns), ("W", model.walls), ("S", model.slabs)):
+                names.update((f"{prefix}{k + 1}", e) for k, e in enumerate(elements))
+        self._names = np.array(list(names.keys()), dtype=str)
+        self._elements = _objects(names.values())
+        self._revit_ids = _objects(e.revit_id for e in names.values())
+
+    def read_table(self, table_key, group="All"):
+        """Lee una tabla completa. Devuelve (campos, matriz de strings n_filas x n_campos)."""
+        ret = self.SapModel.DatabaseTables.GetTableForDisplayArray(table_key, [], group, 0, [], 0, [])
+        if ret_code(ret) != 0:
+            raise RuntimeError(f"Error al leer la tabla {table_key} (ret={ret_code(ret)}).")
+        # [FieldKeyList, TableVersion, FieldsKeysIncluded, NumberRecords, TableData, ret]
+        fields, n_records, data = list(ret[2]), int(ret[3]), ret[4]
+        matrix = np.asarray(data, dtype=str).reshape(n_records, len(fields)) if n_records else \
+            np.empty((0, len(fields)), dtype=str)
+        logger.info(f"Tabla {table_key}: {n_records} filas.")
+        return fields, matrix
+
+    def parse(self, fields, matrix, cases=None):
+        """Matriz de strings -> dict campo -> arreglo (numérico si corresponde), filtrando por casos."""
+        if cases is not None and "OutputCase" in fields:
+            matrix = matrix[np.isin(matrix[:, fields.index("OutputCase")], list(cases))]
+        out = {}
+        for j, name in enumerate(fields):
+            col = matrix[:, j]
+            if name in NUMERIC_FIELDS:
+                col = np.where(col == "", "nan", col).astype(float)
+            out[name] = col
+        return out
+
+    # ---------- resultados ----------
+    def joint_displacements(self, cases=None):
+        """Desplazamientos de nodos, con "node_id" y coordenadas del Model."""
+        res = self.parse(*self.read_table(JOINT_DISPLACEMENTS[0]), cases=cases)
+        nodes = list(self.model.node_manager.nodes.values())
+        ids = np.array([n.id for n in nodes], dtype=int)
+        coords = np.array([n.get_coords() for n in nodes], dtype=float).reshape(-1, 3)
+        idx = lookup(ids.astype(str), res.get("UniqueName", np.array([], dtype=str)))
+        found = idx >= 0
+        res["node"] = _take(_objects(nodes), idx)
+        res["node_id"] = np.where(found, ids[np.maximum(idx, 0)] if len(ids) else -1, -1)
+        xyz = np.where(found[:, None], coords[np.maximum(idx, 0)] if len(ids) else np.nan, np.nan)
+        res["x"], res["y"], res["z"] = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+        self._warn_unmatched(JOINT_DISPLACEMENTS[0], found)
+        return res
+
+    def frame_forces(self, cases=None):
+        """Fuerzas de vigas y columnas (una tabla por tipo), unidas a sus FrameElement."""
+        out = {}
+        for kind, (table, key) in (("beams", BEAM_FORCES), ("columns", COLUMN_FORCES)):
+            res = self.parse(*self.read_table(table), cases=cases)
+            self._join(res, res.get(key, np.array([], dtype=str)), table)
+            out[kind] = res
+        return out
+
+    def pier_forces(self, cases=None):
+        """Fuerzas de pier; cada pier corresponde a un muro Revit (etiqueta = revit_id)."""
+        res = self.parse(*self.read_table(PIER_FORCES[0]), cases=cases)
+        piers = res.get(PIER_FORCES[1], np.array([], dtype=str))
+        walls = {str(w.revit_id): w for w in self.model.walls} # Un muro representativo por pier
+        idx = lookup(list(walls.keys()), piers)
+        res["element"] = _take(_objects(walls.values()), idx)
+        res["revit_id"] = _take(_objects(w.revit_id for w in walls.values()), idx)
+        self._warn_unmatched(PIER_FORCES[0], idx >= 0)
+        return res
+
+    def _join(self, res, names, table):
+        idx = lookup(self._names, names)
+        res["element"] = _take(self._elements, idx)
+        res["revit_id"] = _take(self._revit_ids, idx)
+        self._warn_unmatched(table, idx >= 0)
+
+    def _warn_unmatched(self, table, found):
+        missing = int((~found).sum())
+        if missing:
+            logger.warning(f"Tabla {table}: {missing} filas sin objeto correspondiente en el modelo.")
+
+    # ---------- resúmenes ----------
+    def envelope_by_revit(self, res, field):
+        """
+        Máximo valor absoluto de un campo por revit_id (para devolver a Revit).
+        Devuelve dict revit_id -> valor.
+        """
+        mask = res["revit_id"] != None # noqa: E711 (comparación elemento a elemento)
+        if not mask.any():
+            return {}
+        ids = res["revit_id"][mask].astype(str)
+        values = np.abs(res[field][mask])
+        order = np.argsort(ids, kind="stable")
+        ids, values = ids[order], values[order]
+        uniq, starts = np.unique(ids, return_index=True)
+        return dict(zip(uniq.tolist(), np.fmax.reduceat(values, starts).tolist()))
@@ -177,6 +177,8 @@ class RevitLoader:
                 self.model.add_column(**params)
 
     def _parse_walls(self, walls_data):
+        # Se acumulan los muros para descomponerlos en lote (modo paralelo)
+        batch = []
         for w in walls_data:
             level_name=w['level']
             section_name=w['section']
@@ -184,16 +186,19 @@ class RevitLoader:
             if self.filter and not self.filter.is_valid(level=level_name, section=section_name,category="walls"):
                 continue
 
-            self.model.add_wall(
+            batch.append(dict(
                 revit_id=w['revit_id'],
                 exterior_pts=self._apply_unit_pos(w['location']['outline']),
                 holes_pts=self._apply_unit_pos(self._extract_openings(w['location'])),
                 section=w['section'],
                 level=w['level'],
                 height=self._apply_unit_dim(w['location'].get('height', 3.0))
-            )
+            ))
+
+        self.model.add_walls(batch)
     
     def _parse_slabs(self, slabs_data):
+        batch = []
         for s in slabs_data:
             level_name=s['level']
             section_name=s['section']
@@ -201,10 +206,12 @@ class RevitLoader:
             if self.filter and not self.filter.is_valid(level=level_name, section=section_name,category="slabs"):
                 continue
 
-            self.model.add_slab(
+            batch.append(dict(
                 revit_id=s['revit_id'],
                 exterior_pts=self._apply_unit_pos(s['location']['outline']),
                 holes_pts=self._apply_unit_pos(self._extract_openings(s['location'])),
                 section=s['section'],
                 level=s['level'],
-            )
\ No newline at end of file
+            ))
+
+        self.model.add_slabs(batch)
\ No newline at end of file
@@ -0,0 +1,160 @@
+import logging
+import numpy as np
+from domain.elements.frame import FrameElement
+from domain.elements.wall import WallElement
+from domain.elements.slab import SlabElement
+
+logger = logging.getLogger("Revit2Etabs.Service.TypicalFloor")
+
+CATEGORIES = ("beams", "columns", "walls", "slabs")
+
+
+class TypicalFloorDetector:
+    """
+    Detecta pisos típicos (geometría descompuesta idéntica dentro de la
+    tolerancia) y los trata como Master/Similar:
+      1. detect(): huella de cada piso y agrupación de pisos idénticos.
+      2. collapse(): deja en el modelo solo los pisos maestros, para que la
+         optimización geométrica y las grillas se calculen una vez por piso único.
+      3. replicate(): reconstruye los pisos similares copiando los elementos
+         (ya optimizados) de su maestro, trasladados en Z.
+    Un elemento pertenece al piso ETABS cuyo techo coincide con su Z máxima
+    (muros, columnas y losas del piso i terminan en la elevación i).
+    """
+
+    def __init__(self, model, tolerance=0.01):
+        """tolerance: Tamaño de cuantización de coordenadas para la huella (m)."""
+        self.model = model
+        self.tolerance = tolerance
+        self.groups = []     # [[story_master, story_similar, ...], ...]
+        # (categoría, revit_id maestro, índice del piso maestro) -> {índice del piso similar: (dz, revit_id, level)}
+        # Se usa una llave estable y no id(elemento): la optimización puede reemplazar los objetos.
+        self._replicas = {}
+        self._collapsed = False
+
+    def _element_story_index(self, elements):
+        """Índice de piso (en story_manager.stories) de cada elemento; -1 si no cae en ninguno."""
+        stories = self.model.story_manager.stories
+        if not elements or len(stories) < 2:
+            return np.full(len(elements), -1)
+        elevations = np.array([s.elevation for s in stories])
+        zmax = np.array([max(n.z for n in self._nodes(e)) for e in elements])
+        idx = np.searchsorted(elevations, zmax - self.tolerance, side='left')
+        idx[(idx == 0) | (idx >= len(stories))] = -1
+        return idx
+
+    def _nodes(self, elem):
+        if isinstance(elem, FrameElement):
+            return [elem.start_node, elem.end_node]
+        return elem.nodes
+
+    def _signature(self, category, elem, z_ref):
+        q = self.tolerance
+        coords = sorted((round(n.x / q), round(n.y / q), round((n.z - z_ref) / q)) for n in self._nodes(elem))
+        return (category, str(elem.section), tuple(coords))
+
+    def detect(self):
+        """
+        Calcula la huella de cada piso y agrupa los idénticos. Marca en cada
+        Story is_master / similar_to. Devuelve la lista de grupos.
+        """
+        stories = self.model.story_manager.stories
+        per_story = {i: [] for i in range(1, len(stories))}
+
+        for category in CATEGORIES:
+            elements = getattr(self.model, category)
+            for elem, idx in zip(elements, self._element_story_index(elements)):
+                if idx < 0:
+                    continue
+                sig = self._signature(category, elem, stories[idx].elevation)
+                per_story[idx].append((sig, category, elem))
+
+        by_print = {}
+        for idx, items in per_story.items():
+            if not items:
+                continue
+            items.sort(key=lambda t: t[0])
+            height = round(self.model.story_manager.get_story_height(stories[idx].id) / self.tolerance)
+            # La huella completa es la llave: dos pisos se agrupan solo si sus firmas son iguales
+            fingerprint = (height, tuple(t[0] for t in items))
+            by_print.setdefault(fingerprint, []).append((idx, items))
+
+        for story in stories:
+            story.is_master = False
+            story.similar_to = None
+
+        self.groups = []
+        self._replicas = {}
+        for members in by_print.values():
+            if len(members) < 2:
+                continue
+            members.sort(key=lambda m: m[0])
+            master_idx, master_items = members[0]
+            master = stories[master_idx]
+            master.is_master = True
+            group = [master]
+            for idx, items in members[1:]:
+                story = stories[idx]
+                story.similar_to = master
+                group.append(story)
+                dz = story.elevation - master.elevation
+                # Correspondencia por orden de firma; los sub-elementos de un mismo elemento
+                # Revit (muros/losas descompuestos) comparten la llave
+                for (_, category, m_elem), (_, _, s_elem) in zip(master_items, items):
+                    key = (category, m_elem.revit_id, master_idx)
+                    self._replicas.setdefault(key, {}).setdefault(idx, (dz, s_elem.revit_id, s_elem.level))
+            self.groups.append(group)
+
+        typical = sum(len(g) - 1 for g in self.groups)
+        logger.info(f"Pisos típicos: {len(self.groups)} grupos, {typical} pisos similares a un maestro.")
+        return self.groups
+
+    def collapse(self):
+        """Elimina del modelo los elementos de los pisos similares (se reconstruyen en replicate)."""
+        similar = {id(s) for g in self.groups for s in g[1:]}
+        if not similar:
+            return
+        stories = self.model.story_manager.stories
+        removed = 0
+        for category in CATEGORIES:
+            elements = getattr(self.model, category)
+            idx = self._element_story_index(elements)
+            keep = [e for e, i in zip(elements, idx) if i < 0 or id(stories[i]) not in similar]
+            removed += len(elements) - len(keep)
+            setattr(self.model, category, keep)
+
+        self._collapsed = True
+        logger.info(f"Pisos típicos: {removed} elementos de pisos similares se reconstruirán desde su maestro.")
+
+    def replicate(self):
+        """Copia los elementos de cada piso maestro a sus pisos similares."""
+        if not self._collapsed:
+            return
+        nm = self.model.node_manager
+        created = 0
+        for category in CATEGORIES:
+            elements = list(getattr(self.model, category))
+            for elem, idx in zip(elements, self._element_story_index(elements)):
+                targets = self._replicas.get((category, elem.revit_id, int(idx)), {})
+                for _, (dz, revit_id, level) in sorted(targets.items()):
+                    self._copy(category, elem, dz, revit_id, level, nm)
+                    created += 1
+
+        self._collapsed = False
+        logger.info(f"Pisos típicos: {created} elementos replicados en pisos similares.")
+
+    def _copy(self, category, elem, dz, revit_id, level, nm):
+        if category in ("beams", "columns"):
+            p1 = (elem.start_node.x, elem.start_node.y, elem.start_node.z + dz)
+            p2 = (elem.end_node.x, elem.end_node.y, elem.end_node.z + dz)
+            add = self.model.add_beam if category == "beams" else self.model.add_column
+            return add(revit_id, elem.section, level, p1, p2)
+
+        nodes = [nm.get_or_create_node(n.x, n.y, n.z + dz) for n in elem.nodes]
+        if category == "walls":
+            new = WallElement(revit_id, elem.section, level, nodes)
+            self.model._register_wall_elements([new])
+        else:
+            new = SlabElement(revit_id, elem.section, level, nodes)
+            self.model.slabs.append(new)
+        return new
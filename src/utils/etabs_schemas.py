@@ -0,0 +1,59 @@
+"""
+Tablas interactivas de ETABS que escribe el proyecto: (TableKey, campos).
+Los servicios importan de aquí las tablas que escriben y el SapModel falso
+valida los payloads contra TABLE_SCHEMAS; una tabla nueva se agrega solo aquí.
+"""
+
+# Objetos (conectividad) y sus asignaciones
+POINT_TABLE = ("Point Object Connectivity", ["UniqueName", "X", "Y", "Z"])
+BEAM_TABLE = ("Beam Object Connectivity", ["UniqueName", "UniquePtI", "UniquePtJ"])
+COLUMN_TABLE = ("Column Object Connectivity", ["UniqueName", "UniquePtI", "UniquePtJ"])
+WALL_TABLE = ("Wall Object Connectivity", ["UniqueName", "UniquePt1", "UniquePt2", "UniquePt3", "UniquePt4"])
+FLOOR_TABLE = ("Floor Object Connectivity", ["UniqueName", "UniquePt1", "UniquePt2", "UniquePt3", "UniquePt4"])
+FRAME_SECTION_TABLE = ("Frame Assignments - Section Properties", ["UniqueName", "Section Property"])
+AREA_SECTION_TABLE = ("Area Assignments - Section Properties", ["UniqueName", "Section Property"])
+PIER_DEFINITION_TABLE = ("Pier Label Definitions", ["Name"])
+PIER_ASSIGN_TABLE = ("Area Assignments - Pier Labels", ["UniqueName", "Pier Name"])
+
+# Cargas
+LOAD_PATTERN_TABLE = ("Load Pattern Definitions", ["Name", "Type", "SelfWtMult"])
+AREA_UNIFORM_LOAD_TABLE = ("Area Load Assignments - Uniform", ["UniqueName", "LoadPattern", "Dir", "Load"])
+FRAME_DISTRIBUTED_LOAD_TABLE = ("Frame Load Assignments - Distributed",
+                                ["UniqueName", "LoadPattern", "Type", "Dir", "DistType", "RelDistA", "RelDistB",
+                                 "FA", "FB"])
+
+# Diafragmas
+DIAPHRAGM_TABLE = ("Diaphragm Definitions", ["Name", "Rigidity"])
+AREA_DIAPHRAGM_TABLE = ("Area Assignments - Diaphragms", ["UniqueName", "Diaphragm"])
+JOINT_DIAPHRAGM_TABLE = ("Joint Assignments - Diaphragms", ["UniqueName", "Diaphragm"])
+
+# Materiales y secciones
+MATERIAL_GENERAL_TABLE = ("Material Properties - General", ["Material", "Type", "SymType"])
+MATERIAL_MECHANICAL_TABLE = ("Material Properties - Basic Mechanical Properties", ["Material", "UnitWeight", "E1", "U12"])
+MATERIAL_CONCRETE_TABLE = ("Material Properties - Concrete Data", ["Material", "Fc"])
+MATERIAL_STEEL_TABLE = ("Material Properties - Steel Data", ["Material", "Fy"])
+FRAME_RECTANGULAR_TABLE = ("Frame Section Property Definitions - Concrete Rectangular",
+                           ["Name", "Material", "Depth", "Width"])
+WALL_PROPERTY_TABLE = ("Area Section Property Definitions - Wall", ["Name", "Material", "ModelingType", "Thickness"])
+SLAB_PROPERTY_TABLE = ("Area Section Property Definitions - Slab",
+                       ["Name", "Material", "ModelingType", "SlabType", "Thickness"])
+
+# Grillas (las escribe GridManager)
+GRID_GENERAL_TABLE = ("Grid Definitions - General", ['Tower', 'Name', 'Type', 'Ux', 'Uy', 'Rz', 'StoryRange',
+                                                     'TopStory', 'BotStory', 'BubbleSize', 'Color', 'GUID'])
+GRID_LINES_TABLE = ("Grid Definitions - Grid Lines", ['Name', 'LineType', 'ID', 'Ordinate', 'Angle', 'X1', 'Y1',
+                                                      'X2', 'Y2', 'BubbleLoc', 'Visible'])
+
+# Campos válidos por tabla: todas las tuplas (TableKey, campos) definidas arriba
+TABLE_SCHEMAS = {value[0]: list(value[1]) for name, value in list(globals().items())
+                 if name.endswith("_TABLE")}
+
+FRAME_TABLES = {BEAM_TABLE[0], COLUMN_TABLE[0]}
+AREA_TABLES = {WALL_TABLE[0], FLOOR_TABLE[0]}
+
+
+def ret_code(ret):
+    """Código de retorno de una llamada COM (comtypes devuelve tuplas con el código al final)."""
+    if isinstance(ret, (list, tuple)):
+        return ret[-1] if ret else 0
+    return ret
@@ -0,0 +1,331 @@
+import time
+import json
+import logging
+import numpy as np
+from collections import Counter, namedtuple
+from utils.etabs_schemas import TABLE_SCHEMAS, POINT_TABLE, FRAME_TABLES, AREA_TABLES, ret_code
+
+logger = logging.getLogger("Revit2Etabs.Service.FakeSapModel")
+
+CallRecord = namedtuple("CallRecord", ["method", "args", "items", "latency", "ret"])
+
+
+class LatencyModel:
+    """
+    Tiempo simulado de una llamada COM: costo fijo por llamada + costo por ítem
+    (filas de tabla, puntos de un área, pisos...). Se puede ajustar por método
+    con overrides = {"DatabaseTables.ApplyEditedTables": (por_llamada, por_item)}.
+    """
+
+    def __init__(self, per_call=0.002, per_item=0.00002, overrides=None):
+        self.per_call = per_call
+        self.per_item = per_item
+        self.overrides = overrides or {}
+
+    def cost(self, method, items):
+        per_call, per_item = self.overrides.get(method, (self.per_call, self.per_item))
+        return per_call + per_item * items
+
+    @classmethod
+    def calibrate(cls, samples, per_call=0.002, per_item=0.00002):
+        """
+        Ajusta un perfil a tiempos medidos contra un ETABS real.
+        samples: [(método, ítems, segundos), ...]. Por método se ajusta
+        segundos = por_llamada + por_ítem * ítems con mínimos cuadrados; si todas
+        las muestras tienen la misma cantidad de ítems se conserva per_item.
+        """
+        by_method = {}
+        for method, items, seconds in samples:
+            by_method.setdefault(method, []).append((float(items), float(seconds)))
+
+        overrides = {}
+        for method, values in by_method.items():
+            items, seconds = np.array(values).T
+            if len(np.unique(items)) > 1:
+                A = np.column_stack([np.ones_like(items), items])
+                (a, b), *_ = np.linalg.lstsq(A, seconds, rcond=None)
+                overrides[method] = (max(float(a), 0.0), max(float(b), 0.0))
+            else:
+                overrides[method] = (max(float(np.mean(seconds - per_item * items)), 0.0), per_item)
+        return cls(per_call, per_item, overrides)
+
+    @classmethod
+    def from_file(cls, path):
+        """Lee un perfil JSON: {"per_call", "per_item", "overrides"} o {"samples": [[método, ítems, segundos], ...]}."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if "samples" in data:
+            return cls.calibrate(data["samples"], data.get("per_call", 0.002), data.get("per_item", 0.00002))
+        overrides = {k: tuple(v) for k, v in data.get("overrides", {}).items()}
+        return cls(data.get("per_call", 0.002), data.get("per_item", 0.00002), overrides)
+
+
+class _Component:
+    """Sub-objeto de SapModel (FrameObj, AreaObj, ...): delega el registro al modelo falso."""
+
+    def __init__(self, sap, prefix):
+        self._sap = sap
+        self._prefix = prefix
+
+    def _record(self, name, args, items, ret):
+        return self._sap._record(f"{self._prefix}.{name}", args, items, ret)
+
+
+class _PointObj(_Component):
+    def AddCartesian(self, x, y, z, name="", user_name="", csys="Global", merge_off=False, merge_number=0):
+        label = user_name or f"P{self._sap._next_name('point')}"
+        ret = 0
+        if self._sap.validate and label in self._sap.points:
+            ret = self._sap._error(f"PointObj.AddCartesian: el punto {label} ya existe.")
+        else:
+            self._sap.points[label] = (x, y, z)
+        return self._record("AddCartesian", (x, y, z, name, user_name, csys, merge_off), 1, [label, ret])
+
+
+class _FrameObj(_Component):
+    def AddByCoord(self, xi, yi, zi, xj, yj, zj, name="", prop_name="Default", user_name="", csys="Global"):
+        label = user_name or f"F{self._sap._next_name('frame')}"
+        self._sap.frames[label] = ((xi, yi, zi), (xj, yj, zj), prop_name)
+        return self._record("AddByCoord", (xi, yi, zi, xj, yj, zj, name, prop_name, user_name), 1, [label, 0])
+
+    def AddByPoint(self, point_i, point_j, name="", prop_name="Default", user_name=""):
+        ret = self._sap._check_points([point_i, point_j], "FrameObj.AddByPoint")
+        label = user_name or f"F{self._sap._next_name('frame')}"
+        if ret == 0:
+            self._sap.frames[label] = (point_i, point_j, prop_name)
+        return self._record("AddByPoint", (point_i, point_j, name, prop_name, user_name), 1, [label, ret])
+
+    def Delete(self, name, item_type=0):
+        ret = 0 if self._sap.frames.pop(name, None) is not None else 1
+        return self._record("Delete", (name, item_type), 1, ret)
+
+
+class _AreaObj(_Component):
+    def AddByCoord(self, n, x, y, z, name="", prop_name="Default", user_name="", csys="Global"):
+        ret = 0
+        if self._sap.validate and not (len(x) == len(y) == len(z) == n):
+            ret = self._sap._error(f"AreaObj.AddByCoord: {n} puntos declarados, coordenadas {len(x)}/{len(y)}/{len(z)}.")
+        label = user_name or f"A{self._sap._next_name('area')}"
+        if ret == 0:
+            self._sap.areas[label] = (list(zip(x, y, z)), prop_name)
+        return self._record("AddByCoord", (n, x, y, z, name, prop_name, user_name), n, [x, y, z, label, ret])
+
+    def AddByPoint(self, n, points, name="", prop_name="Default", user_name=""):
+        ret = self._sap._check_points(points, "AreaObj.AddByPoint")
+        if ret == 0 and self._sap.validate and len(points) != n:
+            ret = self._sap._error(f"AreaObj.AddByPoint: {n} puntos declarados, {len(points)} recibidos.")
+        label = user_name or f"A{self._sap._next_name('area')}"
+        if ret == 0:
+            self._sap.areas[label] = (list(points), prop_name)
+        return self._record("AddByPoint", (n, points, name, prop_name, user_name), n, [points, label, ret])
+
+    def Delete(self, name, item_type=0):
+        ret = 0 if self._sap.areas.pop(name, None) is not None else 1
+        return self._record("Delete", (name, item_type), 1, ret)
+
+
+class _Story(_Component):
+    def SetStories(self, names, elevations, heights, is_master, similar_to, splice_above, splice_height):
+        n = len(names)
+        ret = 0
+        if self._sap.validate:
+            others = [heights, is_master, similar_to, splice_above, splice_height]
+            if any(len(a) != n for a in others) or len(elevations) not in (n, n + 1):
+                ret = self._sap._error(f"Story.SetStories: largos inconsistentes para {n} pisos.")
+            known = set(names) | {"None", "Base"}
+            if any(s not in known for s in similar_to):
+                ret = self._sap._error("Story.SetStories: SimilarToStory referencia un piso inexistente.")
+        if ret == 0:
+            self._sap.stories = list(zip(names, heights, is_master, similar_to))
+        # Story.SetStories devuelve solo el código (ver StoryManager.to_etabs_commands)
+        return self._record("SetStories", (names, elevations, heights, is_master, similar_to, splice_above,
+                                           splice_height), n, ret)
+
+
+class _DatabaseTables(_Component):
+    def __init__(self, sap, prefix):
+        super().__init__(sap, prefix)
+        self.tables = {}   # TableKey -> lista de filas (dict campo -> valor) ya aplicadas
+        self._pending = {} # Ediciones pendientes de ApplyEditedTables
+        self.display = {}  # TableKey -> (campos, datos planos) para GetTableForDisplayArray
+
+    def load_display_table(self, table_key, fields, table_data):
+        """Carga una tabla de resultados grabada (por ejemplo, exportada desde ETABS)."""
+        self.display[table_key] = (list(fields), list(table_data))
+
+    def GetTableForDisplayArray(self, table_key, field_key_list, group_name, table_version, fields_included,
+                                n_records, table_data):
+        if table_key not in self.display:
+            ret = self._sap._error(f"GetTableForDisplayArray: la tabla {table_key} no tiene datos.")
+            return self._record("GetTableForDisplayArray", (table_key, group_name), 0,
+                                [field_key_list, table_version, [], 0, [], ret])
+        fields, data = self.display[table_key]
+        n = len(data) // len(fields) if fields else 0
+        return self._record("GetTableForDisplayArray", (table_key, group_name), len(data),
+                            [field_key_list, table_version, fields, n, data, 0])
+
+    def SetTableForEditingArray(self, table_key, table_version, fields, n_records, table_data):
+        ret = self._validate(table_key, fields, n_records, table_data) if self._sap.validate else 0
+        if ret == 0:
+            width = len(fields)
+            rows = [dict(zip(fields, table_data[i * width:(i + 1) * width])) for i in range(n_records)]
+            self._pending.setdefault(table_key, []).extend(rows)
+        return self._record("SetTableForEditingArray", (table_key, table_version, list(fields), n_records),
+                            len(table_data), [table_version, fields, table_data, ret])
+
+    def ApplyEditedTables(self, fill_import):
+        n = sum(len(rows) for rows in self._pending.values())
+        fatal = self._import_errors() if self._sap.validate else []
+        if fatal:
+            # Como ETABS: ret = 0, pero los errores fatales llegan en NumFatalErrors e ImportLog y nada se aplica
+            self._pending = {}
+            for message in fatal:
+                logger.warning(message)
+            self._sap.errors.extend(fatal)
+            import_log = "\n".join(fatal) if fill_import else ""
+            return self._record("ApplyEditedTables", (fill_import,), n, [len(fatal), len(fatal), 0, 0, import_log, 0])
+        for key, rows in self._pending.items():
+            self.tables.setdefault(key, []).extend(rows)
+            # Los objetos creados por tabla quedan disponibles para FrameObj/AreaObj
+            if key == POINT_TABLE[0]:
+                self._sap.points.update((r["UniqueName"], (r["X"], r["Y"], r["Z"])) for r in rows)
+            elif key in FRAME_TABLES:
+                self._sap.frames.update((r["UniqueName"], r) for r in rows)
+            elif key in AREA_TABLES:
+                self._sap.areas.update((r["UniqueName"], r) for r in rows)
+        self._pending = {}
+        return self._record("ApplyEditedTables", (fill_import,), n, [0, 0, 0, 0, "", 0])
+
+    def _import_errors(self):
+        """Filas de conectividad que referencian puntos que no existen (ni en el modelo ni en la edición)."""
+        points = set(self._sap.points) | {r["UniqueName"] for r in self._pending.get(POINT_TABLE[0], [])}
+        errors = []
+        for key, rows in self._pending.items():
+            if key not in FRAME_TABLES | AREA_TABLES:
+                continue
+            for r in rows:
+                missing = [v for f, v in r.items() if f.startswith("UniquePt") and v and v not in points]
+                if missing:
+                    errors.append(f"{key}: {r['UniqueName']} referencia puntos inexistentes {missing}.")
+        return errors
+
+    def _validate(self, table_key, fields, n_records, table_data):
+        if len(set(fields)) != len(fields):
+            return self._sap._error(f"{table_key}: campos repetidos {list(fields)}.")
+        schema = self._sap.table_schemas.get(table_key)
+        if schema is not None and not set(fields) <= set(schema):
+            return self._sap._error(f"{table_key}: campos desconocidos {sorted(set(fields) - set(schema))}.")
+        if len(table_data) != n_records * len(fields):
+            return self._sap._error(f"{table_key}: {len(table_data)} valores para {n_records} filas x {len(fields)} campos.")
+        if any(not isinstance(v, str) for v in table_data):
+            return self._sap._error(f"{table_key}: TableData debe contener solo strings.")
+        return 0
+
+
+class _View(_Component):
+    def RefreshView(self, window=0, zoom=False):
+        return self._record("RefreshView", (window, zoom), 0, 0)
+
+
+class _File(_Component):
+    def NewBlank(self):
+        return self._record("NewBlank", (), 0, 0)
+
+
+class FakeSapModel:
+    """
+    SapModel falso para pruebas y benchmarks en equipos sin ETABS.
+    Implementa la superficie usada por el proyecto (PointObj, FrameObj, AreaObj, Story,
+    DatabaseTables, View, File, SetPresentUnits), registra cada llamada con sus
+    argumentos y un tiempo simulado según el LatencyModel, y valida la forma de
+    los payloads (un payload inválido devuelve un código de error distinto de 0,
+    como ETABS, y queda en self.errors).
+    """
+
+    def __init__(self, latency=None, validate=True, table_schemas=None, sleep=False):
+        """
+        latency: LatencyModel (por defecto costos típicos de una llamada COM).
+        validate: Valida la forma de los payloads.
+        table_schemas: Campos válidos por tabla (por defecto TABLE_SCHEMAS).
+        sleep: Si es True, además de acumular el tiempo simulado se duerme ese tiempo.
+        """
+        self.latency = latency or LatencyModel()
+        self.validate = validate
+        self.table_schemas = TABLE_SCHEMAS if table_schemas is None else table_schemas
+        self.sleep = sleep
+
+        self.calls = []
+        self.errors = []
+        self.simulated_time = 0.0
+        self.units = None
+        self.filename = "FakeModel.EDB"
+        self.points = {}
+        self.frames = {}
+        self.areas = {}
+        self.stories = []
+        self._counters = Counter()
+
+        self.PointObj = _PointObj(self, "PointObj")
+        self.FrameObj = _FrameObj(self, "FrameObj")
+        self.AreaObj = _AreaObj(self, "AreaObj")
+        self.Story = _Story(self, "Story")
+        self.DatabaseTables = _DatabaseTables(self, "DatabaseTables")
+        self.View = _View(self, "View")
+        self.File = _File(self, "File")
+
+    def SetPresentUnits(self, units):
+        self.units = units
+        return self._record("SetPresentUnits", (units,), 0, 0)
+
+    def GetModelFilename(self, include_path=True):
+        self._record("GetModelFilename", (include_path,), 0, 0)
+        return self.filename
+
+    def InitializeNewModel(self, units=None):
+        return self._record("InitializeNewModel", (units,), 0, 0)
+
+    # ---------- registro ----------
+    def _record(self, method, args, items, ret):
+        latency = self.latency.cost(method, items)
+        self.simulated_time += latency
+        code = ret_code(ret)
+        self.calls.append(CallRecord(method, args, items, latency, code))
+        if self.sleep:
+            time.sleep(latency)
+        return ret
+
+    def _error(self, message):
+        logger.warning(message)
+        self.errors.append(message)
+        return 1
+
+    def _check_points(self, names, method):
+        """Los objetos por punto deben referenciar puntos existentes (creados o por tabla)."""
+        if not self.validate:
+            return 0
+        missing = [p for p in names if p not in self.points]
+        return self._error(f"{method}: puntos inexistentes {missing}.") if missing else 0
+
+    def _next_name(self, kind):
+        self._counters[kind] += 1
+        return self._counters[kind]
+
+    # ---------- consultas ----------
+    def call_counts(self):
+        """Cantidad de llamadas por método ("FrameObj.AddByCoord": n, ...)."""
+        return Counter(c.method for c in self.calls)
+
+    def summary(self):
+        """Resumen para benchmarks: llamadas totales, por método, tiempo simulado y errores."""
+        return {
+            "llamadas": len(self.calls),
+            "por_metodo": dict(self.call_counts()),
+            "tiempo_simulado": round(self.simulated_time, 4),
+            "errores": len(self.errors),
+        }
+
+    def reset(self):
+        """Limpia el registro de llamadas (mantiene el estado del modelo)."""
+        self.calls = []
+        self.errors = []
+        self.simulated_time = 0.0
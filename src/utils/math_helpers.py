@@ -0,0 +1,65 @@
+import numpy as np
+
+
+def cluster_1d(values, eps, period=None):
+    """
+    Agrupa valores 1D separando donde la distancia entre valores consecutivos
+    (ordenados) supera eps. Equivale a DBSCAN con min_samples=1, en O(n log n).
+    period: Si se indica (ej. 180 para ángulos de línea), los valores son
+            circulares y el primer y último grupo se unen si el salto que
+            cruza el período es <= eps (179° y 1° quedan juntos).
+    Devuelve (labels, unwrapped): etiqueta de cada valor (0..k-1, en orden
+    creciente) y los valores "desenrollados" para calcular centros sin el
+    salto del período.
+    """
+    values = np.asarray(values, dtype=float).ravel()
+    if values.size == 0:
+        return np.zeros(0, dtype=int), values
+    if period is not None:
+        values = np.mod(values, period)
+
+    order = np.argsort(values, kind='stable')
+    sorted_vals = values[order]
+    labels_sorted = np.concatenate(([0], np.cumsum(np.diff(sorted_vals) > eps)))
+    unwrapped_sorted = sorted_vals.copy()
+
+    if period is not None and labels_sorted[-1] > 0:
+        wrap_gap = sorted_vals[0] + period - sorted_vals[-1]
+        if wrap_gap <= eps:
+            last = labels_sorted == labels_sorted[-1]
+            unwrapped_sorted[last] -= period
+            labels_sorted[last] = 0
+
+    labels = np.empty_like(labels_sorted)
+    labels[order] = labels_sorted
+    unwrapped = np.empty_like(unwrapped_sorted)
+    unwrapped[order] = unwrapped_sorted
+    return labels, unwrapped
+
+
+def weighted_median(values, weights=None):
+    """Mediana ponderada (con weights=None es la mediana usual de NumPy)."""
+    values = np.asarray(values, dtype=float)
+    if weights is None:
+        return float(np.median(values))
+    weights = np.asarray(weights, dtype=float)
+    order = np.argsort(values, kind='stable')
+    cum = np.cumsum(weights[order])
+    idx = np.searchsorted(cum, 0.5 * cum[-1])
+    return float(values[order][min(idx, len(values) - 1)])
+
+
+def cluster_centers_1d(values, eps, weights=None, period=None):
+    """
+    Centros (medianas, opcionalmente ponderadas) de los grupos de cluster_1d.
+    Con period, los centros se devuelven dentro de [0, period).
+    """
+    labels, unwrapped = cluster_1d(values, eps, period=period)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float).ravel()
+    centers = []
+    for label in np.unique(labels):
+        mask = labels == label
+        center = weighted_median(unwrapped[mask], None if weights is None else weights[mask])
+        centers.append(center % period if period is not None else center)
+    return centers
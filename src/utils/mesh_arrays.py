@@ -0,0 +1,66 @@
+import numpy as np
+
+
+def node_arrays(model):
+    """
+    Nodos del modelo como arreglos. Devuelve (nodos, puntos (n x 3), índice
+    {Node.id: fila}) para armar la conectividad de los elementos por índices.
+    """
+    nodes = list(model.node_manager.nodes.values())
+    points = np.array([[n.x, n.y, n.z] for n in nodes], dtype=float).reshape(-1, 3)
+    index = {n.id: i for i, n in enumerate(nodes)}
+    return nodes, points, index
+
+
+def frame_cells(elements, index):
+    """Conectividad de frames: arreglo (m x 2) de filas del arreglo de puntos."""
+    return np.array([[index[e.start_node.id], index[e.end_node.id]] for e in elements], dtype=int).reshape(-1, 2)
+
+
+def shell_cells(elements, index):
+    """
+    Conectividad de muros/losas (polígonos de largo variable).
+    Devuelve (cantidad de nodos por elemento, índices concatenados).
+    """
+    counts = np.array([len(e.nodes) for e in elements], dtype=int)
+    flat = np.array([index[n.id] for e in elements for n in e.nodes], dtype=int)
+    return counts, flat
+
+
+def padded_cells(counts, flat):
+    """Formato de celdas VTK: [n0, i0, i1, ..., n1, j0, ...] sin recorrer elemento por elemento."""
+    out = np.empty(len(flat) + len(counts), dtype=int)
+    heads = np.cumsum(counts + 1) - (counts + 1)
+    mask = np.ones(len(out), dtype=bool)
+    mask[heads] = False
+    out[heads] = counts
+    out[mask] = flat
+    return out
+
+
+def split_cells(points, counts, flat):
+    """Lista de polígonos (k_i x 3) a partir de la conectividad (para Poly3DCollection)."""
+    return np.split(points[flat], np.cumsum(counts)[:-1]) if len(counts) else []
+
+
+def cell_labels(elements, attr):
+    """Código entero por elemento y etiquetas únicas de un atributo (level, section...)."""
+    values = np.array([str(getattr(e, attr)) for e in elements], dtype=str)
+    if values.size == 0:
+        return np.zeros(0, dtype=int), np.array([], dtype=str)
+    labels, codes = np.unique(values, return_inverse=True)
+    return codes.ravel(), labels
+
+
+def grid_segments(model, points):
+    """Segmentos (k x 2 x 3) de las grillas en Z=0 sobre la planta de los puntos, y sus etiquetas."""
+    if len(points) == 0 or not hasattr(model, 'grid_manager'):
+        return np.empty((0, 2, 3)), []
+    bbox = (points[:, 0].min(), points[:, 0].max(), points[:, 1].min(), points[:, 1].max())
+    segments, labels = [], []
+    for system in model.grid_manager.systems:
+        for grid in system.grids:
+            p1, p2 = grid.get_endpoints(bbox)
+            segments.append([[p1[0], p1[1], 0.0], [p2[0], p2[1], 0.0]])
+            labels.append(grid.label)
+    return np.array(segments, dtype=float).reshape(-1, 2, 3), labels
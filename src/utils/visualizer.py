@@ -1,7 +1,21 @@
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from mpl_toolkits.mplot3d import Axes3D, proj3d
+from mpl_toolkits.mplot3d.art3d import Line3DCollection, Poly3DCollection
 import numpy as np
+# KD-tree para el picking de nodos (sin scipy se usa una búsqueda lineal vectorizada)
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+from utils.mesh_arrays import node_arrays, frame_cells, shell_cells, split_cells, grid_segments
+
+# Estilo por categoría: (etiqueta, color, ancho de línea) para frames y (etiqueta, color, borde) para shells
+FRAME_STYLES = {"beams": ("Beam", "blue", 2), "columns": ("Column", "green", 3)}
+SHELL_STYLES = {"walls": ("Wall", "red", "darkred"), "slabs": ("Slab", "cyan", "darkblue")}
+MAX_NODE_LABELS = 500 # Sobre esta cantidad de nodos no se dibujan las etiquetas (solo el nodo seleccionado)
+PICK_RADIUS = 8 # Distancia máxima en píxeles entre el clic y el nodo seleccionado
 
 class StructuralVisualizer:
     def __init__(self, model):
@@ -11,11 +25,19 @@ class StructuralVisualizer:
         self.annot = None
         self.scatter = None
         self._zoom_factor = 1.0
+        self.node_list = []
+        self._points = np.empty((0, 3))
+        self._index = {}
+        self._tree = None
+        self._tree_view = None
 
     def plot_model(self, show_nodes=False, show_grids=False):
         """Genera una vista 3D interactiva de la estructura."""
         self.fig = plt.figure(figsize=(15, 12))
         self.ax = self.fig.add_subplot(111, projection='3d')
+        # Arreglo de nodos compartido por todas las colecciones
+        self.node_list, self._points, self._index = node_arrays(self.model)
+        self._legend = []
         
         self._plot_frames(self.ax)
         self._plot_shells(self.ax)
@@ -29,7 +51,7 @@ class StructuralVisualizer:
             self.annot = self.ax.text(0, 0, 0, "", color='white', 
                                       bbox=dict(boxstyle="round", fc="black", ec="b", alpha=0.7))
             self.annot.set_visible(False)
-            self.fig.canvas.mpl_connect('pick_event', self._on_pick)
+            self.fig.canvas.mpl_connect('button_press_event', self._on_click)
 
         self.ax.set_xlabel('X (m)')
         self.ax.set_ylabel('Y (m)')
@@ -44,11 +66,10 @@ class StructuralVisualizer:
         # Conectar evento de scroll para zoom
         self.fig.canvas.mpl_connect('scroll_event', self._on_scroll)
         
-        # Agregar leyenda manejando el clipping
-        handles, labels = self.ax.get_legend_handles_labels()
-        if handles:
+        # Leyenda armada una sola vez con un elemento por categoría dibujada
+        if self._legend:
             # bbox_to_anchor fuera del gráfico para evitar solapamiento
-            self.ax.legend(handles, labels, loc='upper left', bbox_to_anchor=(0.0, 1.05))
+            self.ax.legend(handles=self._legend, loc='upper left', bbox_to_anchor=(0.0, 1.05))
 
         plt.show()
 
@@ -83,90 +104,60 @@ class StructuralVisualizer:
         self.fig.canvas.draw_idle()
 
     def _plot_frames(self, ax):
-        for beam in self.model.beams:
-            x = [beam.start_node.x, beam.end_node.x]
-            y = [beam.start_node.y, beam.end_node.y]
-            z = [beam.start_node.z, beam.end_node.z]
-            ax.plot(x, y, z, color='blue', linewidth=2, label='Beam' if 'Beam' not in plt.gca().get_legend_handles_labels()[1] else "")
-
-        for col in self.model.columns:
-            x = [col.start_node.x, col.end_node.x]
-            y = [col.start_node.y, col.end_node.y]
-            z = [col.start_node.z, col.end_node.z]
-            ax.plot(x, y, z, color='green', linewidth=3)
+        """Vigas y columnas: una Line3DCollection por categoría."""
+        for category, (label, color, width) in FRAME_STYLES.items():
+            elements = getattr(self.model, category)
+            if not elements:
+                continue
+            segments = self._points[frame_cells(elements, self._index)]
+            ax.add_collection3d(Line3DCollection(segments, colors=color, linewidths=width))
+            self._legend.append(Line2D([], [], color=color, linewidth=width, label=label))
 
     def _plot_shells(self, ax):
-        for wall in self.model.walls:
-            # Obtener coordenadas de los nodos del muro
-            verts = [ [n.x, n.y, n.z] for n in wall.nodes ]
-            poly = Poly3DCollection([verts], alpha=0.3, facecolor='red', edgecolor='darkred')
-            ax.add_collection3d(poly)
-
-        for slab in self.model.slabs:
-            # Obtener coordenadas de los nodos del muro
-            verts = [ [n.x, n.y, n.z] for n in slab.nodes ]
-            poly = Poly3DCollection([verts], alpha=0.3, facecolor='cyan', edgecolor='darkblue')
-            ax.add_collection3d(poly)
+        """Muros y losas: una Poly3DCollection por categoría."""
+        for category, (label, color, edge_color) in SHELL_STYLES.items():
+            elements = getattr(self.model, category)
+            if not elements:
+                continue
+            polygons = split_cells(self._points, *shell_cells(elements, self._index))
+            ax.add_collection3d(Poly3DCollection(polygons, alpha=0.3, facecolor=color, edgecolor=edge_color))
+            self._legend.append(Patch(facecolor=color, edgecolor=edge_color, alpha=0.3, label=label))
 
     def _plot_nodes(self, ax, plot_id=True):
-        nodes = list(self.model.node_manager.nodes.values())
-        self.node_list = nodes # Guardar referencia para identificar por índice
+        points = self._points
+        if not len(points): return
         
-        x = [n.x for n in nodes]
-        y = [n.y for n in nodes]
-        z = [n.z for n in nodes]
-        ids = [n.id for n in nodes]
-        
-        # Habilitar 'picker' para permitir interacción
-        #agregu una leyenda para identificar los nodos
-        if plot_id:
-            for i, txt in enumerate(ids):
-                ax.text(x[i], y[i], z[i], str(txt), color='darkred', fontsize=8, ha='center', va='bottom')
+        # Etiquetas solo en modelos chicos: en los grandes se ve el ID del nodo seleccionado
+        if plot_id and len(points) <= MAX_NODE_LABELS:
+            for node, (x, y, z) in zip(self.node_list, points):
+                ax.text(x, y, z, str(node.id), color='darkred', fontsize=8, ha='center', va='bottom')
 
-        self.scatter = ax.scatter(x, y, z, color='black', s=20, picker=True, pickradius=5)
+        self.scatter = ax.scatter(points[:, 0], points[:, 1], points[:, 2], color='black', s=20)
 
     def _plot_grids(self, ax):
-        """Dibuja los sistemas de grillas en el plano Z=0."""
-        # 1. Obtener límites para calcular extremos de grilla
-        nodes = list(self.model.node_manager.nodes.values())
-        if not nodes: return
-        
-        bbox = (
-            min(n.x for n in nodes), max(n.x for n in nodes),
-            min(n.y for n in nodes), max(n.y for n in nodes)
-        )
-
-        # Ahora obtenemos los sistemas desde el grid_manager
-        grid_systems = self.model.grid_manager.systems
-
-        for system in grid_systems:
-            for grid in system.grids:
-                # Obtenemos los extremos cartesianos desde la Normal de Hesse
-                p1, p2 = grid.get_endpoints(bbox)
-                
-                # Dibujar línea (en Z=0 por defecto)
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], [0, 0], 
-                        color='gray', linestyle='--', linewidth=0.8, alpha=0.5)
-                
-                # Colocar etiqueta en los extremos
-                ax.text(p1[0], p1[1], 0, f" {grid.label}", color='gray', fontsize=7, fontweight='bold')
-                ax.text(p2[0], p2[1], 0, f"{grid.label} ", color='gray', fontsize=7, fontweight='bold', ha='right')
+        """Dibuja los sistemas de grillas en el plano Z=0 (una sola colección de líneas)."""
+        segments, labels = grid_segments(self.model, self._points)
+        if not len(segments): return
+
+        ax.add_collection3d(Line3DCollection(segments, colors='gray', linestyles='--', linewidths=0.8, alpha=0.5))
+        # Etiqueta en los extremos de cada grilla
+        for (p1, p2), label in zip(segments, labels):
+            ax.text(p1[0], p1[1], 0, f" {label}", color='gray', fontsize=7, fontweight='bold')
+            ax.text(p2[0], p2[1], 0, f"{label} ", color='gray', fontsize=7, fontweight='bold', ha='right')
 
     def _set_axes_equal(self, ax):
         """Ajusta los límites para que 1m en X sea igual a 1m en Y y Z usando los nodos del modelo."""
-        nodes = list(self.model.node_manager.nodes.values())
-        if not nodes:
+        points = self._points
+        if not len(points):
             x_limits = ax.get_xlim3d()
             y_limits = ax.get_ylim3d()
             z_limits = ax.get_zlim3d()
         else:
-            x_vals = [n.x for n in nodes]
-            y_vals = [n.y for n in nodes]
-            z_vals = [n.z for n in nodes]
+            (x_min, y_min, z_min), (x_max, y_max, z_max) = points.min(axis=0), points.max(axis=0)
             
-            x_limits = [min(x_vals), max(x_vals)]
-            y_limits = [min(y_vals), max(y_vals)]
-            z_limits = [min(z_vals), max(z_vals)]
+            x_limits = [x_min, x_max]
+            y_limits = [y_min, y_max]
+            z_limits = [z_min, z_max]
             
             if x_limits[0] == x_limits[1]: x_limits = [x_limits[0] - 1, x_limits[1] + 1]
             if y_limits[0] == y_limits[1]: y_limits = [y_limits[0] - 1, y_limits[1] + 1]
@@ -187,13 +178,42 @@ class StructuralVisualizer:
         ax.set_ylim3d([np.mean(y_limits) - plot_radius, np.mean(y_limits) + plot_radius])
         ax.set_zlim3d([np.mean(z_limits) - plot_radius, np.mean(z_limits) + plot_radius])
     
-    def _on_pick(self, event):
-        """Manejador de evento cuando se hace clic en un punto del scatter."""
-        if event.artist != self.scatter:
+    def _screen_points(self):
+        """Nodos proyectados a píxeles con la vista actual (matriz de proyección del eje 3D)."""
+        x, y, _ = proj3d.proj_transform(self._points[:, 0], self._points[:, 1], self._points[:, 2],
+                                        self.ax.get_proj())
+        return self.ax.transData.transform(np.column_stack([x, y]))
+
+    def nearest_node(self, x, y):
+        """
+        Índice del nodo más cercano al punto de pantalla (x, y) en píxeles, o None
+        si está a más de PICK_RADIUS. El KD-tree se reconstruye solo cuando cambia
+        la vista (rotación, zoom o tamaño de la ventana).
+        """
+        if not len(self._points):
+            return None
+        view = (self.ax.elev, self.ax.azim, self._zoom_factor, self.ax.get_xlim3d(), self.ax.get_ylim3d(),
+                self.ax.get_zlim3d(), tuple(self.ax.bbox.bounds))
+        if self._tree_view != view:
+            screen = self._screen_points()
+            self._tree = cKDTree(screen) if cKDTree is not None else screen
+            self._tree_view = view
+
+        if cKDTree is not None:
+            dist, ind = self._tree.query([x, y], distance_upper_bound=PICK_RADIUS)
+            return int(ind) if np.isfinite(dist) else None
+        dist = np.hypot(self._tree[:, 0] - x, self._tree[:, 1] - y)
+        ind = int(np.argmin(dist))
+        return ind if dist[ind] <= PICK_RADIUS else None
+
+    def _on_click(self, event):
+        """Manejador del clic: selecciona el nodo más cercano con el KD-tree de la vista actual."""
+        if event.inaxes != self.ax or event.button != 1:
             return
 
-        # Obtener el índice del punto clickeado
-        ind = event.ind[0]
+        ind = self.nearest_node(event.x, event.y)
+        if ind is None:
+            return
         node = self.node_list[ind]
         
         # Actualizar posición y texto de la anotación
@@ -207,5 +227,3 @@ class StructuralVisualizer:
         
         self.fig.canvas.draw_idle()
         print(f"Nodo {node.id} Seleccionado - X: {node.x:.4f}, Y: {node.y:.4f}, Z: {node.z:.4f}")
-    
-    
\ No newline at end of file
@@ -1,5 +1,14 @@
 import pyvista as pv
 import numpy as np
+from utils.mesh_arrays import node_arrays, frame_cells, shell_cells, padded_cells, cell_labels, grid_segments
+
+# Estilo por categoría: (etiqueta, color, ancho de línea / opacidad, color de borde)
+FRAME_STYLES = {"beams": ("Vigas", "blue", 4), "columns": ("Columnas", "green", 5)}
+SHELL_STYLES = {"walls": ("Muros", "red", 0.4, "darkred"), "slabs": ("Losas", "cyan", 0.4, "darkblue")}
+
+# Atributo del elemento usado para colorear por celda
+COLOR_ATTRS = {"story": "level", "section": "section"}
+
 
 class StructuralVisualizerPyVista:
     def __init__(self, model):
@@ -8,13 +17,21 @@ class StructuralVisualizerPyVista:
         self.plotter = pv.Plotter(window_size=[1200, 800])
         self.plotter.set_background('white')
         self.node_cloud = None
+        self.meshes = {} # Una PolyData por categoría (beams, columns, walls, slabs)
+        self._nodes, self._points, self._index = [], np.empty((0, 3)), {}
 
-    def plot_model(self, show_nodes=False, show_grids=False):
-        """Genera una vista 3D interactiva de la estructura usando PyVista."""
+    def plot_model(self, show_nodes=False, show_grids=False, color_by="category"):
+        """
+        Genera una vista 3D interactiva de la estructura usando PyVista.
+        color_by: "category" (un color por categoría), "story" o "section"
+                  (colores por celda según el nivel o la sección del elemento).
+        """
         self.plotter.add_text(f'Vista Previa Interactiva: {self.model.name}', font_size=12, color='black')
+        # Arreglo de nodos compartido por todas las mallas (el modelo puede haber cambiado desde __init__)
+        self._nodes, self._points, self._index = node_arrays(self.model)
 
-        self._plot_frames()
-        self._plot_shells()
+        self._plot_frames(color_by)
+        self._plot_shells(color_by)
         
         if show_grids:
             self._plot_grids()
@@ -31,62 +48,60 @@ class StructuralVisualizerPyVista:
         # Iniciar la visualización
         self.plotter.show()
 
-    def _plot_frames(self):
-        """Dibuja elementos frame (vigas y columnas)."""
-        # Vigas (Azul)
-        if hasattr(self.model, 'beams') and self.model.beams:
-            beam_lines = []
-            for beam in self.model.beams:
-                p1 = [beam.start_node.x, beam.start_node.y, beam.start_node.z]
-                p2 = [beam.end_node.x, beam.end_node.y, beam.end_node.z]
-                beam_lines.append(pv.Line(p1, p2))
-            
-            if beam_lines:
-                # Combinar líneas en una sola malla optimiza drásticamente el renderizado por GPU
-                merged_beams = beam_lines[0]
-                for line in beam_lines[1:]:
-                    merged_beams += line
-                self.plotter.add_mesh(merged_beams, color='blue', line_width=4, label='Vigas')
+    def _category_mesh(self, elements, lines=None, faces=None):
+        """
+        Una PolyData por categoría sobre el arreglo de nodos compartido, con el
+        nivel y la sección de cada elemento como datos de celda (códigos enteros).
+        """
+        if lines is not None:
+            mesh = pv.PolyData(self._points, lines=lines)
+        else:
+            mesh = pv.PolyData(self._points, faces=faces)
+        annotations = {}
+        for name, attr in COLOR_ATTRS.items():
+            codes, labels = cell_labels(elements, attr)
+            mesh.cell_data[name] = codes
+            annotations[name] = dict(enumerate(labels.tolist()))
+        return mesh, annotations
 
-        # Columnas (Verde)
-        if hasattr(self.model, 'columns') and self.model.columns:
-            col_lines = []
-            for col in self.model.columns:
-                p1 = [col.start_node.x, col.start_node.y, col.start_node.z]
-                p2 = [col.end_node.x, col.end_node.y, col.end_node.z]
-                col_lines.append(pv.Line(p1, p2))
-                
-            if col_lines:
-                merged_cols = col_lines[0]
-                for line in col_lines[1:]:
-                    merged_cols += line
-                self.plotter.add_mesh(merged_cols, color='green', line_width=5, label='Columnas')
+    def _add_category(self, mesh, annotations, color_by, label, color, **kwargs):
+        if color_by in COLOR_ATTRS:
+            self.plotter.add_mesh(mesh, scalars=color_by, categorical=True, cmap='tab20',
+                                  annotations=annotations[color_by], label=label,
+                                  scalar_bar_args={"title": color_by}, **kwargs)
+        else:
+            self.plotter.add_mesh(mesh, color=color, label=label, **kwargs)
 
-    def _plot_shells(self):
-        """Dibuja elementos shell (muros y losas) usando polígonos."""
-        # Muros (Rojo)
-        if hasattr(self.model, 'walls') and self.model.walls:
-            for wall in self.model.walls:
-                points = [[n.x, n.y, n.z] for n in wall.nodes]
-                # Formato de caras en PyVista: [número_de_puntos, indice0, indice1, ...]
-                face = [len(points)] + list(range(len(points)))
-                poly = pv.PolyData(points, faces=face)
-                self.plotter.add_mesh(poly, color='red', opacity=0.4, show_edges=True, edge_color='darkred')
+    def _plot_frames(self, color_by="category"):
+        """Dibuja vigas y columnas: una malla de líneas y un actor por categoría."""
+        for category, (label, color, width) in FRAME_STYLES.items():
+            elements = getattr(self.model, category, [])
+            if not elements:
+                continue
+            cells = frame_cells(elements, self._index)
+            lines = np.hstack([np.full((len(cells), 1), 2), cells]).ravel()
+            mesh, annotations = self._category_mesh(elements, lines=lines)
+            self.meshes[category] = mesh
+            self._add_category(mesh, annotations, color_by, label, color, line_width=width)
 
-        # Losas (Cyan)
-        if hasattr(self.model, 'slabs') and self.model.slabs:
-            for slab in self.model.slabs:
-                points = [[n.x, n.y, n.z] for n in slab.nodes]
-                face = [len(points)] + list(range(len(points)))
-                poly = pv.PolyData(points, faces=face)
-                self.plotter.add_mesh(poly, color='cyan', opacity=0.4, show_edges=True, edge_color='darkblue')
+    def _plot_shells(self, color_by="category"):
+        """Dibuja muros y losas: una malla de polígonos y un actor por categoría."""
+        for category, (label, color, opacity, edge_color) in SHELL_STYLES.items():
+            elements = getattr(self.model, category, [])
+            if not elements:
+                continue
+            # Formato de caras en PyVista: [número_de_puntos, indice0, indice1, ...]
+            faces = padded_cells(*shell_cells(elements, self._index))
+            mesh, annotations = self._category_mesh(elements, faces=faces)
+            self.meshes[category] = mesh
+            self._add_category(mesh, annotations, color_by, label, color, opacity=opacity, show_edges=True,
+                               edge_color=edge_color)
 
     def _plot_nodes(self):
         """Dibuja nodos y activa la selección interactiva (picking)."""
-        nodes = list(self.model.node_manager.nodes.values())
+        nodes, points = self._nodes, self._points
         if not nodes: return
         
-        points = np.array([[n.x, n.y, n.z] for n in nodes])
         ids = [str(n.id) for n in nodes]
         
         # Nube de puntos para los nodos
@@ -119,36 +134,14 @@ class StructuralVisualizerPyVista:
                                           color='magenta', point_size=15, use_picker=True, left_clicking=True)
 
     def _plot_grids(self):
-        """Dibuja los sistemas de grillas en el plano Z=0."""
-        nodes = list(self.model.node_manager.nodes.values())
-        if not nodes or not hasattr(self.model, 'grid_manager'): return
-        
-        bbox = (
-            min(n.x for n in nodes), max(n.x for n in nodes),
-            min(n.y for n in nodes), max(n.y for n in nodes)
-        )
-        
-        grid_lines = []
-        labels_pos = []
-        labels_text = []
+        """Dibuja los sistemas de grillas en el plano Z=0 (una sola malla de líneas)."""
+        segments, labels = grid_segments(self.model, self._points)
+        if not len(segments): return
 
-        for system in self.model.grid_manager.systems:
-            for grid in system.grids:
-                p1, p2 = grid.get_endpoints(bbox)
-                p1_3d = [p1[0], p1[1], 0]
-                p2_3d = [p2[0], p2[1], 0]
-                
-                grid_lines.append(pv.Line(p1_3d, p2_3d))
-                labels_pos.extend([p1_3d, p2_3d])
-                labels_text.extend([grid.label, grid.label])
-
-        if grid_lines:
-            merged_grids = grid_lines[0]
-            for line in grid_lines[1:]:
-                merged_grids += line
-            self.plotter.add_mesh(merged_grids, color='gray', line_width=1, opacity=0.6)
-            
-        if labels_pos:
-            self.plotter.add_point_labels(np.array(labels_pos), labels_text, 
-                                          text_color='black', point_size=0, font_size=14, 
-                                          shape_opacity=0.0)
\ No newline at end of file
+        points = segments.reshape(-1, 3)
+        cells = np.arange(len(points)).reshape(-1, 2)
+        lines = np.hstack([np.full((len(cells), 1), 2), cells]).ravel()
+        self.plotter.add_mesh(pv.PolyData(points, lines=lines), color='gray', line_width=1, opacity=0.6)
+        self.plotter.add_point_labels(points, [l for l in labels for _ in range(2)],
+                                      text_color='black', point_size=0, font_size=14, 
+                                      shape_opacity=0.0)
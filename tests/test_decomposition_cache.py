@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+
+
+def _wall(i, x0=0.0, z0=0.0):
+    return dict(
+        revit_id=f"W{i}",
+        exterior_pts=[[x0, 0, z0], [x0 + 5, 0, z0], [x0 + 5, 0, z0 + 3], [x0, 0, z0 + 3]],
+        holes_pts=[[[x0 + 1.5, 0, z0 + 1], [x0 + 3.5, 0, z0 + 1], [x0 + 3.5, 0, z0 + 2], [x0 + 1.5, 0, z0 + 2]]],
+        section="M20",
+        level="L1",
+        height=3.0,
+    )
+
+
+def _node_coords(model):
+    return sorted((round(n.x, 6), round(n.y, 6), round(n.z, 6)) for n in model.node_manager.nodes.values())
+
+
+class TestDecompositionCache(unittest.TestCase):
+    def test_repeated_walls_hit_cache(self):
+        """Muros iguales en distintos pisos y posiciones reutilizan la descomposición."""
+        model = Model("Test Model")
+        walls = [_wall(i, x0=7.0 * (i % 3), z0=3.0 * (i // 3)) for i in range(9)]
+        model.add_walls(walls, parallel=False)
+
+        stats = model.wall_processor.cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hits"], 8)
+        self.assertEqual(len(model.walls), 9 * 4)
+
+    def test_cached_result_matches_uncached(self):
+        walls = [_wall(i, x0=7.0 * i, z0=3.0 * i) for i in range(4)]
+
+        cached = Model("Test Model")
+        cached.add_walls(walls, parallel=False)
+
+        uncached = Model("Test Model")
+        uncached.wall_processor.cache = None
+        uncached.add_walls(walls, parallel=False)
+
+        self.assertEqual(_node_coords(cached), _node_coords(uncached))
+
+    def test_lru_eviction(self):
+        model = Model("Test Model")
+        model.wall_processor.cache.maxsize = 1
+        model.add_wall(**_wall(0))
+        model.add_wall(**dict(_wall(1), holes_pts=[]))
+        model.add_wall(**_wall(2))
+        self.assertEqual(len(model.wall_processor.cache), 1)
+        self.assertEqual(model.wall_processor.cache_stats()["hits"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
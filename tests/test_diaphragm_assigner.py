@@ -0,0 +1,89 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from utils.fake_sap_model import FakeSapModel
+
+
+def _slab(z, level):
+    return dict(revit_id=f"S{z}", exterior_pts=[[0, 0, z], [4, 0, z], [4, 4, z], [0, 4, z]],
+                holes_pts=[], section="Losa15", level=level)
+
+
+def _model(first_slab=True):
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    model.story_manager.add_story("L2", 6.0, 3)
+    model.add_slabs([_slab(3.0, "L1"), _slab(6.0, "L2")] if first_slab else [_slab(6.0, "L2")])
+    model.add_column("C1", "C-40", "L1", (0, 0, 0), (0, 0, 3))
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 4.5), (4, 0, 4.5)) # Viga a media altura
+    return model
+
+
+class TestDiaphragmAssigner(unittest.TestCase):
+    def _writer(self, model):
+        writer = EtabsWriter(model)
+        writer.SapModel = FakeSapModel()
+        return writer
+
+    def test_one_diaphragm_per_story_on_slabs(self):
+        writer = self._writer(_model())
+        report = writer._write_diaphragms()
+        tables = writer.SapModel.DatabaseTables.tables
+
+        self.assertEqual(report, {"diafragmas": 2, "asignaciones": 2, "nodos_fuera_de_nivel": 2})
+        self.assertEqual([r["Name"] for r in tables["Diaphragm Definitions"]], ["D1", "D2"])
+        self.assertEqual({r["UniqueName"]: r["Diaphragm"] for r in tables["Area Assignments - Diaphragms"]},
+                         {"S1": "D1", "S2": "D2"})
+
+    def test_joints_mode_and_story_filter(self):
+        model = _model()
+        writer = self._writer(model)
+        report = writer._write_diaphragms(stories=["L2"], mode="joints")
+        rows = writer.SapModel.DatabaseTables.tables["Joint Assignments - Diaphragms"]
+
+        self.assertEqual(report["diafragmas"], 1)
+        self.assertEqual(len(rows), 4) # Solo las esquinas de la losa a 6 m
+        self.assertTrue(all(r["Diaphragm"] == "D2" for r in rows))
+
+    def test_sync_mode_uses_names_from_id_map(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            sap = FakeSapModel()
+            for first_slab in (True, False):
+                writer = EtabsWriter(_model(first_slab), write_mode="sync", id_map_path=os.path.join(tmp, "ids.sqlite"))
+                writer.SapModel = sap
+                writer._write_elements()
+            writer._write_diaphragms()
+            writer._write_diaphragms(stories=["L2"], mode="joints")
+
+        tables = sap.DatabaseTables.tables
+        self.assertEqual(sap.errors, [])
+        # La losa de L2 es la única del modelo, pero en ETABS sigue llamándose S2
+        self.assertEqual({r["UniqueName"]: r["Diaphragm"] for r in tables["Area Assignments - Diaphragms"]},
+                         {"S2": "D2"})
+        joints = {r["UniqueName"] for r in tables["Joint Assignments - Diaphragms"]}
+        self.assertEqual(len(joints), 4)
+        self.assertTrue(joints <= set(sap.points))
+        self.assertEqual({sap.points[j][2] for j in joints}, {"6.0000"})
+
+    def test_api_mode_joints_need_point_names(self):
+        writer = EtabsWriter(_model(), write_mode="api")
+        writer.SapModel = FakeSapModel()
+        writer._write_elements()
+        with self.assertRaises(RuntimeError):
+            writer._write_diaphragms(mode="joints")
+        report = writer._write_diaphragms()
+        rows = writer.SapModel.DatabaseTables.tables["Area Assignments - Diaphragms"]
+        self.assertEqual(report["asignaciones"], 2)
+        self.assertTrue({r["UniqueName"] for r in rows} <= set(writer.SapModel.areas))
+
+
+if __name__ == '__main__':
+    unittest.main()
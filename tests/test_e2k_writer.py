@@ -0,0 +1,58 @@
+import io
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.e2k_writer import E2kWriter
+
+
+def _model():
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    model.story_manager.add_story("L2", 6.0, 3)
+    model.add_material("Concrete", "G30", {"fc": 3.0e6, "e": 2.5e9, "v": 0.2, "density": 2500})
+    model.add_section("Frame", "V-20/30", "G30", {"width": 0.2, "height": 0.3})
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 3), (5, 0, 3))
+    model.add_column("C1", "V-20/30", "L1", (0, 0, 0), (0, 0, 3))
+    model.add_column("C2", "V-20/30", "L2", (0, 0, 3), (0, 0, 6))
+    return model
+
+
+class TestE2kWriter(unittest.TestCase):
+    def test_stories_points_and_lines(self):
+        buf = io.StringIO()
+        n = E2kWriter(_model()).write(buf)
+        text = buf.getvalue()
+
+        self.assertEqual(n, len(text.splitlines()))
+        self.assertIn('STORY "P2"  HEIGHT 3', text)
+        self.assertIn('STORY "Base"  ELEV 0', text)
+        self.assertLess(text.index('STORY "P2"'), text.index('STORY "P1"'))
+        self.assertIn('FRAMESECTION  "V-20/30"  MATERIAL "G30"  SHAPE "Concrete Rectangular"  D 0.3  B 0.2', text)
+        # Un solo punto en planta para el eje de columnas
+        self.assertEqual(text.count('POINT "'), 2)
+        self.assertIn('LINE  "B1"  BEAM  "1"  "2"  0', text)
+        self.assertIn('LINE  "C1"  COLUMN  "1"  "1"  1', text)
+        self.assertIn('LINEASSIGN  "C2"  "P2"  SECTION "V-20/30"', text)
+        self.assertTrue(text.rstrip().endswith("$ END OF MODEL FILE"))
+
+    def test_wall_points_between_levels(self):
+        model = _model()
+        model.add_wall("W1", [[0, 0, 0], [4, 0, 0], [4, 0, 1.5], [0, 0, 1.5]], [], "M-20", "L1", 1.5)
+        buf = io.StringIO()
+        E2kWriter(model).write(buf)
+        text = buf.getvalue()
+
+        # Los nodos a 1.5 m quedan 1.5 m bajo el piso P1
+        self.assertIn('  1.5\n', text)
+        self.assertIn('AREA  "W1"  PANEL  4', text)
+        self.assertIn('AREAASSIGN  "W1"  "P1"  SECTION "M-20"', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_sync import EtabsIdMap
+from services.etabs_writer import EtabsWriter
+from services.remote_writer import EtabsAgent
+from utils.fake_sap_model import FakeSapModel
+
+
+def _model(beam_end=5.0, n_beams=3):
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    for i in range(n_beams):
+        model.add_beam(f"B{i}", "V-20/30", "L1", (0, 4 * i, 3), (beam_end if i == 0 else 5.0, 4 * i, 3))
+        model.add_column(f"C{i}", "V-20/30", "L1", (0, 4 * i, 0), (0, 4 * i, 3))
+    return model
+
+
+class TestEtabsSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "ids.sqlite")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _sync(self, model, sap):
+        writer = EtabsWriter(model, write_mode="sync", id_map_path=self.path)
+        writer.SapModel = sap
+        writer._write_nodes()
+        writer._write_elements()
+        return writer.sync_report
+
+    def test_first_sync_is_full_export(self):
+        sap = FakeSapModel()
+        report = self._sync(_model(), sap)
+        self.assertEqual(len(report["added"]), 6)
+        self.assertEqual(len(sap.DatabaseTables.tables["Beam Object Connectivity"]), 3)
+        self.assertEqual(sap.errors, [])
+
+    def test_remote_rejection_leaves_map_unsaved(self):
+        sap = FakeSapModel()
+        sap.DatabaseTables.ApplyEditedTables = lambda fill: (0, 0, 0, 0, "", 3)
+        agent = EtabsAgent(sap, "token")
+        agent.start()
+        try:
+            writer = EtabsWriter(_model(), write_mode="sync", id_map_path=self.path)
+            writer.connect_remote(*agent.address, token="token")
+            with self.assertRaises(RuntimeError):
+                writer._write_elements()
+            writer.SapModel._client.sock.close()
+        finally:
+            agent.stop()
+
+        with EtabsIdMap(self.path) as id_map:
+            self.assertEqual(id_map.elements(), {})
+            self.assertEqual(id_map.points(), {})
+
+    def test_walls_are_written_with_all_their_points(self):
+        model = _model()
+        model.add_wall("W1", [[0, 20, 0], [5, 20, 0], [5, 20, 3], [0, 20, 3]], [], "M20", "L1", 3.0)
+        sap = FakeSapModel()
+        self._sync(model, sap)
+
+        rows = sap.DatabaseTables.tables["Wall Object Connectivity"]
+        points = [r[f"UniquePt{k}"] for r in rows for k in range(1, 5)]
+        self.assertTrue(all(points))
+        self.assertTrue(set(points) <= set(sap.points))
+        self.assertEqual({tuple(map(float, sap.points[p][1:])) for p in points}, {(20.0, 0.0), (20.0, 3.0)})
+
+    def test_resync_sends_only_changes(self):
+        sap = FakeSapModel()
+        self._sync(_model(), sap)
+        tables = sap.DatabaseTables.tables
+        n_points = len(tables["Point Object Connectivity"])
+
+        sap.reset()
+        report = self._sync(_model(), sap)
+        self.assertEqual(report["unchanged"], 6)
+        self.assertNotIn("DatabaseTables.SetTableForEditingArray", sap.call_counts())
+
+        # Se alarga una viga y se elimina un eje completo
+        sap.reset()
+        report = self._sync(_model(beam_end=6.0, n_beams=2), sap)
+        self.assertEqual(report["moved"], ["beams:B0:0"])
+        self.assertEqual(sorted(report["removed"]), ["beams:B2:0", "columns:C2:0"])
+        self.assertEqual(sap.call_counts()["FrameObj.Delete"], 2)
+        self.assertEqual(sap.errors, [])
+        self.assertEqual(tables["Beam Object Connectivity"][-1]["UniqueName"], "B1")
+        self.assertEqual(len(tables["Point Object Connectivity"]), n_points + 1)
+        self.assertNotIn("B3", sap.frames)
+
+    def test_retry_after_failed_write_does_not_repeat_deletes(self):
+        sap = FakeSapModel()
+        self._sync(_model(), sap)
+
+        # Se elimina un eje y se alarga una viga, pero ETABS rechaza la escritura de tablas
+        apply = sap.DatabaseTables.ApplyEditedTables
+        sap.DatabaseTables.ApplyEditedTables = lambda fill: (0, 0, 0, 0, "", 3)
+        with self.assertRaises(RuntimeError):
+            self._sync(_model(beam_end=6.0, n_beams=2), sap)
+        self.assertEqual(sap.call_counts()["FrameObj.Delete"], 2)
+
+        sap.DatabaseTables.ApplyEditedTables = apply
+        sap.reset()
+        report = self._sync(_model(beam_end=6.0, n_beams=2), sap)
+        self.assertEqual(report["removed"], [])
+        self.assertEqual(report["moved"], ["beams:B0:0"])
+        self.assertNotIn("FrameObj.Delete", sap.call_counts())
+        self.assertEqual(sap.errors, [])
+
+        sap.reset()
+        report = self._sync(_model(beam_end=6.0, n_beams=2), sap)
+        self.assertEqual(report["unchanged"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services import etabs_tables
+from services.etabs_tables import EtabsTableWriter
+from utils.fake_sap_model import FakeSapModel
+
+
+class _Tables:
+    """DatabaseTables mínimo: registra las llamadas."""
+    def __init__(self, ret=0):
+        self.ret = ret
+        self.edits = []
+        self.applies = 0
+
+    def SetTableForEditingArray(self, key, version, fields, n, data):
+        self.edits.append((key, list(fields), n, list(data)))
+        return (version, fields, n, data, self.ret)
+
+    def ApplyEditedTables(self, fill_import):
+        self.applies += 1
+        return (0, 0, 0, 0, "", 0)
+
+
+class _SapModel:
+    def __init__(self, ret=0):
+        self.DatabaseTables = _Tables(ret)
+
+
+class TestEtabsTables(unittest.TestCase):
+    def test_points_written_in_chunks(self):
+        model = Model("Test Model")
+        for i in range(5):
+            model.node_manager.get_or_create_node(float(i), 0.0, 3.0)
+        sap = _SapModel()
+        writer = EtabsTableWriter(sap, chunk_size=2)
+        nodes = list(model.node_manager.nodes.values())
+
+        rows = writer.write_table(etabs_tables.POINT_TABLE, writer.point_columns(nodes))
+
+        self.assertEqual(rows, 5)
+        self.assertEqual([e[2] for e in sap.DatabaseTables.edits], [2, 2, 1])
+        self.assertEqual(sap.DatabaseTables.applies, 3)
+        key, fields, n, data = sap.DatabaseTables.edits[0]
+        self.assertEqual(data[:4], [str(nodes[0].id), "0.0000", "0.0000", "3.0000"])
+
+    def test_story_chunks_write_every_wall_point(self):
+        model = Model("Test Model")
+        model.story_manager.add_story("Base", 0.0, 1)
+        model.story_manager.add_story("L1", 3.0, 2)
+        model.add_wall("W1", [[0, 0, 0], [5, 0, 0], [5, 0, 3], [0, 0, 3]], [], "M20", "L1", 3.0)
+        written, referenced = set(), set()
+        for _, batch in etabs_tables.story_chunks(model):
+            for table, columns in batch:
+                if table == etabs_tables.POINT_TABLE:
+                    written |= set(columns[0])
+                elif table == etabs_tables.WALL_TABLE:
+                    referenced |= {v for col in columns[1:] for v in col}
+
+        self.assertEqual(referenced, {str(n.id) for w in model.walls for n in w.nodes})
+        self.assertTrue(referenced <= written)
+
+    def test_error_code_raises(self):
+        writer = EtabsTableWriter(_SapModel(ret=1))
+        with self.assertRaises(RuntimeError):
+            writer.write_table(etabs_tables.FRAME_SECTION_TABLE, [["B1"], ["V-20/30"]])
+
+    def test_fatal_import_errors_raise(self):
+        # ETABS devuelve ret=0 pero informa filas rechazadas en NumFatalErrors e ImportLog
+        sap = FakeSapModel()
+        writer = EtabsTableWriter(sap)
+        writer.write_table(etabs_tables.POINT_TABLE, [["1", "2"], ["0", "5"], ["0", "0"], ["3", "3"]])
+        with self.assertRaises(RuntimeError) as ctx:
+            writer.write_table(etabs_tables.BEAM_TABLE, [["B1", "B2"], ["1", "1"], ["2", "99"]])
+
+        self.assertIn("99", str(ctx.exception))
+        self.assertNotIn(etabs_tables.BEAM_TABLE[0], sap.DatabaseTables.tables)
+        self.assertEqual(sap.calls[-1].ret, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from utils.fake_sap_model import FakeSapModel
+
+MODES = ("tables", "points", "api", "sync", "pipelined", "checkpoint")
+
+
+def _model():
+    """Dos pisos con dos muros (uno con abertura, varios paneles), una viga y una losa por piso."""
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    for s in (1, 2):
+        z0, z1 = 3.0 * (s - 1), 3.0 * s
+        model.story_manager.add_story(f"L{s}", z1, s + 1)
+        model.add_walls([
+            dict(revit_id=f"MA{s}", exterior_pts=[[0, 0, z0], [6, 0, z0], [6, 0, z1], [0, 0, z1]],
+                 holes_pts=[[[2, 0, z0 + 1], [4, 0, z0 + 1], [4, 0, z0 + 2], [2, 0, z0 + 2]]],
+                 section="M20", level=f"L{s}", height=3.0),
+            dict(revit_id=f"MB{s}", exterior_pts=[[0, 5, z0], [6, 5, z0], [6, 5, z1], [0, 5, z1]], holes_pts=[],
+                 section="M20", level=f"L{s}", height=3.0)], parallel=False)
+        model.add_beam(f"B{s}", "V-20/50", f"L{s}", (0, 0, z1), (0, 5, z1))
+        model.add_slabs([dict(revit_id=f"S{s}", exterior_pts=[[0, 0, z1], [6, 0, z1], [6, 5, z1], [0, 5, z1]],
+                              holes_pts=[], section="Losa15", level=f"L{s}")], parallel=False)
+    return model
+
+
+class TestEtabsWriterPiers(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _write(self, mode):
+        model = _model()
+        sap = FakeSapModel()
+        writer = EtabsWriter(model, write_mode=mode, id_map_path=os.path.join(self.tmp.name, f"{mode}.sqlite"),
+                             journal_path=os.path.join(self.tmp.name, f"{mode}.jsonl"))
+        writer.SapModel = sap
+        writer._write_nodes()
+        writer._write_elements()
+        return model, sap, writer
+
+    def test_every_mode_assigns_one_pier_per_revit_wall(self):
+        for mode in MODES:
+            with self.subTest(mode=mode):
+                model, sap, writer = self._write(mode)
+                tables = sap.DatabaseTables.tables
+
+                self.assertEqual(sap.errors, [])
+                self.assertEqual(sorted(r["Name"] for r in tables["Pier Label Definitions"]),
+                                 ["MA1", "MA2", "MB1", "MB2"])
+                assigned = {r["UniqueName"]: r["Pier Name"] for r in tables["Area Assignments - Pier Labels"]}
+                names = writer.etabs_names()["walls"]
+                self.assertEqual(assigned, {n: str(w.revit_id) for n, w in zip(names, model.walls)})
+                # Los piers se asignan a muros que existen en ETABS
+                self.assertTrue(set(assigned) <= set(sap.areas))
+
+    def test_unchanged_resync_does_not_rewrite_piers(self):
+        _, sap, _ = self._write("sync")
+        n_assigned = len(sap.DatabaseTables.tables["Area Assignments - Pier Labels"])
+
+        sap.reset()
+        writer = EtabsWriter(_model(), write_mode="sync", id_map_path=os.path.join(self.tmp.name, "sync.sqlite"))
+        writer.SapModel = sap
+        writer._write_elements()
+        self.assertNotIn("DatabaseTables.SetTableForEditingArray", sap.call_counts())
+        self.assertEqual(len(sap.DatabaseTables.tables["Area Assignments - Pier Labels"]), n_assigned)
+        self.assertEqual(len(writer.etabs_names()["walls"]), n_assigned)
+
+    def test_names_unknown_before_writing_elements(self):
+        for mode in ("sync", "api"):
+            with self.subTest(mode=mode), self.assertRaises(RuntimeError):
+                EtabsWriter(_model(), write_mode=mode).etabs_names()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import json
+import unittest
+import tempfile
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from services.remote_writer import EtabsAgent
+from utils.fake_sap_model import FakeSapModel
+
+
+def _model(n_stories=3):
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    for s in range(1, n_stories + 1):
+        model.story_manager.add_story(f"L{s}", 3.0 * s, s + 1)
+        for i in range(4):
+            model.add_beam(f"B{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s), (5 * i + 5, 0, 3 * s))
+            model.add_column(f"C{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s - 3), (5 * i, 0, 3 * s))
+    return model
+
+
+class _FailingTables:
+    """Envuelve DatabaseTables y falla a partir de la llamada n de ApplyEditedTables."""
+    def __init__(self, tables, fail_at):
+        self._tables = tables
+        self._n = 0
+        self.fail_at = fail_at
+
+    def __getattr__(self, name):
+        return getattr(self._tables, name)
+
+    def ApplyEditedTables(self, fill_import):
+        self._n += 1
+        if self._n >= self.fail_at:
+            raise ConnectionError("Se perdió la conexión COM")
+        return self._tables.ApplyEditedTables(fill_import)
+
+
+class TestExportCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.journal = os.path.join(self.tmp.name, "journal.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _writer(self, model, sap):
+        writer = EtabsWriter(model, write_mode="checkpoint", journal_path=self.journal)
+        writer.SapModel = sap
+        return writer
+
+    def test_resume_after_interruption(self):
+        model = _model()
+        sap = FakeSapModel()
+        real_tables = sap.DatabaseTables
+        sap.DatabaseTables = _FailingTables(real_tables, fail_at=9)
+        with self.assertRaises(ConnectionError):
+            self._writer(model, sap)._write_elements()
+
+        # Se reconecta al mismo modelo de ETABS y se retoma
+        sap.DatabaseTables = real_tables
+        stats = self._writer(model, sap).write_checkpointed()
+        self.assertGreater(stats["omitidos"], 0)
+        self.assertEqual(stats["omitidos"] + stats["escritos"], 6) # 3 pisos x (vigas, columnas)
+
+        ref = FakeSapModel()
+        ref_writer = EtabsWriter(_model())
+        ref_writer.SapModel = ref
+        ref_writer._write_elements()
+        for key, rows in ref.DatabaseTables.tables.items():
+            got = {tuple(r.values()) for r in real_tables.tables[key]}
+            self.assertEqual(got, {tuple(r.values()) for r in rows}, key)
+
+    def test_remote_rejection_is_not_journaled(self):
+        sap = FakeSapModel()
+        real_tables = sap.DatabaseTables
+        sap.DatabaseTables = _FailingTables(real_tables, fail_at=5) # Falla dentro de P1/columns/0
+        agent = EtabsAgent(sap, "token")
+        agent.start()
+        try:
+            writer = self._writer(_model(), None)
+            writer.connect_remote(*agent.address, token="token")
+            with self.assertRaises(RuntimeError):
+                writer.write_checkpointed()
+            writer.SapModel._client.sock.close()
+        finally:
+            agent.stop()
+
+        # Solo queda en la bitácora el trozo que ETABS aplicó completo
+        with open(self.journal, encoding="utf-8") as f:
+            done = [json.loads(line)["chunk"] for line in f if '"chunk"' in line]
+        self.assertEqual(done, ["P1/beams/0"])
+        self.assertEqual(len(real_tables.tables["Beam Object Connectivity"]), 4)
+        self.assertNotIn("Column Object Connectivity", real_tables.tables)
+
+    def test_other_model_starts_over(self):
+        sap = FakeSapModel()
+        self._writer(_model(), sap)._write_elements()
+
+        sap = FakeSapModel()
+        sap.filename = "OtroModelo.EDB"
+        stats = self._writer(_model(), sap).write_checkpointed()
+        self.assertEqual(stats["omitidos"], 0)
+        self.assertEqual(stats["escritos"], 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
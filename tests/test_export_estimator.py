@@ -0,0 +1,64 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from utils.fake_sap_model import FakeSapModel, LatencyModel
+
+
+def _model():
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    model.story_manager.add_story("L2", 6.0, 3)
+    model.add_column("C1", "C-40", "L1", (0, 0, 0), (0, 0, 3))
+    model.add_column("C2", "C-40", "L2", (0, 0, 3), (0, 0, 6))
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 3), (5, 0, 3))
+    model.add_beam("B2", "V-20/30", "L1", (5, 0, 3), (0, 0, 3)) # Duplicada (mismos nodos, invertida)
+    model.add_beam("B3", "V-20/30", "L1", (5, 0, 3), (5, 0.02, 3)) # Demasiado corta
+    return model
+
+
+class TestExportEstimator(unittest.TestCase):
+    def test_dry_run_matches_a_real_write_without_touching_etabs(self):
+        model = _model()
+        writer = EtabsWriter(model, write_mode="points")
+        report = writer.dry_run()
+
+        self.assertIsNone(writer.SapModel)
+        # El mismo pipeline contra un SapModel falso da las mismas llamadas y tiempo
+        fake = FakeSapModel()
+        writer.SapModel = fake
+        for step in (writer._write_stories, writer._write_grids, writer._write_nodes, writer._write_elements):
+            step()
+        self.assertEqual(report["llamadas"], len(fake.calls))
+        self.assertAlmostEqual(report["tiempo_estimado"], fake.simulated_time, places=3)
+        self.assertEqual(report["por_metodo"]["PointObj.AddCartesian"]["llamadas"], len(model.node_manager.nodes))
+
+        self.assertEqual(report["por_categoria"]["beams"], 3)
+        self.assertEqual(report["por_piso"]["P1"]["beams"], 3)
+        self.assertEqual(report["por_piso"]["P2"]["columns"], 1)
+        self.assertEqual(report["alertas"]["frames_duplicados"], ["B2"])
+        self.assertEqual(report["alertas"]["frames_cortos"], ["B3"])
+
+    def test_tables_mode_counts_rows_and_uses_calibrated_profile(self):
+        samples = [("DatabaseTables.SetTableForEditingArray", 10, 0.11),
+                   ("DatabaseTables.SetTableForEditingArray", 110, 0.21)]
+        latency = LatencyModel.calibrate(samples)
+        per_call, per_item = latency.overrides["DatabaseTables.SetTableForEditingArray"]
+        self.assertAlmostEqual(per_call, 0.1)
+        self.assertAlmostEqual(per_item, 0.001)
+
+        report = EtabsWriter(_model(), write_mode="tables").dry_run(latency)
+        # Una fila por nodo; conectividad + sección por frame
+        self.assertEqual(report["fases"]["nodos"]["filas"], 5)
+        self.assertEqual(report["fases"]["elementos"]["filas"], 5 * 2)
+        self.assertGreater(report["tiempo_estimado"], 0.1 * report["por_metodo"]["DatabaseTables.SetTableForEditingArray"]["llamadas"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from utils.fake_sap_model import FakeSapModel, LatencyModel
+
+
+def _model():
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    for i in range(10):
+        model.add_beam(f"B{i}", "V-20/30", "L1", (5 * i, 0, 3), (5 * i + 5, 0, 3))
+        model.add_column(f"C{i}", "V-20/30", "L1", (5 * i, 0, 0), (5 * i, 0, 3))
+    return model
+
+
+class TestFakeSapModel(unittest.TestCase):
+    def test_tables_mode_uses_fewer_calls(self):
+        """El modo por tablas reemplaza una llamada por objeto por unas pocas llamadas en bloque."""
+        results = {}
+        n_nodes = len(_model().node_manager.nodes)
+        for mode in ("api", "tables"):
+            sap = FakeSapModel(latency=LatencyModel(per_call=0.01, per_item=0.0))
+            writer = EtabsWriter(_model(), write_mode=mode)
+            writer.SapModel = sap
+            writer._write_nodes()
+            writer._write_elements()
+            self.assertEqual(sap.errors, [])
+            results[mode] = sap.summary()
+
+        self.assertEqual(results["api"]["por_metodo"]["FrameObj.AddByCoord"], n_nodes + 20)
+        self.assertLess(results["tables"]["llamadas"], 20)
+        self.assertLess(results["tables"]["tiempo_simulado"], results["api"]["tiempo_simulado"])
+
+    def test_points_mode_uses_named_points(self):
+        """En modo "points" los elementos referencian los puntos por Node.id, sin coordenadas."""
+        model = _model()
+        model.add_wall("W1", [[0, 2, 0], [4, 2, 0], [4, 2, 3], [0, 2, 3]], [], "M-20", "L1", 3.0)
+        sap = FakeSapModel()
+        writer = EtabsWriter(model, write_mode="points")
+        writer.SapModel = sap
+        writer._write_elements()
+
+        counts = sap.call_counts()
+        self.assertEqual(sap.errors, [])
+        self.assertEqual(counts["PointObj.AddCartesian"], len(model.node_manager.nodes))
+        self.assertEqual(counts["FrameObj.AddByPoint"], 20)
+        self.assertEqual(counts["AreaObj.AddByPoint"], len(model.walls))
+        self.assertNotIn("FrameObj.AddByCoord", counts)
+        self.assertEqual(sap.frames["B1"][:2], (str(model.beams[0].start_node.id), str(model.beams[0].end_node.id)))
+
+    def test_stories_and_tables_recorded(self):
+        model = _model()
+        sap = FakeSapModel()
+        model.story_manager.to_etabs_commands(sap)
+        writer = EtabsWriter(model)
+        writer.SapModel = sap
+        writer._write_elements()
+
+        self.assertEqual([s[0] for s in sap.stories], ["P1"])
+        self.assertEqual(len(sap.DatabaseTables.tables["Point Object Connectivity"]), len(model.node_manager.nodes))
+        self.assertEqual(sap.DatabaseTables.tables["Beam Object Connectivity"][0]["UniqueName"], "B1")
+
+    def test_invalid_payload_returns_error(self):
+        sap = FakeSapModel()
+        ret = sap.DatabaseTables.SetTableForEditingArray("Point Object Connectivity", 0, ["UniqueName", "X"], 2,
+                                                         ["1", "0.0", "2"])
+        self.assertEqual(ret[-1], 1)
+        self.assertEqual(len(sap.errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.grid_factory import GridFactory
+
+
+def _frame_model():
+    """Marco de 2 vanos con imprecisiones de modelación de algunos cm."""
+    model = Model("Test Model")
+    model.add_beam(1, "V", "L1", (0, 0, 3), (5, 0.02, 3))
+    model.add_beam(2, "V", "L1", (5, 0.02, 3), (10, -0.01, 3))
+    model.add_beam(3, "V", "L1", (0, 4, 3), (10, 4.03, 3))
+    model.add_beam(4, "V", "L1", (0, 0, 3), (0.02, 4, 3))
+    model.add_beam(5, "V", "L1", (5, 0.02, 3), (4.98, 4, 3))
+    model.add_beam(6, "V", "L1", (10, -0.01, 3), (10, 4.03, 3))
+    return model
+
+
+class TestGridFactory(unittest.TestCase):
+    def test_master_angles_wrap_around(self):
+        """Una viga a 179° pertenece a la dirección de 0°."""
+        model = _frame_model()
+        model.add_beam(7, "V", "L1", (0, 8, 3), (10, 8.2, 3))
+        model.add_beam(8, "V", "L1", (0, 9, 3), (10, 8.8, 3))
+        factory = GridFactory(model)
+        factory._find_master_angles(eps_deg=3, canonical_angles=None, snap_threshold=0)
+        self.assertEqual(factory.master_angles, [0.0, 90.0])
+
+    def test_snap_nodes_to_intersections(self):
+        model = _frame_model()
+        factory = GridFactory(model)
+        factory.generate_grids(eps_deg=3, eps_dist=0.1)
+        factory.snap_nodes(max_distance=0.1)
+
+        for node in model.node_manager.nodes.values():
+            self.assertIn(round(node.x, 2), factory.master_grids[90.0])
+            self.assertIn(round(node.y, 2), factory.master_grids[0.0])
+
+    def test_cleanup_counts_elements_per_grid(self):
+        model = _frame_model()
+        factory = GridFactory(model)
+        factory.generate_grids(eps_deg=3, eps_dist=0.1)
+        factory.snap_nodes(max_distance=0.1)
+        model.grid_manager.add_system("G9", "Z").add_grid("Z-1", 0.0, 20.0) # Grilla vacía
+
+        model.grid_manager.cleanup_unused_grids(tolerance=0.05)
+
+        counts = {(g.angle_deg, g.rho): g.element_count for g in model.grid_manager.get_all_grids()}
+        self.assertEqual(counts[(0.0, 0.0)], 2)
+        self.assertEqual(counts[(0.0, 4.0)], 1)
+        self.assertEqual(counts[(90.0, 5.0)], 1)
+        # La grilla vacía se conserva por ser la única de su dirección en su sistema
+        self.assertEqual(counts[(0.0, 20.0)], 0)
+
+    def test_incremental_update_keeps_labels(self):
+        model = _frame_model()
+        factory = GridFactory(model)
+        factory.generate_grids(eps_deg=3, eps_dist=0.1)
+        labels_before = {(g.angle_deg, g.rho): g.label for g in model.grid_manager.get_all_grids()}
+
+        # Nueva viga transversal en x=15 y eliminación de la viga en y=4
+        new_beam = model.add_beam(7, "V", "L1", (15, 0, 3), (15, 4, 3))
+        old_beam = next(b for b in model.beams if b.revit_id == 3)
+        model.beams.remove(old_beam)
+        summary = factory.update_grids(*factory.detect_changes())
+
+        grids = {(g.angle_deg, g.rho): g.label for g in model.grid_manager.get_all_grids()}
+        self.assertIn((90.0, 15.0), grids)
+        self.assertEqual(summary["grillas_nuevas"], 1)
+        for key, label in grids.items():
+            if key in labels_before:
+                self.assertEqual(label, labels_before[key])
+        # La grilla y=4 sigue ocupada por los extremos de las vigas transversales
+        self.assertIn((0.0, 4.0), grids)
+
+
+if __name__ == "__main__":
+    unittest.main()
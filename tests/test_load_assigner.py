@@ -0,0 +1,92 @@
+import unittest
+import tempfile
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from utils.fake_sap_model import FakeSapModel
+
+
+def _slab(x0, z, level, section):
+    return dict(revit_id=f"S{x0}{z}", exterior_pts=[[x0, 0, z], [x0 + 4, 0, z], [x0 + 4, 4, z], [x0, 4, z]],
+                holes_pts=[], section=section, level=level)
+
+
+def _model(first_slab=True):
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    model.story_manager.add_story("L2", 6.0, 3)
+    slabs = [_slab(0, 3, "L1", "Losa15"), _slab(10, 3, "L1", "Losa20"), _slab(0, 6, "L2", "Losa15")]
+    model.add_slabs(slabs if first_slab else slabs[1:])
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 3), (4, 0, 3))
+    model.add_beam("B2", "V-20/50", "L2", (0, 0, 6), (4, 0, 6))
+    return model
+
+
+class TestLoadAssigner(unittest.TestCase):
+    def test_loads_resolved_by_level_and_section(self):
+        model = _model()
+        sap = FakeSapModel()
+        writer = EtabsWriter(model)
+        writer.SapModel = sap
+        report = writer._write_loads([
+            {"pattern": "SC", "type": "Super Dead", "target": "slabs", "value": 100},
+            {"pattern": "SC", "type": "Super Dead", "target": "slabs", "level": "L1", "section": "Losa20", "value": 50},
+            {"pattern": "LL", "type": "Live", "target": "slabs", "level": "L2", "value": 250},
+            {"pattern": "SC", "type": "Super Dead", "target": "beams", "section": "V-20/50", "value": 300},
+        ])
+
+        self.assertEqual(sap.errors, [])
+        self.assertEqual(report, {"patrones": 2, "areas": 4, "frames": 1})
+        self.assertEqual(sap.call_counts()["DatabaseTables.ApplyEditedTables"], 3)
+
+        tables = sap.DatabaseTables.tables
+        areas = {(r["UniqueName"], r["LoadPattern"]): float(r["Load"]) for r in tables["Area Load Assignments - Uniform"]}
+        names = {s.revit_id: f"S{k + 1}" for k, s in enumerate(model.slabs)}
+        self.assertEqual(areas[(names["S103"], "SC")], 150.0)
+        self.assertEqual(areas[(names["S06"], "LL")], 250.0)
+        frames = tables["Frame Load Assignments - Distributed"]
+        self.assertEqual((frames[0]["UniqueName"], frames[0]["FA"]), ("B2", "300.0000"))
+        patterns = {r["Name"]: r["Type"] for r in tables["Load Pattern Definitions"]}
+        self.assertEqual(patterns, {"SC": "Super Dead", "LL": "Live"})
+
+    def test_sync_mode_uses_names_from_id_map(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "ids.sqlite")
+            sap = FakeSapModel()
+            for first_slab in (True, False):
+                model = _model(first_slab)
+                writer = EtabsWriter(model, write_mode="sync", id_map_path=path)
+                writer.SapModel = sap
+                writer._write_elements()
+            # Se eliminó la primera losa: la losa de L2 es la segunda de la lista pero en ETABS sigue siendo S3
+            writer._write_loads([{"pattern": "LL", "type": "Live", "target": "slabs", "level": "L2", "value": 250}])
+
+        self.assertEqual(sap.errors, [])
+        rows = sap.DatabaseTables.tables["Area Load Assignments - Uniform"]
+        self.assertEqual([r["UniqueName"] for r in rows], ["S3"])
+        self.assertIn("S3", sap.areas)
+
+    def test_api_mode_uses_names_assigned_by_etabs(self):
+        model = _model()
+        sap = FakeSapModel()
+        writer = EtabsWriter(model, write_mode="api")
+        writer.SapModel = sap
+        writer._write_elements()
+        writer._write_loads([{"pattern": "SC", "type": "Super Dead", "target": "beams", "value": 300}])
+
+        rows = sap.DatabaseTables.tables["Frame Load Assignments - Distributed"]
+        self.assertEqual({r["UniqueName"] for r in rows}, set(writer.etabs_names()["beams"]))
+        self.assertTrue({r["UniqueName"] for r in rows} <= set(sap.frames))
+
+        with self.assertRaises(RuntimeError):
+            EtabsWriter(model, write_mode="api")._write_loads([{"pattern": "SC", "value": 100}])
+
+
+if __name__ == '__main__':
+    unittest.main()
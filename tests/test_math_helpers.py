@@ -0,0 +1,30 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from utils.math_helpers import cluster_1d, cluster_centers_1d, weighted_median
+
+
+class TestCluster1D(unittest.TestCase):
+    def test_gap_split(self):
+        """Con min_samples=1, DBSCAN 1D equivale a cortar donde el salto supera eps."""
+        labels, _ = cluster_1d([5.0, 1.0, 1.05, 5.02, 1.1], eps=0.1)
+        self.assertEqual(list(labels), [1, 0, 0, 1, 0])
+
+    def test_circular_angles(self):
+        """179° y 1° pertenecen a la misma dirección."""
+        centers = cluster_centers_1d([179.0, 1.0, 0.5, 90.0, 91.0], eps=2.0, period=180)
+        self.assertEqual(len(centers), 2)
+        self.assertAlmostEqual(centers[0], 0.5)
+        self.assertAlmostEqual(centers[1], 90.5)
+
+    def test_weighted_median(self):
+        self.assertEqual(weighted_median([1.0, 1.05, 1.1], [1, 1, 10]), 1.1)
+        self.assertEqual(weighted_median([1.0, 2.0, 3.0]), 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import sys
+import os
+import numpy as np
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from utils.mesh_arrays import node_arrays, frame_cells, shell_cells, padded_cells, split_cells, cell_labels
+
+
+def _model():
+    model = Model("Test Model")
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 3), (5, 0, 3))
+    model.add_beam("B2", "V-20/50", "L2", (0, 0, 6), (5, 0, 6))
+    model.add_slab("S1", [[0, 0, 3], [5, 0, 3], [5, 5, 3], [0, 5, 3]], [], "Losa15", "L1")
+    return model
+
+
+class TestMeshArrays(unittest.TestCase):
+    def test_frame_connectivity_indexes_shared_points(self):
+        model = _model()
+        nodes, points, index = node_arrays(model)
+        cells = frame_cells(model.beams, index)
+
+        self.assertEqual(cells.shape, (2, 2))
+        np.testing.assert_allclose(points[cells[0]], [[0, 0, 3], [5, 0, 3]])
+        codes, labels = cell_labels(model.beams, "level")
+        self.assertEqual(labels[codes].tolist(), ["L1", "L2"])
+
+    def test_shell_cells_in_vtk_and_polygon_form(self):
+        model = _model()
+        _, points, index = node_arrays(model)
+        counts, flat = shell_cells(model.slabs, index)
+
+        padded = padded_cells(counts, flat)
+        self.assertEqual(len(padded), sum(counts) + len(counts))
+        self.assertEqual(padded[0], counts[0])
+        np.testing.assert_array_equal(padded[1:1 + counts[0]], flat[:counts[0]])
+
+        polygons = split_cells(points, counts, flat)
+        self.assertEqual(len(polygons), len(model.slabs))
+        self.assertEqual(sum(len(p) for p in polygons), len(flat))
+        self.assertTrue(np.allclose(np.concatenate(polygons)[:, 2], 3.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+import sys
+import os
+from shapely.geometry import box
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.model_coarsener import ModelCoarsener
+
+NO_SIMPLIFICATION = {"min_opening_area": 0.0, "min_opening_width": 0.0, "min_panel_area": 0.0, "min_beam_length": 0.0}
+
+
+def _level(**kwargs):
+    return dict(NO_SIMPLIFICATION, **kwargs)
+
+
+def _wall(i, hole):
+    """Muro de 5 x 3 m con una abertura (u0, z0, u1, z1) en coordenadas locales."""
+    x0 = 6.0 * i
+    u0, z0, u1, z1 = hole
+    return dict(revit_id=f"W{i}", exterior_pts=[[x0, 0, 0], [x0 + 5, 0, 0], [x0 + 5, 0, 3], [x0, 0, 3]],
+                holes_pts=[[[x0 + u0, 0, z0], [x0 + u1, 0, z0], [x0 + u1, 0, z1], [x0 + u0, 0, z1]]],
+                section="M20", level="L1", height=3.0)
+
+
+def _model():
+    """3 muros con una ventana de 0.4 x 0.4 m, uno con una rendija de 2.0 x 0.2 m, 2 vigas largas y 2 cortas."""
+    model = Model("Test Model")
+    walls = [_wall(i, (2.0, 1.0, 2.4, 1.4)) for i in range(3)] + [_wall(3, (1.0, 1.0, 3.0, 1.2))]
+    model.add_walls(walls, parallel=False)
+    model.add_beam("B1", "V-20/30", "L1", (0, 1, 3), (5, 1, 3))
+    model.add_beam("B2", "V-20/30", "L1", (6, 1, 3), (11, 1, 3))
+    model.add_beam("B3", "V-20/30", "L1", (5, 1, 3), (5.2, 1, 3))
+    model.add_beam("B4", "V-20/30", "L1", (11, 1, 3), (11.4, 1, 3))
+    return model
+
+
+def _count(model):
+    return len(model.walls) + len(model.slabs) + len(model.beams) + len(model.columns)
+
+
+class TestModelCoarsener(unittest.TestCase):
+    def test_model_within_budget_is_untouched(self):
+        model = _model()
+        before = _count(model)
+        report = ModelCoarsener(model).coarsen(before)
+
+        self.assertEqual(report["escalon"], 0)
+        self.assertEqual(_count(model), before)
+
+    def test_ladder_stops_at_first_level_within_budget(self):
+        model = _model()
+        levels = [NO_SIMPLIFICATION,
+                  _level(min_beam_length=0.5),                      # Solo vigas cortas: no alcanza
+                  _level(min_beam_length=0.5, min_opening_area=0.25), # Ventanas chicas: alcanza
+                  _level(min_beam_length=0.5, min_opening_area=0.25, min_opening_width=0.3)]
+        coarsener = ModelCoarsener(model, levels)
+        estimated = []
+        original = coarsener.estimate
+        coarsener.estimate = lambda level: estimated.append(level) or original(level)
+
+        # 3 muros sin ventana (1 panel) + muro con rendija (4 paneles) + 2 vigas largas
+        report = coarsener.coarsen(3 + 4 + 2)
+
+        self.assertEqual(report["escalon"], 2)
+        self.assertEqual(estimated, levels[:3]) # El escalón 3 no se evalúa
+        self.assertEqual(report["aberturas_ignoradas"], 3)
+        self.assertEqual(report["vigas_eliminadas"], 2)
+        self.assertEqual(report["despues"], 9)
+        self.assertEqual(_count(model), 9)
+        self.assertEqual(sorted(b.revit_id for b in model.beams), ["B1", "B2"])
+
+    def test_narrow_openings_are_filtered_by_width(self):
+        model = _model()
+        estimate = ModelCoarsener(model).estimate(_level(min_opening_width=0.3))
+        # Solo la rendija (0.2 m de alto, 0.4 m2) se ignora; las ventanas de 0.4 m de lado se mantienen
+        self.assertEqual(estimate["aberturas_ignoradas"], 1)
+        self.assertEqual(estimate["shells"], 3 * 4 + 1)
+
+    def test_coarsest_level_is_applied_when_budget_cannot_be_met(self):
+        model = _model()
+        report = ModelCoarsener(model).coarsen(1)
+
+        self.assertEqual(report["escalon"], len(ModelCoarsener(model).levels) - 1)
+        self.assertGreater(report["despues"], 1)
+        self.assertEqual(report["despues"], _count(model))
+        # Los nodos que dejaron las vigas eliminadas se limpian
+        used = {n.id for e in model.walls for n in e.nodes} | \
+               {n.id for b in model.beams for n in (b.start_node, b.end_node)}
+        self.assertEqual({n.id for n in model.node_manager.nodes.values()}, used)
+
+    def test_small_panels_merge_with_neighbors(self):
+        processor = Model("Test Model").wall_processor
+        processor.min_panel_area = 0.5
+        rects = [box(0, 0, 2, 3), box(2, 0, 2.1, 3), box(2.1, 0, 4, 3), box(4, 0, 4.5, 0.5)]
+        result, merged = processor.fusionar_paneles(rects)
+
+        # El panel de 0.3 m2 se une a su vecino; el de 0.25 m2 no comparte un lado completo
+        self.assertEqual(merged, 1)
+        self.assertEqual(len(result), 3)
+        self.assertAlmostEqual(sum(r.area for r in result), sum(r.area for r in rects))
+
+
+if __name__ == '__main__':
+    unittest.main()
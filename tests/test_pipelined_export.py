@@ -0,0 +1,65 @@
+import time
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from services.pipelined_export import PipelinedExporter, story_batches
+from utils.fake_sap_model import FakeSapModel, LatencyModel
+
+
+def _model(n_stories=4):
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    for s in range(1, n_stories + 1):
+        model.story_manager.add_story(f"L{s}", 3.0 * s, s + 1)
+        for i in range(5):
+            model.add_beam(f"B{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s), (5 * i + 5, 0, 3 * s))
+            model.add_column(f"C{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s - 3), (5 * i, 0, 3 * s))
+    return model
+
+
+class TestPipelinedExport(unittest.TestCase):
+    def test_pipelined_matches_tables_export(self):
+        model = _model()
+        sap = FakeSapModel()
+        writer = EtabsWriter(model, write_mode="pipelined")
+        writer.SapModel = sap
+        writer._write_nodes()
+        writer._write_elements()
+
+        ref = FakeSapModel()
+        ref_writer = EtabsWriter(_model())
+        ref_writer.SapModel = ref
+        ref_writer._write_elements()
+
+        self.assertEqual(sap.errors, [])
+        for key, rows in ref.DatabaseTables.tables.items():
+            got = sorted(tuple(r.values()) for r in sap.DatabaseTables.tables[key])
+            self.assertEqual(got, sorted(tuple(r.values()) for r in rows), key)
+
+    def test_overlaps_production_and_writing(self):
+        """Con producción y escritura de igual costo, el total se acerca al máximo y no a la suma."""
+        def slow_batches():
+            for batch in story_batches(_model(8), chunk_size=5):
+                time.sleep(0.02)
+                yield batch
+
+        sap = FakeSapModel(latency=LatencyModel(per_call=0.01, per_item=0.0), sleep=True)
+        stats = PipelinedExporter(sap, queue_size=2).run(slow_batches())
+        self.assertLess(stats["total"], stats["escritura"] + 0.02 * stats["lotes"])
+
+    def test_writer_error_propagates(self):
+        sap = FakeSapModel()
+        sap.DatabaseTables.ApplyEditedTables = lambda fill: (0, 0, 0, 0, "", 3)
+
+        with self.assertRaises(RuntimeError):
+            PipelinedExporter(sap, queue_size=1).run(story_batches(_model()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from services.e2k_writer import E2kWriter
+from services.property_writer import (PropertyCatalog, MATERIAL_GENERAL_TABLE, MATERIAL_CONCRETE_TABLE,
+                                      FRAME_RECTANGULAR_TABLE, WALL_PROPERTY_TABLE, SLAB_PROPERTY_TABLE)
+from utils.fake_sap_model import FakeSapModel
+
+
+def _model():
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    concrete = {"fc": 2500000.0, "e": 2.5e9, "v": 0.2, "density": 2500.0}
+    model.add_material("Concrete", "G30", concrete)
+    model.add_material("Concrete", "H30", dict(concrete)) # Mismo hormigón con otro nombre
+    model.add_section("Frame", "V-20/30", "G30", {"width": 0.2, "height": 0.3})
+    model.add_section("Frame", "V20x30", "H30", {"width": 0.20000001, "height": 0.3}) # Duplicada tras redondear
+    model.add_section("Frame", "C-40", "G30", {"width": 0.4, "height": 0.4})
+    model.add_section("Shell", "M-20", "G30", {"thickness": 0.2})
+    model.add_section("Shell", "Losa15", "G30", {"thickness": 0.15})
+    model.add_beam("B1", "V-20/30", "L1", (0, 0, 3), (5, 0, 3))
+    model.add_beam("B2", "V20x30", "L1", (0, 5, 3), (5, 5, 3))
+    model.add_column("C1", "C-40", "L1", (0, 0, 0), (0, 0, 3))
+    model.add_wall("W1", [[0, 0, 0], [4, 0, 0], [4, 0, 3], [0, 0, 3]], [], "M-20", "L1", 3)
+    model.add_slab("S1", [[0, 0, 3], [5, 0, 3], [5, 5, 3], [0, 5, 3]], [], "Losa15", "L1")
+    return model
+
+
+class TestPropertyCatalog(unittest.TestCase):
+    def test_deduplicate_merges_identical_materials_and_sections(self):
+        model = _model()
+        report = PropertyCatalog(model).deduplicate()
+
+        self.assertEqual(report["materiales_fusionados"], 1)
+        self.assertEqual(report["secciones_fusionadas"], 1)
+        self.assertEqual(report["sin_definir"], [])
+        self.assertEqual(sorted(model.materials), ["G30"])
+        self.assertNotIn("V20x30", model.sections)
+        # Los elementos referencian la sección canónica
+        self.assertEqual([b.get_etabs_section() for b in model.beams], ["V-20/30", "V-20/30"])
+        self.assertEqual(model.columns[0].get_etabs_section(), "C-40")
+
+    def test_write_sections_through_property_tables(self):
+        writer = EtabsWriter(_model())
+        writer.SapModel = FakeSapModel()
+        report = writer._write_sections()
+        tables = writer.SapModel.DatabaseTables.tables
+
+        self.assertEqual(report, {"materiales": 1, "frames": 2, "muros": 1, "losas": 1})
+        self.assertEqual(tables[MATERIAL_GENERAL_TABLE[0]],
+                         [{"Material": "G30", "Type": "Concrete", "SymType": "Isotropic"}])
+        self.assertEqual(tables[MATERIAL_CONCRETE_TABLE[0]], [{"Material": "G30", "Fc": "2500000.0"}])
+        self.assertEqual(sorted(r["Name"] for r in tables[FRAME_RECTANGULAR_TABLE[0]]), ["C-40", "V-20/30"])
+        self.assertEqual(tables[WALL_PROPERTY_TABLE[0]],
+                         [{"Name": "M-20", "Material": "G30", "ModelingType": "ShellThin", "Thickness": "0.2"}])
+        self.assertEqual(tables[SLAB_PROPERTY_TABLE[0]][0]["Thickness"], "0.15")
+
+    def test_wall_and_slab_with_same_thickness_are_not_merged(self):
+        model = _model()
+        model.add_section("Shell", "Losa20", "G30", {"thickness": 0.2}) # Mismo espesor que M-20
+        model.add_slab("S2", [[0, 0, 6], [5, 0, 6], [5, 5, 6], [0, 5, 6]], [], "Losa20", "L1")
+        writer = EtabsWriter(model)
+        writer.SapModel = FakeSapModel()
+        report = writer._write_sections()
+        tables = writer.SapModel.DatabaseTables.tables
+
+        self.assertEqual(report["muros"], 1)
+        self.assertEqual(report["losas"], 2)
+        self.assertIn("Losa20", model.sections)
+        self.assertEqual([w.get_etabs_section() for w in model.walls], ["M-20"])
+        self.assertEqual(sorted(s.get_etabs_section() for s in model.slabs), ["Losa15", "Losa20"])
+        self.assertEqual([r["Name"] for r in tables[WALL_PROPERTY_TABLE[0]]], ["M-20"])
+        self.assertEqual(sorted(r["Name"] for r in tables[SLAB_PROPERTY_TABLE[0]]), ["Losa15", "Losa20"])
+
+        # El .e2k clasifica las mismas secciones igual
+        lines = list(E2kWriter(model)._section_lines())
+        self.assertTrue(any('"M-20"  PROPTYPE  "Wall"' in line for line in lines))
+        self.assertTrue(any('"Losa20"  PROPTYPE  "Slab"' in line for line in lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from shapely.geometry import Polygon, box
+from shapely.ops import unary_union
+from domain.model import Model
+from services.rect_partition import RectanglePartitioner
+
+
+class TestRectanglePartitioner(unittest.TestCase):
+    def setUp(self):
+        self.partitioner = RectanglePartitioner()
+
+    def _assert_exact_cover(self, poly, rects):
+        self.assertAlmostEqual(sum(r.area for r in rects), poly.area, places=9)
+        self.assertAlmostEqual(unary_union(rects).area, poly.area, places=9)
+
+    def test_l_shape(self):
+        poly = Polygon([(0, 0), (4, 0), (4, 2), (2, 2), (2, 4), (0, 4)])
+        rects = self.partitioner.partition(poly)
+        self.assertEqual(len(rects), 2)
+        self._assert_exact_cover(poly, rects)
+
+    def test_aligned_holes_use_chords(self):
+        """Dos huecos alineados: las cuerdas entre ellos reducen de 7 tiras a 5 rectángulos."""
+        poly = Polygon([(0, 0), (10, 0), (10, 8), (0, 8)],
+                       [[(2, 2), (4, 2), (4, 3), (2, 3)], [(6, 2), (8, 2), (8, 3), (6, 3)]])
+        rects = self.partitioner.partition(poly)
+        self.assertEqual(len(rects), 5)
+        self._assert_exact_cover(poly, rects)
+
+    def test_non_rectilinear_returns_none(self):
+        self.assertIsNone(self.partitioner.partition(Polygon([(0, 0), (4, 0), (3, 3)])))
+
+    def test_max_aspect_ratio(self):
+        partitioner = RectanglePartitioner(max_aspect_ratio=2)
+        rects = partitioner.partition(box(0, 0, 10, 1))
+        self.assertEqual(len(rects), 5)
+        for r in rects:
+            minx, miny, maxx, maxy = r.bounds
+            self.assertLessEqual((maxx - minx) / (maxy - miny), 2 + 1e-9)
+
+    def test_processor_min_mode_reports_reduction(self):
+        model = Model("Test Model")
+        model.slab_processor.partition_mode = "min"
+        model.add_slab(
+            revit_id="S1",
+            exterior_pts=[[0, 0, 3], [10, 0, 3], [10, 8, 3], [0, 8, 3]],
+            holes_pts=[[[2, 2, 3], [4, 2, 3], [4, 3, 3], [2, 3, 3]],
+                       [[6, 2, 3], [8, 2, 3], [8, 3, 3], [6, 3, 3]]],
+            section="L15",
+            level="L1",
+        )
+        self.assertEqual(len(model.slabs), 5)
+        self.assertEqual(model.slab_processor.partition_report, [("S1", 7, 5)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import unittest
+import socket
+import tempfile
+import struct
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.etabs_writer import EtabsWriter
+from services.remote_writer import EtabsAgent, RemoteEtabsClient
+from utils.fake_sap_model import FakeSapModel
+
+
+def _model():
+    model = Model("Test Model")
+    model.story_manager.add_story("Base", 0.0, 1)
+    model.story_manager.add_story("L1", 3.0, 2)
+    model.story_manager.add_story("L2", 6.0, 3)
+    for s in (1, 2):
+        for i in range(30):
+            model.add_beam(f"B{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s), (5 * i + 5, 0, 3 * s))
+            model.add_column(f"C{s}{i}", "V-20/30", f"L{s}", (5 * i, 0, 3 * s - 3), (5 * i, 0, 3 * s))
+    return model
+
+
+TOKEN = "token-de-prueba"
+
+
+class TestRemoteWriter(unittest.TestCase):
+    def setUp(self):
+        self.sap = FakeSapModel()
+        self.agent = EtabsAgent(self.sap, TOKEN)
+        self.agent.start()
+
+    def tearDown(self):
+        self.agent.stop()
+
+    def test_end_to_end_matches_local_export(self):
+        model = _model()
+        writer = EtabsWriter(model)
+        writer.connect_remote(*self.agent.address, token=TOKEN)
+        self.assertEqual(writer.SapModel.GetModelFilename(True), "FakeModel.EDB")
+        writer._write_stories()
+        writer._write_elements()
+        stats = writer.SapModel._client.stats
+        writer.disconnect_remote()
+
+        ref = FakeSapModel()
+        ref_writer = EtabsWriter(_model())
+        ref_writer.SapModel = ref
+        ref_writer._write_elements()
+
+        self.assertEqual(self.sap.errors, [])
+        self.assertEqual([s[0] for s in self.sap.stories], ["P1", "P2"])
+        self.assertEqual(self.sap.DatabaseTables.tables, ref.DatabaseTables.tables)
+        # Los lotes de tablas viajan comprimidos
+        payload = sum(len(",".join(map(str, r.values()))) for rows in ref.DatabaseTables.tables.values() for r in rows)
+        self.assertLess(stats["bytes"], payload)
+
+    def test_agent_error_is_reported(self):
+        writer = EtabsWriter(_model())
+        writer.connect_remote(*self.agent.address, token=TOKEN)
+        writer.SapModel.DatabaseTables.SetTableForEditingArray("Point Object Connectivity", 0, ["UniqueName"], 2, ["1"])
+        with self.assertRaises(RuntimeError):
+            writer.SapModel.DatabaseTables.ApplyEditedTables(True)
+            writer.SapModel.sync()
+        writer.SapModel._client.sock.close()
+
+    def test_wrong_token_is_rejected(self):
+        with self.assertRaises(ConnectionError):
+            RemoteEtabsClient(*self.agent.address, token="otro")
+        self.assertEqual(self.sap.calls, [])
+        # El agente sigue atendiendo a clientes con el token correcto
+        client = RemoteEtabsClient(*self.agent.address, token=TOKEN)
+        self.assertEqual(client.send_batch([["GetModelFilename", [True], True]], reply=True), ["FakeModel.EDB"])
+        client.close()
+
+    def _assert_agent_serves(self):
+        client = RemoteEtabsClient(*self.agent.address, token=TOKEN, timeout=5.0)
+        self.assertEqual(client.send_batch([["GetModelFilename", [True], True]], reply=True), ["FakeModel.EDB"])
+        client.close()
+
+    def test_malformed_hello_does_not_stop_agent(self):
+        # Trama de 9 bytes marcada como comprimida con un cuerpo que no es zlib, antes de autenticar
+        for frame in (struct.pack(">BI", 1, 4) + b"junk", struct.pack(">BI", 0, 1 << 30)):
+            with socket.create_connection(self.agent.address, timeout=5.0) as sock:
+                sock.sendall(frame)
+                self.assertEqual(sock.recv(1 << 16)[:1], b"\x00") # Responde el rechazo y corta
+        self.assertTrue(self.agent._thread.is_alive())
+        self._assert_agent_serves()
+
+    def test_client_dropping_mid_frame_does_not_stop_agent(self):
+        client = RemoteEtabsClient(*self.agent.address, token=TOKEN, timeout=5.0)
+        client.sock.sendall(struct.pack(">BI", 0, 100) + b'{"type": "batch"')
+        client.sock.close()
+        self._assert_agent_serves()
+        self.assertTrue(self.agent._thread.is_alive())
+
+    def test_rejected_apply_through_proxy_commits_nothing(self):
+        # ETABS responde sin error COM pero con errores fatales de importación
+        self.sap.DatabaseTables.ApplyEditedTables = lambda fill: (2, 2, 0, 0, "Error fatal al importar", 0)
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = os.path.join(tmp, "journal.jsonl")
+            writer = EtabsWriter(_model(), write_mode="checkpoint", journal_path=journal)
+            writer.connect_remote(*self.agent.address, token=TOKEN)
+            with self.assertRaisesRegex(RuntimeError, "Error fatal al importar"):
+                writer.write_checkpointed()
+            writer.disconnect_remote()
+
+            with open(journal, encoding="utf-8") as f:
+                done = [json.loads(line)["chunk"] for line in f if '"chunk"' in line]
+        self.assertEqual(done, [])
+
+    def test_batches_after_a_failed_one_are_dropped(self):
+        client = RemoteEtabsClient(*self.agent.address, token=TOKEN, timeout=5.0)
+        client.send_batch([["File.NewBlank", [], False]])
+        client.send_batch([["SetPresentUnits", [8], False]])
+        with self.assertRaises(RuntimeError):
+            client.wait_all()
+        with self.assertRaises(RuntimeError):
+            client.send_batch([["GetModelFilename", [True], True]], reply=True)
+        client.close()
+        self.assertIsNone(self.sap.units)
+
+    def test_api_mode_is_rejected_before_writing(self):
+        writer = EtabsWriter(_model(), write_mode="api")
+        with self.assertRaises(RuntimeError):
+            writer.connect_remote(*self.agent.address, token=TOKEN)
+        self.assertIsNone(writer.SapModel)
+        self._assert_agent_serves()
+        self.assertEqual(self.sap.call_counts(), {"GetModelFilename": 1})
+
+    def test_file_commands_are_not_allowed(self):
+        client = RemoteEtabsClient(*self.agent.address, token=TOKEN)
+        with self.assertRaises(RuntimeError):
+            client.send_batch([["File.NewBlank", [], False]], reply=True)
+        self.assertNotIn("File.NewBlank", self.sap.call_counts())
+        client.sock.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
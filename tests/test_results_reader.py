@@ -0,0 +1,71 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.results_reader import EtabsResultsReader
+from utils.fake_sap_model import FakeSapModel
+
+# Payloads grabados (formato de GetTableForDisplayArray: campos + datos planos)
+BEAM_FIELDS = ["Story", "Beam", "UniqueName", "OutputCase", "CaseType", "Station", "P", "V2", "V3", "T", "M2", "M3"]
+BEAM_DATA = [
+    "P1", "B1", "B1", "Dead", "LinStatic", "0", "0", "-12.5", "0", "0", "0", "-8.1",
+    "P1", "B1", "B1", "Dead", "LinStatic", "5", "0", "12.5", "0", "0", "0", "-9.4",
+    "P1", "B2", "B2", "Dead", "LinStatic", "0", "0", "-3.0", "0", "0", "0", "2.2",
+    "P1", "B9", "B9", "Dead", "LinStatic", "0", "0", "-1.0", "0", "0", "0", "1.0",
+    "P1", "B2", "B2", "Live", "LinStatic", "0", "0", "-1.0", "0", "0", "0", "7.5",
+]
+JOINT_FIELDS = ["Story", "Label", "UniqueName", "OutputCase", "CaseType", "Ux", "Uy", "Uz", "Rx", "Ry", "Rz"]
+PIER_FIELDS = ["Story", "Pier", "OutputCase", "CaseType", "Location", "P", "V2", "V3", "T", "M2", "M3"]
+
+
+def _model():
+    model = Model("Test Model")
+    model.add_beam("R-100", "V-20/30", "L1", (0, 0, 3), (5, 0, 3))
+    model.add_beam("R-200", "V-20/30", "L1", (5, 0, 3), (10, 0, 3))
+    model.add_wall("R-300", [[0, 2, 0], [4, 2, 0], [4, 2, 3], [0, 2, 3]], [], "M-20", "L1", 3.0)
+    return model
+
+
+class TestResultsReader(unittest.TestCase):
+    def setUp(self):
+        self.model = _model()
+        self.sap = FakeSapModel()
+        tables = self.sap.DatabaseTables
+        tables.load_display_table("Element Forces - Beams", BEAM_FIELDS, BEAM_DATA)
+        tables.load_display_table("Element Forces - Columns", BEAM_FIELDS, [])
+        node = self.model.beams[1].end_node
+        tables.load_display_table("Joint Displacements", JOINT_FIELDS,
+                                  ["P1", "1", str(node.id), "Dead", "LinStatic", "0.001", "0", "-0.004", "", "", ""])
+        tables.load_display_table("Pier Forces", PIER_FIELDS,
+                                  ["P1", "R-300", "Dead", "LinStatic", "Bottom", "-150", "3", "0", "0", "0", "12"])
+        self.reader = EtabsResultsReader(self.model, self.sap)
+
+    def test_frame_forces_joined_to_revit(self):
+        beams = self.reader.frame_forces()["beams"]
+        self.assertEqual(beams["M3"].dtype, float)
+        self.assertEqual(list(beams["revit_id"]), ["R-100", "R-100", "R-200", None, "R-200"])
+        self.assertIs(beams["element"][2], self.model.beams[1])
+
+        dead = self.reader.frame_forces(cases=["Dead"])["beams"]
+        self.assertEqual(self.reader.envelope_by_revit(dead, "M3"), {"R-100": 9.4, "R-200": 2.2})
+
+    def test_joints_and_piers(self):
+        joints = self.reader.joint_displacements()
+        node = self.model.beams[1].end_node
+        self.assertEqual(joints["node_id"][0], node.id)
+        self.assertAlmostEqual(joints["x"][0], 10.0)
+        self.assertTrue(np.isnan(joints["Rx"][0]))
+
+        piers = self.reader.pier_forces()
+        self.assertEqual(piers["revit_id"][0], "R-300")
+        self.assertAlmostEqual(piers["P"][0], -150.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+import unittest
+import sys
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services import BaseShellProcessor as base_shell
+
+
+class _CountingExecutor(ProcessPoolExecutor):
+    """ProcessPoolExecutor que cuenta los elementos enviados a los workers."""
+    tasks = 0
+
+    def submit(self, fn, processor, chunk):
+        type(self).tasks += len(chunk)
+        return super().submit(fn, processor, chunk)
+
+
+def _walls_data(n):
+    """
+    Muros de 3 m de alto con una ventana, desplazados en Y para que no compartan
+    nodos. Largo y ventana cambian por muro: ninguna forma se repite, así que la
+    caché no resuelve ninguno y todos pasan por el pool.
+    """
+    data = []
+    for i in range(n):
+        y = 2.0 * i
+        length = 5.0 + 0.3 * i
+        x0, x1 = 1.0 + 0.1 * i, 2.5 + 0.2 * i
+        data.append(dict(
+            revit_id=f"W{i}",
+            exterior_pts=[[0, y, 0], [length, y, 0], [length, y, 3], [0, y, 3]],
+            holes_pts=[[[x0, y, 1], [x1, y, 1], [x1, y, 2], [x0, y, 2]]],
+            section="M20",
+            level="L1",
+            height=3.0,
+        ))
+    return data
+
+
+def _slabs_data(n):
+    data = []
+    for i in range(n):
+        z = 3.0 * (i + 1)
+        width = 8.0 + 0.5 * i
+        data.append(dict(
+            revit_id=f"S{i}",
+            exterior_pts=[[0, 0, z], [width, 0, z], [width, 6, z], [0, 6, z]],
+            holes_pts=[[[2, 2, z], [4 + 0.25 * i, 2, z], [4 + 0.25 * i, 3, z], [2, 3, z]]],
+            section="L15",
+            level=f"L{i}",
+        ))
+    return data
+
+
+def _snapshot(model):
+    nodes = sorted((n.id, n.x, n.y, n.z) for n in model.node_manager.nodes.values())
+    walls = [(w.revit_id, [n.id for n in w.nodes]) for w in model.walls]
+    slabs = [(s.revit_id, [n.id for n in s.nodes]) for s in model.slabs]
+    return nodes, walls, slabs
+
+
+class TestParallelShellDecomposition(unittest.TestCase):
+    def _build(self, parallel):
+        model = Model("Test Model")
+        for processor in (model.wall_processor, model.slab_processor):
+            processor.min_parallel_batch = 1
+            processor.chunk_size = 3
+            processor.max_workers = 2
+        model.add_walls(_walls_data(10), parallel=parallel)
+        model.add_slabs(_slabs_data(5), parallel=parallel)
+        return model
+
+    def test_parallel_matches_serial(self):
+        """El modo paralelo debe producir los mismos nodos (incluidos IDs) y elementos."""
+        serial = self._build(parallel=False)
+
+        _CountingExecutor.tasks = 0
+        original = base_shell.ProcessPoolExecutor
+        base_shell.ProcessPoolExecutor = _CountingExecutor
+        try:
+            # Sin advertencias: la descomposición no cayó al modo serial
+            with self.assertNoLogs("Revit2Etabs.Service.ShellProcessor", level="WARNING"):
+                parallel = self._build(parallel=True)
+        finally:
+            base_shell.ProcessPoolExecutor = original
+
+        self.assertEqual(_CountingExecutor.tasks, 10 + 5) # Todos los muros y losas pasaron por los workers
+        self.assertEqual(_snapshot(serial), _snapshot(parallel))
+
+    def test_batch_matches_single_calls(self):
+        """add_walls en lote equivale a llamar add_wall muro por muro."""
+        batch = self._build(parallel=False)
+        single = Model("Test Model")
+        for w in _walls_data(10):
+            single.add_wall(**w)
+        for s in _slabs_data(5):
+            single.add_slab(**s)
+        self.assertEqual(_snapshot(batch), _snapshot(single))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import sys
+import os
+from shapely.geometry import Polygon, box
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+
+
+class TestShellRegularization(unittest.TestCase):
+    def setUp(self):
+        self.processor = Model("Test Model").slab_processor
+
+    def test_snaps_millimetre_offsets_and_counts_avoided_slivers(self):
+        # Rectángulo de Revit con esquinas corridas 2 y 1 mm
+        poly = Polygon([(0, 0), (3, 0), (3.002, 3), (0, 3.001)])
+        regular, slivers = self.processor.regularizar_contorno(poly)
+
+        self.assertEqual(len(regular.exterior.coords) - 1, 4)
+        minx, miny, maxx, maxy = regular.bounds
+        self.assertAlmostEqual(regular.area, (maxx - minx) * (maxy - miny))
+        # Una tira delgada en u y otra en v que el corte ya no generará
+        self.assertEqual(slivers, 2)
+        self.assertEqual(len(self.processor._run_shapely_pipeline(regular)), 1)
+
+    def test_clean_outline_reports_no_slivers(self):
+        poly = Polygon([(0, 0), (4, 0), (4, 1), (2, 1), (2, 3), (0, 3)])
+        regular, slivers = self.processor.regularizar_contorno(poly)
+        self.assertEqual(slivers, 0)
+        self.assertAlmostEqual(regular.area, poly.area)
+
+    def test_absorbs_sliver_into_rectangular_neighbor(self):
+        rects = [box(0, 0, 2, 3), box(2, 0, 2.03, 3), box(2.03, 0, 4, 3)]
+        result, absorbed = self.processor.absorber_astillas(rects)
+
+        self.assertEqual(absorbed, 1)
+        self.assertEqual(len(result), 2)
+        self.assertAlmostEqual(sum(r.area for r in result), 12.0)
+
+    def test_absorbs_sliver_in_l_shape_corner(self):
+        # Escalón de 3 cm: la tira [1.00, 1.03] no tiene vecino del mismo alto
+        poly = Polygon([(0, 0), (3, 0), (3, 1), (1.03, 1), (1.03, 2), (1.0, 2), (1.0, 3), (0, 3)])
+        rects = self.processor._run_shapely_pipeline(poly)
+        self.assertTrue(any(r.bounds[2] - r.bounds[0] < self.processor.min_strip_width for r in rects))
+
+        result, absorbed = self.processor.absorber_astillas(rects)
+        self.assertEqual(absorbed, 1)
+        self.assertFalse(any(min(r.bounds[2] - r.bounds[0], r.bounds[3] - r.bounds[1])
+                             < self.processor.min_strip_width for r in result))
+        # Sin traslapes y con a lo más el área de la astilla perdida
+        self.assertAlmostEqual(sum(r.area for r in result), result[0].union(result[1]).area)
+        self.assertLessEqual(poly.area - sum(r.area for r in result), 0.03 * 2 + 1e-9)
+
+    def test_sliver_chain_merges_in_linear_passes(self):
+        rects = [box(0, 0, 1, 1)] + [box(1 + 0.01 * k, 0, 1 + 0.01 * (k + 1), 1) for k in range(200)]
+        result, absorbed = self.processor.absorber_astillas(rects)
+        self.assertEqual(absorbed, 200)
+        self.assertEqual([r.bounds for r in result], [(0.0, 0.0, 3.0, 1.0)])
+
+    def test_regularization_can_be_disabled(self):
+        model = Model("Test Model")
+        model.slab_processor.regularize = False
+        slab = dict(revit_id="S1", exterior_pts=[[0, 0, 3], [3, 0, 3], [3.002, 3, 3], [0, 3.001, 3]],
+                    holes_pts=[], section="Losa15", level="L1")
+        model.add_slabs([slab], parallel=False)
+        regular = Model("Test Model")
+        regular.add_slabs([slab], parallel=False)
+        self.assertGreater(len(model.slabs), len(regular.slabs))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import unittest
+import sys
+import os
+
+# Añadir 'src' al path para que los imports funcionen sin prefijo
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from domain.model import Model
+from services.geometry_optimizer import GeometryOptimizer
+from services.grid_factory import GridFactory
+from services import typical_floor
+from services.typical_floor import TypicalFloorDetector
+
+CORNERS = [(0, 0), (6, 0), (6, 5), (0, 5)]
+
+
+def _floor(model, f, z0, extra_beam=False):
+    """Piso f entre z0 y z0 + 3: 4 columnas, 4 vigas perimetrales, un muro y una losa."""
+    level = f"L{f}"
+    top = z0 + 3.0
+    for k, (x, y) in enumerate(CORNERS):
+        model.add_column(f"C{f}_{k}", "C-40", level, (x, y, z0), (x, y, top))
+        x2, y2 = CORNERS[(k + 1) % 4]
+        model.add_beam(f"B{f}_{k}", "V-20/50", level, (x, y, top), (x2, y2, top))
+    if extra_beam:
+        model.add_beam(f"B{f}_x", "V-20/50", level, (3, 0, top), (3, 5, top))
+    model.add_walls([dict(revit_id=f"W{f}", exterior_pts=[[0, 0, z0], [6, 0, z0], [6, 0, top], [0, 0, top]],
+                          holes_pts=[[[2, 0, z0 + 1], [4, 0, z0 + 1], [4, 0, z0 + 2], [2, 0, z0 + 2]]],
+                          section="M20", level=level, height=3.0)], parallel=False)
+    model.add_slabs([dict(revit_id=f"S{f}", exterior_pts=[[x, y, top] for x, y in CORNERS], holes_pts=[],
+                          section="Losa15", level=level)], parallel=False)
+
+
+def _model():
+    model = Model("Test Model")
+    for i, name in enumerate(["Base", "L1", "L2", "L3"]):
+        model.story_manager.add_story(name, 3.0 * i, i + 1)
+    _floor(model, 1, 0.0, extra_beam=True) # Distinto: una viga más
+    _floor(model, 2, 3.0)
+    _floor(model, 3, 6.0)
+    return model
+
+
+def _categories(model):
+    return {c: len(getattr(model, c)) for c in ("beams", "columns", "walls", "slabs")}
+
+
+class TestTypicalFloorDetector(unittest.TestCase):
+    def test_detects_identical_floors_as_master_and_similar(self):
+        model = _model()
+        groups = TypicalFloorDetector(model).detect()
+
+        stories = model.story_manager.stories
+        self.assertEqual([[s.name for s in g] for g in groups], [["L2", "L3"]])
+        self.assertTrue(stories[2].is_master)
+        self.assertIs(stories[3].similar_to, stories[2])
+        self.assertFalse(stories[1].is_master)
+        self.assertIsNone(stories[1].similar_to)
+
+    def test_grouping_does_not_trust_hash_values(self):
+        # Con todos los hash iguales, un piso distinto no puede quedar como similar
+        typical_floor.hash = lambda value: 0
+        try:
+            groups = TypicalFloorDetector(_model()).detect()
+        finally:
+            del typical_floor.hash
+        self.assertEqual([[s.name for s in g] for g in groups], [["L2", "L3"]])
+
+    def test_collapse_keeps_only_master_floors(self):
+        model = _model()
+        before = _categories(model)
+        detector = TypicalFloorDetector(model)
+        detector.detect()
+        detector.collapse()
+
+        after = _categories(model)
+        self.assertEqual(after["columns"], before["columns"] - 4)
+        self.assertEqual(after["slabs"], before["slabs"] - 1)
+        self.assertFalse(any(e.revit_id.startswith(("C3", "B3", "W3", "S3"))
+                             for c in ("beams", "columns", "walls", "slabs") for e in getattr(model, c)))
+
+    def test_replicate_after_optimization_and_grid_snapping(self):
+        model = _model()
+        before = _categories(model)
+        detector = TypicalFloorDetector(model)
+        detector.detect()
+        detector.collapse()
+
+        # Misma secuencia que main.py: la optimización reemplaza nodos y puede reemplazar elementos
+        optimizer = GeometryOptimizer(model)
+        optimizer.remove_short_elements(0.2)
+        optimizer.remove_orphan_nodes()
+        optimizer.transform_model(dx=1.0, dy=2.0, alpha_deg=0)
+        optimizer.pre_snap_nodes(0.15)
+        grid_factory = GridFactory(model)
+        grid_factory.generate_grids(eps_deg=10, eps_dist=0.1, round_decimal=2)
+        grid_factory.snap_nodes(max_distance=0.15)
+        optimizer.pre_snap_nodes(0.075)
+        # Objetos nuevos para los elementos maestros (p.ej. una re-descomposición)
+        model.columns = [type(c)(c.revit_id, c.section, c.level, c.start_node, c.end_node) for c in model.columns]
+
+        detector.replicate()
+
+        self.assertEqual(_categories(model), before)
+        replicas = [c for c in model.columns if c.revit_id.startswith("C3")]
+        self.assertEqual(len(replicas), 4)
+        self.assertEqual({(c.start_node.z, c.end_node.z) for c in replicas}, {(6.0, 9.0)})
+        masters = sorted((c.start_node.x, c.start_node.y) for c in model.columns if c.revit_id.startswith("C2"))
+        self.assertEqual(sorted((c.start_node.x, c.start_node.y) for c in replicas), masters)
+        self.assertEqual({w.revit_id for w in model.walls}, {"W1", "W2", "W3"})
+        self.assertEqual({w.level for w in model.walls if w.revit_id == "W3"}, {"L3"})
+
+
+if __name__ == '__main__':
+    unittest.main()